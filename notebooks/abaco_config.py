@@ -10,6 +10,7 @@ from datetime import datetime
 PROJECT_ROOT = Path(__file__).parent.parent
 NOTEBOOKS_DIR = PROJECT_ROOT / "notebooks"
 DATA_DIR = PROJECT_ROOT / "data"
+STAGING_DIR = DATA_DIR / "staging"  # Normalized Drive files as Parquet (<file_id>/<modifiedTime>.parquet)
 EXPORTS_DIR = PROJECT_ROOT / "exports"
 CHARTS_DIR = NOTEBOOKS_DIR / "charts"
 
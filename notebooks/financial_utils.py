@@ -246,6 +246,35 @@ def export_analysis_results(df: pd.DataFrame, analysis_metrics: Dict, output_fil
         raise
 
 
+
+def load_staged_data(source_type: Optional[str] = None, as_arrow: bool = False) -> Dict:
+    """
+    Load normalized Drive files from the Parquet staging cache
+
+    Files are memory-mapped, so as_arrow=True returns pyarrow Tables without
+    copying; otherwise each table is converted to a DataFrame. Keyed by the
+    Drive file name; source_type filters on the detected source type.
+    """
+    import json
+
+    import pyarrow.parquet as pq
+    from abaco_config import STAGING_DIR
+
+    staged = {}
+    for path in sorted(STAGING_DIR.glob("*/*.parquet")):
+        metadata = json.loads((pq.read_schema(path).metadata or {}).get(b"abaco", b"{}"))
+        if source_type and metadata.get("source_type") != source_type:
+            continue
+        table = pq.read_table(path, memory_map=True)
+        name = metadata.get("name", path.parent.name)
+        if metadata.get("sheet"):
+            name = f"{name} [{metadata['sheet']}]"
+        staged[name] = table if as_arrow else table.to_pandas(split_blocks=True)
+
+    logger.info(f"✅ Loaded {len(staged)} staged files from {STAGING_DIR}")
+    return staged
+
+
 if __name__ == "__main__":
     # Example usage
     try:
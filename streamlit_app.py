@@ -1,9 +1,8 @@
 """ABACO Financial Intelligence Platform - Streamlit Dashboard"""
 
-import io
 import json
-import re
-from datetime import datetime, timezone
+import sys
+from pathlib import Path
 import warnings
 
 import pandas as pd
@@ -11,10 +10,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from google.oauth2 import service_account
 from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
 from supabase import create_client
 import streamlit as st
 
+sys.path.insert(0, str(Path(__file__).parent / "streamlit_app"))
+from utils.ingestion import DataIngestionEngine  # noqa: E402
+from utils.sinks import SupabaseSink  # noqa: E402
+from utils.sources import DriveSource  # noqa: E402
+
 warnings.filterwarnings("ignore")
 
 # ============================================================================
@@ -49,27 +52,14 @@ HOVERMODE_CLOSEST = "closest"
 GDRIVE_SCOPES = ["https://www.googleapis.com/auth/drive.readonly"]
 GDRIVE_API_VERSION = "v3"
 
-# Table Mapping for Data Ingestion
-TABLE_MAP = {
-    "portfolio": "raw_portfolios",
-    "facility": "raw_facilities",
-    "customer": "raw_customers",
-    "payment": "raw_payments",
-    "risk": "raw_risk_events",
-}
+# Batched Upserts (rows per PostgREST request, files waiting for upload)
+UPSERT_BATCH_SIZE = 500
+UPSERT_QUEUE_SIZE = 2
 
-# Primary Keys for Conflict Resolution
-PRIMARY_KEYS = {
-    "raw_portfolios": ["workbook_name", "portfolio_name"],
-    "raw_facilities": ["facility_code"],
-    "raw_customers": ["customer_code"],
-    "raw_payments": ["payment_code"],
-    "raw_risk_events": ["customer_code", "event_date", "event_type"],
-}
+# Row-level delta snapshots of the previous load (per table and Drive file)
+DELTA_SNAPSHOT_DIR = Path(__file__).parent / ".ingestion_state" / "delta"
 
 # Column Names
-COL_WORKBOOK_NAME = "workbook_name"
-COL_REFRESH_DATE = "refresh_date"
 COL_AVG_DPD = "avg_dpd"
 COL_LTV = "ltv"
 COL_COLLECTION_RATE = "collection_rate"
@@ -148,97 +138,54 @@ def init_clients():
 supabase, drive = init_clients()
 
 # ============================================================================
-# Data Processing Functions
+# Data Ingestion
 # ============================================================================
 
-def normalize_df(df: pd.DataFrame, source: str) -> pd.DataFrame:
-    """Normalize DataFrame column names and data types."""
-    df.columns = [
-        re.sub(r"[^a-z0-9_]", "_", col.strip().lower().replace(" ", "_"))
-        for col in df.columns
-    ]
-    for col in df.columns:
-        if df[col].dtype == "object":
-            df[col] = (
-                df[col]
-                .astype(str)
-                .str.replace(r"[\$,₡,€,%]", "", regex=True)
-                .str.replace(",", "", regex=True)
-                .str.strip()
-            )
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-        if "date" in col:
-            df[col] = pd.to_datetime(df[col], errors="coerce")
-    df[COL_WORKBOOK_NAME] = source
-    df[COL_REFRESH_DATE] = datetime.now(timezone.utc)
-    return df.drop_duplicates()
-
 def ingest_from_drive():
     """Ingest files from Google Drive and upsert to Supabase."""
-    try:
-        query = (
-            f"'{configs['GDRIVE_FOLDER_ID']}' in parents "
-            "and mimeType != 'application/vnd.google-apps.folder' "
-            "and trashed = false"
-        )
-        results = drive.files().list(q=query, fields="files(id, name, mimeType)").execute()
-        files = results.get("files", [])
-
-        if not files:
-            st.warning("No files found in shared folder.")
-            return
-
-        progress_bar = st.progress(0)
-        status_text = st.empty()
-
-        for idx, file in enumerate(files):
-            file_id, file_name, mime_type = file["id"], file["name"], file["mimeType"]
-            status_text.text(f"Processing: {file_name}")
-
-            # Download file from Google Drive
-            request = drive.files().get_media(fileId=file_id)
-            fh = io.BytesIO()
-            downloader = MediaIoBaseDownload(fh, request)
-            done = False
-            while not done:
-                _, done = downloader.next_chunk()
-            fh.seek(0)
-
-            # Read file based on type
-            if mime_type.endswith("sheet") or file_name.endswith(".xlsx"):
-                df = pd.read_excel(fh)
-            elif mime_type == "text/csv" or file_name.endswith(".csv"):
-                df = pd.read_csv(fh)
-            else:
-                st.warning(f"Skipping unsupported file: {file_name}")
-                continue
-
-            # Normalize and determine destination table
-            df = normalize_df(df, file_name)
-            table = next(
-                (dest for key, dest in TABLE_MAP.items() if key in file_name.lower()),
-                None,
+    engine = DataIngestionEngine(
+        source=DriveSource(service=drive),
+        sink=SupabaseSink(supabase),
+        conflict_keys=DataIngestionEngine.SUPABASE_CONFLICT_KEYS,
+        upsert_batch_size=UPSERT_BATCH_SIZE,
+        upsert_queue_size=UPSERT_QUEUE_SIZE,
+        delta_dir=str(DELTA_SNAPSHOT_DIR),
+    )
+    report = engine.ingest_from_drive(configs["GDRIVE_FOLDER_ID"])
+
+    if "error" in report:
+        st.error(f"Ingestion failed: {report['error']}")
+        return
+    if not report["total_files"]:
+        st.warning("No files found in shared folder.")
+        return
+
+    for detail in report["details"]:
+        if detail["status"] == "success":
+            st.success(
+                f"✓ {detail['filename']}: {detail['message']} "
+                f"({detail.get('inserts', 0)} new, {detail.get('updates', 0)} changed, "
+                f"{detail.get('tombstones', 0)} removed)"
             )
-            if not table:
-                st.warning(f"No staging table mapping for file: {file_name}")
-                continue
-
-            # Upsert to Supabase with conflict resolution
-            key_cols = PRIMARY_KEYS.get(table, ["id"])
-            data = df.to_dict(orient="records")
-            supabase.table(table).upsert(
-                data, returning="minimal", on_conflict=",".join(key_cols)
-            ).execute()
-            st.success(f"✓ {file_name}: upserted {len(data)} rows into {table}")
-
-            progress_bar.progress((idx + 1) / len(files))
-
-        # Refresh ML features after all ingestion
-        supabase.rpc("refresh_ml_features").execute()
-        st.success("✓ ML features refreshed successfully.")
+            if detail.get("parse_seconds") is not None:
+                st.caption(
+                    f"{detail['filename']}: parsed in {detail['parse_seconds']:.2f}s "
+                    f"({report['parse']['excel_engine']})"
+                )
+        elif detail["status"] == "skipped":
+            st.warning(f"Skipping {detail['filename']}: {detail['message']}")
+        else:
+            st.error(f"✗ {detail['filename']}: {detail['message']}")
+    for table, throughput in report["upsert_throughput"].items():
+        st.caption(
+            f"{table}: {throughput['rows']:,} rows in {throughput['batches']} batches, "
+            f"{throughput['rows_per_second']:,.0f} rows/s"
+        )
 
-    except Exception as exc:
-        st.error(f"Ingestion failed: {exc}")
+    if report.get("ml_features_refreshed"):
+        st.success("✓ ML features refreshed successfully.")
+    elif "ml_refresh_error" in report:
+        st.error(f"ML feature refresh failed: {report['ml_refresh_error']}")
 
 # ============================================================================
 # Sidebar: Ingestion Control
@@ -21,12 +21,20 @@ from googleapiclient.discovery import build
 from googleapiclient.http import MediaIoBaseDownload
 from supabase import create_client
 import io
+from pathlib import Path
 
 # Import custom modules
 from config.theme import ABACO_THEME, PLOTLY_LAYOUT_4K, CUSTOM_CSS, PLOTLY_CONFIG_4K
 from utils.ingestion import DataIngestionEngine
 from utils.feature_engineering import FeatureEngineer
 from utils.kpi_engine import KPIEngine
+from components.risk_dashboard import approval_portfolio, render_approval_simulator
+
+# Local ingestion state (incremental manifest)
+INGESTION_STATE_DIR = Path(__file__).parent / ".ingestion_state"
+
+# Parquet staging cache - same location as STAGING_DIR in notebooks/abaco_config.py
+STAGING_DIR = Path(__file__).parent.parent / "data" / "staging"
 
 # ================== PAGE CONFIGURATION ==================
 st.set_page_config(
@@ -137,6 +145,47 @@ if "📥 Data Ingestion" in page:
     with col1:
         st.subheader("Manual Ingestion")
         
+        concurrent_mode = st.checkbox(
+            "Concurrent mode",
+            value=False,
+            help="Overlap Drive downloads, parsing and Supabase upserts across files"
+        )
+        incremental_mode = st.checkbox(
+            "Skip unchanged files",
+            value=True,
+            help="Skip Drive files whose checksum/modified time match the last successful load"
+        )
+        delta_mode = st.checkbox(
+            "Upsert changed rows only",
+            value=True,
+            help="Diff each file against its previous load and send only inserted/updated rows"
+        )
+        fast_mode = st.checkbox(
+            "Fast normalization",
+            value=False,
+            help="Vectorized normalization: role inference, single-pass currency cleaning, cached date formats"
+        )
+        compact_mode = st.checkbox(
+            "Compact dtypes",
+            value=False,
+            help="Downcast numeric columns and store low-cardinality text as categoricals after normalization"
+        )
+        staging_mode = st.checkbox(
+            "Parquet staging cache",
+            value=True,
+            help="Reuse normalized Parquet copies of Drive files whose modified time has not changed"
+        )
+        resume_mode = st.checkbox(
+            "Resume interrupted run",
+            value=False,
+            help="Skip files the last interrupted run already loaded and continue from its last committed batch"
+        )
+        drift_mode = st.selectbox(
+            "Schema drift",
+            ["Reject", "Quarantine", "Off"],
+            help="Compare each file's column types with earlier files of the same source type before normalizing"
+        )
+        
         if st.button("🚀 Run Ingestion Now", type="primary", use_container_width=True):
             if not supabase or not drive:
                 st.error("Services not initialized. Check configuration.")
@@ -147,25 +196,84 @@ if "📥 Data Ingestion" in page:
                         ingestion_engine = DataIngestionEngine(
                             supabase_url=configs["SUPABASE_URL"],
                             supabase_key=configs["SUPABASE_KEY"],
-                            gdrive_credentials=json.loads(configs["GDRIVE_SERVICE_ACCOUNT"])
+                            gdrive_credentials=json.loads(configs["GDRIVE_SERVICE_ACCOUNT"]),
+                            manifest_path=(
+                                str(INGESTION_STATE_DIR / "manifest.json") if incremental_mode else None
+                            ),
+                            delta_dir=str(INGESTION_STATE_DIR / "delta") if delta_mode else None,
+                            fast_normalize=fast_mode,
+                            compact=compact_mode,
+                            staging_dir=str(STAGING_DIR) if staging_mode else None,
+                            schema_registry_path=(
+                                str(INGESTION_STATE_DIR / "schema_registry.json") if drift_mode != "Off" else None
+                            ),
+                            drift_action="quarantine" if drift_mode == "Quarantine" else "reject",
+                            checkpoint_path=str(INGESTION_STATE_DIR / "checkpoint.json")
                         )
                         
                         # Run ingestion
-                        report = ingestion_engine.ingest_from_drive(configs["GDRIVE_FOLDER_ID"])
+                        report = ingestion_engine.ingest_from_drive(
+                            configs["GDRIVE_FOLDER_ID"],
+                            concurrent=concurrent_mode,
+                            resume=resume_mode
+                        )
                         
                         # Display results
                         st.success("✅ Ingestion completed!")
                         
-                        col_a, col_b, col_c, col_d = st.columns(4)
+                        col_a, col_b, col_c, col_d, col_e = st.columns(5)
                         col_a.metric("Total Files", report['total_files'])
                         col_b.metric("Successful", report['successful'], delta_color="normal")
                         col_c.metric("Failed", report['failed'], delta_color="inverse")
                         col_d.metric("Skipped", report['skipped'], delta_color="off")
+                        col_e.metric("Unchanged", report.get('unchanged', 0), delta_color="off")
+                        
+                        if report.get('delta'):
+                            delta = report['delta']
+                            st.caption(
+                                f"Row delta: {delta['inserts']:,} inserted, {delta['updates']:,} updated, "
+                                f"{delta['tombstones']:,} removed since the previous load"
+                            )
+                        
+                        if report.get('parse'):
+                            st.caption(
+                                f"Parsing: {report['parse']['seconds']:.2f}s total "
+                                f"(Excel engine: {report['parse']['excel_engine']})"
+                            )
+                        
+                        if report.get('resumed'):
+                            st.caption(f"Resumed: {report['resumed']} files already loaded by the interrupted run")
+                        
+                        if report.get('quarantined'):
+                            st.warning(
+                                f"{report['quarantined']} files quarantined for schema drift "
+                                f"(copied to {INGESTION_STATE_DIR / 'quarantine'})"
+                            )
+                        
+                        if report.get('compaction'):
+                            compaction = report['compaction']
+                            before = compaction['bytes_before']
+                            st.caption(
+                                f"Compaction: {compaction['bytes_saved'] / 1e6:,.1f} MB saved "
+                                f"({compaction['bytes_saved'] / before:.0%} of {before / 1e6:,.1f} MB)"
+                                if before else "Compaction: no in-memory frames"
+                            )
+                        
+                        if report.get('staging'):
+                            st.caption(
+                                f"Staging cache: {report['staging']['hits']} files reused, "
+                                f"{report['staging']['staged']} newly staged"
+                            )
                         
                         # Detailed results
                         if report['details']:
                             st.subheader("Ingestion Details")
                             details_df = pd.DataFrame(report['details'])
+                            sheet_rows = [
+                                {'workbook': detail['filename'], **sheet}
+                                for detail in report['details'] for sheet in detail.get('sheets', [])
+                            ]
+                            details_df = details_df.drop(columns=['sheets'], errors='ignore')
                             
                             # Color code by status
                             def color_status(val):
@@ -178,12 +286,21 @@ if "📥 Data Ingestion" in page:
                             
                             styled_df = details_df.style.applymap(color_status, subset=['status'])
                             st.dataframe(styled_df, use_container_width=True)
+                            
+                            if sheet_rows:
+                                st.caption("Multi-sheet workbooks")
+                                st.dataframe(pd.DataFrame(sheet_rows), use_container_width=True)
                         
                         # Quality scores
                         if report.get('quality_scores'):
                             st.subheader("Data Quality Scores")
                             quality_df = pd.DataFrame(report['quality_scores']).T
-                            st.dataframe(quality_df, use_container_width=True)
+                            st.dataframe(quality_df.drop(columns=['columns'], errors='ignore'), use_container_width=True)
+                            
+                            for source_name, metrics in report['quality_scores'].items():
+                                if metrics.get('columns'):
+                                    with st.expander(f"Column profile: {source_name}"):
+                                        st.dataframe(pd.DataFrame(metrics['columns']).T, use_container_width=True)
                         
                     except Exception as e:
                         st.error(f"❌ Ingestion failed: {str(e)}")
@@ -311,6 +428,10 @@ elif "🎯 Risk Assessment" in page:
                 else:
                     st.success("✅ No high-risk clients identified")
                 
+                # Approval simulator, with a policy sweep over these customers' facilities
+                st.divider()
+                render_approval_simulator(approval_portfolio(df))
+                
         except Exception as e:
             st.error(f"Error loading risk data: {str(e)}")
 
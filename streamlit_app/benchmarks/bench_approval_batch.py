@@ -0,0 +1,70 @@
+"""
+Benchmark: batch facility approval vs one evaluate_facility_approval call per row
+A synthetic book of applications is decided column-wise; a sample of rows is
+decided again with the scalar rule to time it per row and to check both agree
+on approval, risk level, recommended amount and required collateral.
+Run from streamlit_app/: python -m benchmarks.bench_approval_batch [--rows 1000000] [--sample 20000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.business_rules import MYPEBusinessRules
+
+
+def make_applications(rows: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    amount = rng.lognormal(10.5, 1.1, rows).round(-2)
+    return pd.DataFrame({
+        'facility_amount': amount,
+        'collateral_value': (amount * rng.uniform(0, 2, rows)).round(-2),
+        'pod': rng.beta(2, 8, rows),
+        'dpd_mean': np.where(rng.random(rows) < 0.6, 0, rng.gamma(1.2, 30, rows)).round(),
+        'ltv': rng.uniform(20, 100, rows),
+        'collection_rate': rng.beta(8, 2, rows),
+        'avg_risk_severity': rng.uniform(0, 1, rows)
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--sample', type=int, default=20_000, help='rows also decided with the scalar rule')
+    args = parser.parse_args()
+
+    applications = make_applications(args.rows)
+
+    started = time.perf_counter()
+    decisions = MYPEBusinessRules.evaluate_facility_approval_batch(applications)
+    batch_seconds = time.perf_counter() - started
+
+    sample = applications.sample(min(args.sample, args.rows), random_state=0)
+    metrics = sample.drop(columns=['facility_amount', 'collateral_value']).to_dict('records')
+    started = time.perf_counter()
+    scalar = [
+        MYPEBusinessRules.evaluate_facility_approval(amount, row_metrics, collateral)
+        for amount, collateral, row_metrics in zip(sample['facility_amount'], sample['collateral_value'], metrics)
+    ]
+    scalar_seconds = time.perf_counter() - started
+
+    expected = pd.DataFrame({
+        'approved': [decision.approved for decision in scalar],
+        'risk_level': [decision.risk_level.value for decision in scalar],
+        'recommended_amount': [float(decision.recommended_amount) for decision in scalar],
+        'required_collateral': [decision.required_collateral for decision in scalar]
+    }, index=sample.index)
+    batch = decisions.loc[sample.index, expected.columns].astype({'risk_level': str})
+    mismatches = int((~(batch == expected.astype({'risk_level': str}))).any(axis=1).sum())
+
+    per_row = scalar_seconds / len(sample)
+    print(f"batch: {args.rows:,} applications in {batch_seconds:.3f}s "
+          f"({args.rows / batch_seconds:,.0f} rows/s, {decisions['approved'].mean():.1%} approved)")
+    print(f"scalar: {per_row * 1e6:.1f}us per row, ~{per_row * args.rows:.0f}s for {args.rows:,} rows")
+    print(f"mismatches in {len(sample):,} sampled rows: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
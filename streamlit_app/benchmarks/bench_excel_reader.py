@@ -0,0 +1,51 @@
+"""
+Benchmark: pd.read_excel engines and column pruning on a portfolio workbook
+Run from streamlit_app/: python -m benchmarks.bench_excel_reader [--rows 50000] [--extra-columns 20]
+"""
+
+import argparse
+import io
+
+import numpy as np
+
+from utils.excel_reader import ExcelReader, available_engines
+from utils.file_transform import FileTransform
+
+from .bench_normalize import make_portfolio_frame
+
+
+def make_workbook(n_rows: int, extra_columns: int) -> bytes:
+    """Portfolio export padded with columns ingestion never uses (notes, audit fields...)"""
+    df = make_portfolio_frame(n_rows)
+    rng = np.random.default_rng(7)
+    for i in range(extra_columns):
+        df[f'Extra Field {i}'] = rng.integers(0, 1_000_000, n_rows).astype(str)
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=50_000)
+    parser.add_argument('--extra-columns', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"Building {args.rows:,}-row workbook with {args.extra_columns} unused columns...")
+    content = make_workbook(args.rows, args.extra_columns)
+    columns = FileTransform(prune_columns=True).ingest_columns('portfolio')
+
+    print(f"{'engine':>10} {'pruned':>7} {'seconds':>8} {'columns':>8} {'speedup':>8}")
+    baseline = None
+    # openpyxl without pruning is what pd.read_excel(fh) did before - measure it first
+    for excel_engine in reversed(available_engines()):
+        reader = ExcelReader(excel_engine)
+        for pruned in (False, True):
+            df, seconds = reader.timed_read(io.BytesIO(content), columns if pruned else None)
+            baseline = baseline or seconds
+            print(f"{reader.engine:>10} {str(pruned):>7} {seconds:>8.2f} {len(df.columns):>8} "
+                  f"{baseline / seconds:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: FeatureSnapshotBuilder over in-memory raw tables
+The raw_* tables are the normalized bench_ingestion fixtures, built straight
+in memory (no workbook round trip) so the run scales to a million customers.
+--dirty-share also times refresh() after that share of customers' payments change;
+--workers N builds hash partitions in N processes (compare with --workers 1).
+Run from streamlit_app/: python -m benchmarks.bench_feature_snapshots [--customers 1000000] [--write]
+"""
+
+import argparse
+import time
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.feature_builder import FeatureSnapshotBuilder
+from utils.file_transform import FileTransform
+from utils.ingestion import DataIngestionEngine
+from utils.sinks import SQLiteSink
+
+from .bench_ingestion import make_source_frames
+
+
+def make_raw_tables(n_customers: int, periods: int) -> Dict[str, pd.DataFrame]:
+    """raw_* frames as ingestion leaves them: normalized column names"""
+    transform = FileTransform()
+    return {
+        DataIngestionEngine.TABLE_NAMES[source_type]: transform.normalize_columns(df)
+        for source_type, df in make_source_frames(n_customers, periods).items()
+    }
+
+
+def touch_payments(tables: Dict[str, pd.DataFrame], share: float, seed: int = 7) -> np.ndarray:
+    """Scale the payments of a random share of customers; returns their ids"""
+    rng = np.random.default_rng(seed)
+    payments = tables['raw_payments']
+    ids = pd.unique(payments['customer_id'].astype(str))
+    touched = rng.choice(ids, max(1, int(len(ids) * share)), replace=False)
+    rows = payments['customer_id'].astype(str).isin(touched)
+    payments.loc[rows, 'amount'] = payments.loc[rows, 'amount'] * rng.uniform(0.9, 1.1, rows.sum())
+    return touched
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=1_000_000)
+    parser.add_argument('--periods', type=int, default=6, help='monthly rows per customer in time-series tables')
+    parser.add_argument('--write', action='store_true', help='also bulk-write the snapshots to an in-memory SQLite sink')
+    parser.add_argument('--workers', type=int, default=1, help='processes for the partitioned build')
+    parser.add_argument('--partitions', type=int, help='customer hash partitions (default: 2 per worker)')
+    parser.add_argument('--dirty-share', type=float, default=0.03,
+                        help="share of customers whose payments change before the incremental refresh (0 skips it)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    tables = make_raw_tables(args.customers, args.periods)
+    rows = sum(len(df) for df in tables.values())
+    print(f"{rows:,} raw rows for {args.customers:,} customers in {time.perf_counter() - started:.1f}s")
+
+    builder = FeatureSnapshotBuilder()
+    started = time.perf_counter()
+    snapshots = builder.build(tables, workers=args.workers, partitions=args.partitions)
+    seconds = time.perf_counter() - started
+    print(f"build ({args.workers} worker(s)): {seconds:.1f}s, {len(snapshots):,} snapshots x {len(snapshots.columns)} columns "
+          f"({len(snapshots) / seconds:,.0f} customers/s)")
+
+    if args.write:
+        sink = SQLiteSink()
+        started = time.perf_counter()
+        written = builder.write(snapshots, sink)
+        seconds = time.perf_counter() - started
+        print(f"write: {seconds:.1f}s, {written:,} rows ({written / seconds:,.0f} rows/s)")
+
+    if args.dirty_share > 0:
+        touched = touch_payments(tables, args.dirty_share)
+        started = time.perf_counter()
+        snapshots, changed = builder.refresh(tables, snapshots, touched)
+        seconds = time.perf_counter() - started
+        print(f"refresh: {seconds:.1f}s for {len(touched):,} touched customers, {len(changed):,} rows to write")
+
+
+if __name__ == '__main__':
+    main()
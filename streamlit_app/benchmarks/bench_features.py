@@ -0,0 +1,99 @@
+"""
+Benchmark: scalar FeatureEngineer calls vs the vectorized *_frame methods
+Every frame result is checked against the scalar result row by row.
+Run from streamlit_app/: python -m benchmarks.bench_features [--rows 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.feature_engineering import FeatureEngineer
+
+NAME_PARTS = np.array([
+    'Empresa', 'Corporativo', 'Persona', 'Individual', 'Gobierno', 'Municipal', 'Comercial',
+    'Distribuidora', 'Servicios', 'Consumer', 'Estatal', 'Taller', 'B2B', 'Publico', 'Familia'
+], dtype=object)
+
+
+def make_customer_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """One row per customer with the inputs of every feature, including NaNs and edge values"""
+    rng = np.random.default_rng(seed)
+    names = NAME_PARTS[rng.integers(0, len(NAME_PARTS), n_rows)] + ' ' + NAME_PARTS[rng.integers(0, len(NAME_PARTS), n_rows)]
+    dpd = rng.choice([0, 0, 0, 1, 14, 15, 29, 30, 45, 60, 89, 90, 120, 179, 180, 365], n_rows).astype(float)
+    # Bucket edges exactly, plus fractional days in between
+    fractional = rng.random(n_rows) < 0.3
+    dpd[fractional] = rng.uniform(-1, 400, fractional.sum()).round(2)
+    limits = np.round(rng.uniform(0, 50_000, n_rows), 2)
+    limits[rng.random(n_rows) < 0.05] = 0
+    limits[rng.random(n_rows) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'customer_name': names,
+        'avg_dpd': rng.gamma(1.2, 20, n_rows).round(1),
+        'utilization': rng.uniform(0, 1.1, n_rows).round(3),
+        'payment_ratio': rng.uniform(0, 1.2, n_rows).round(3),
+        'dpd': dpd,
+        'balance': np.round(rng.uniform(0, 60_000, n_rows), 2),
+        'limit': limits
+    })
+    df.loc[rng.random(n_rows) < 0.01, 'avg_dpd'] = np.nan
+    df.loc[rng.random(n_rows) < 0.01, 'dpd'] = np.nan
+    return df
+
+
+def same_values(expected, result: pd.Series) -> bool:
+    """Same value in every row (NaN equal to NaN)"""
+    return result.equals(pd.Series(expected, index=result.index, dtype=result.dtype))
+
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    engineer = FeatureEngineer()
+    df = make_customer_frame(args.rows)
+    metrics = df[['avg_dpd', 'utilization', 'payment_ratio']]
+
+    cases = [
+        (
+            'classify_customer_type',
+            lambda: [engineer.classify_customer_type(name, {}) for name in df['customer_name']],
+            lambda: engineer.classify_customer_type_frame(df)
+        ),
+        (
+            'calculate_segmentation',
+            lambda: [engineer.calculate_segmentation(row) for row in metrics.to_dict(orient='records')],
+            lambda: engineer.calculate_segmentation_frame(df)
+        ),
+        (
+            'bucket_dpd',
+            lambda: [engineer.bucket_dpd(value) for value in df['dpd']],
+            lambda: engineer.bucket_dpd_frame(df)
+        ),
+        (
+            'calculate_utilization',
+            lambda: [engineer.calculate_utilization(b, l) for b, l in zip(df['balance'], df['limit'])],
+            lambda: engineer.calculate_utilization_frame(df)
+        )
+    ]
+
+    print(f"{args.rows:,} rows")
+    print(f"{'feature':>24} {'scalar s':>9} {'frame s':>9} {'speedup':>8}  identical")
+    for name, scalar, frame in cases:
+        scalar_time, expected = timed(scalar)
+        frame_time, result = timed(frame)
+        identical = same_values(expected, result)
+        print(f"{name:>24} {scalar_time:>9.2f} {frame_time:>9.3f} {scalar_time / frame_time:>7.0f}x  {identical}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+"""
+Benchmark: end-to-end ingestion throughput, offline
+Synthetic workbooks for all nine source types (built from notebooks/financial_utils.py's
+FinancialDataGenerator) are ingested from a local folder into an in-memory SQLite sink,
+so files/s and rows/s can be tracked per release without Drive or Supabase.
+Run from streamlit_app/: python -m benchmarks.bench_ingestion [--customers 2000] [--files-per-type 2]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.async_ingestion import AsyncIngestionRunner
+from utils.ingestion import DataIngestionEngine
+from utils.sinks import SQLiteSink
+from utils.sources import LocalFolderSource
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2] / 'notebooks'))
+from financial_utils import FinancialDataGenerator  # noqa: E402
+
+logging.getLogger('financial_utils').setLevel(logging.WARNING)
+
+CUSTOMER_TYPES = {'Business': 'B2B', 'Investment': 'B2B', 'Credit': 'B2C', 'Checking': 'B2C', 'Savings': 'B2G'}
+INDUSTRIES = np.array([
+    ('C10', 'Food Manufacturing'), ('G47', 'Retail Trade'), ('F41', 'Construction'),
+    ('H49', 'Land Transport'), ('I56', 'Food Services'), ('M69', 'Professional Services')
+], dtype=object)
+CHANNELS = np.array(['digital', 'branch', 'referral', 'partner', 'broker'], dtype=object)
+MODES = ('sequential', 'concurrent', 'async')
+
+
+def make_source_frames(n_customers: int, periods: int, file_index: int = 0) -> Dict[str, pd.DataFrame]:
+    """
+    One raw-looking export per source type (title-case headers, as analysts save them)
+    Customers are generated per file, so files of the same type hold different
+    business keys; portfolio/risk/revenue/collections/payment files hold one
+    row per customer and month.
+    """
+    generator = FinancialDataGenerator(seed=42 + file_index)
+    customers = generator.generate_customer_data(n_customers)
+    rng = generator.rng
+    ids = np.char.add('CUST_', np.arange(file_index * n_customers, (file_index + 1) * n_customers).astype(str))
+
+    months = pd.date_range('2024-01-31', periods=periods, freq='ME')
+    monthly_ids = np.repeat(ids, periods)
+    monthly_dates = np.tile(months.values, n_customers)
+    n_monthly = len(monthly_ids)
+
+    def monthly(column: str) -> np.ndarray:
+        return np.repeat(customers[column].to_numpy(), periods)
+
+    on_time = monthly('payment_history_score')
+    dpd = np.where(rng.random(n_monthly) < on_time, 0, rng.integers(1, 200, n_monthly))
+    industry = INDUSTRIES[rng.integers(0, len(INDUSTRIES), n_customers)]
+    acquired = pd.Timestamp('2024-01-01') - pd.to_timedelta(customers['years_with_bank'] * 365, unit='D')
+
+    return {
+        'portfolio': pd.DataFrame({
+            'Customer ID': monthly_ids,
+            'Portfolio Name': np.char.add('Cartera ', (rng.integers(1, 20, n_monthly)).astype(str)),
+            'Balance': np.round(monthly('account_balance') * rng.uniform(0.8, 1.2, n_monthly), 2),
+            'Date': monthly_dates
+        }),
+        'facility': pd.DataFrame({
+            'Facility ID': np.char.add('FAC_', ids),
+            'Customer ID': ids,
+            'Limit': customers['credit_limit'],
+            'Facility Type': customers['account_type'],
+            'APR': np.round(rng.uniform(0.08, 0.36, n_customers), 4),
+            'Origination Date': acquired
+        }),
+        'customer': pd.DataFrame({
+            'Customer ID': ids,
+            'Name': np.char.add('Cliente ', ids),
+            'Customer Type': customers['account_type'].map(CUSTOMER_TYPES),
+            'Industry Code': industry[:, 0],
+            'Segment': customers['risk_category'],
+            'Is Active': customers['employment_status'] != 'Unemployed'
+        }),
+        'payment': pd.DataFrame({
+            'Payment ID': np.char.add(np.char.add('PAY_', monthly_ids), np.tile(np.arange(periods).astype(str), n_customers)),
+            'Customer ID': monthly_ids,
+            'Amount': np.round(monthly('monthly_spending') * on_time, 2),
+            'Date': monthly_dates,
+            'Payment Type': rng.choice(np.array(['transfer', 'card', 'cash'], dtype=object), n_monthly)
+        }),
+        'risk': pd.DataFrame({
+            'Customer ID': monthly_ids,
+            'DPD': dpd,
+            'Date': monthly_dates,
+            'Risk Severity': monthly('risk_category')
+        }),
+        'revenue': pd.DataFrame({
+            'Customer ID': monthly_ids,
+            'Revenue': np.round(monthly('profit_potential') * rng.uniform(0.5, 1.5, n_monthly), 2),
+            'Date': monthly_dates,
+            'Revenue Type': rng.choice(np.array(['interest', 'fees'], dtype=object), n_monthly)
+        }),
+        'collections': pd.DataFrame({
+            'Customer ID': monthly_ids,
+            'Collected Amount': np.round(monthly('monthly_spending') * np.where(dpd > 0, rng.uniform(0, 1, n_monthly), 1), 2),
+            'Date': monthly_dates
+        }),
+        'marketing': pd.DataFrame({
+            'Customer ID': ids,
+            'Channel': rng.choice(CHANNELS, n_customers),
+            'Acquisition Date': acquired,
+            'Acquisition Cost': np.round(rng.gamma(2, 150, n_customers), 2)
+        }),
+        'industry': pd.DataFrame({
+            'Customer ID': ids,
+            'Industry Code': industry[:, 0],
+            'Industry Name': industry[:, 1]
+        })
+    }
+
+
+def write_fixtures(folder: Path, n_customers: int, periods: int, files_per_type: int, file_format: str) -> Dict:
+    """Write files_per_type files of every source type; returns files and rows written"""
+    folder.mkdir(parents=True, exist_ok=True)
+    files = rows = 0
+    for file_index in range(files_per_type):
+        for source_type, df in make_source_frames(n_customers, periods, file_index).items():
+            path = folder / f'{source_type}_{file_index:03d}.{file_format}'
+            if file_format == 'csv':
+                df.to_csv(path, index=False)
+            else:
+                df.to_excel(path, index=False)
+            files += 1
+            rows += len(df)
+    return {'files': files, 'rows': rows}
+
+
+def run_mode(folder: Path, mode: str, fast: bool, csv_chunksize=None, compact: bool = False) -> Dict:
+    """Ingest the folder once into a fresh in-memory SQLite sink"""
+    sink = SQLiteSink()
+    engine = DataIngestionEngine(
+        source=LocalFolderSource(folder),
+        sink=sink,
+        conflict_keys=DataIngestionEngine.BUSINESS_KEYS,
+        fast_normalize=fast,
+        csv_chunksize=csv_chunksize,
+        compact=compact
+    )
+    started = time.perf_counter()
+    if mode == 'async':
+        report = asyncio.run(AsyncIngestionRunner(engine).run())
+    else:
+        report = engine.ingest(concurrent=mode == 'concurrent')
+    seconds = time.perf_counter() - started
+
+    rows = sum(detail.get('rows_processed', 0) for detail in report['details'])
+    stored = sum(sink.row_count(engine.get_table_name(source_type)) for source_type in engine.REQUIRED_COLUMNS)
+    sink.close()
+    return {
+        'mode': mode,
+        'seconds': round(seconds, 3),
+        'files': report['total_files'],
+        'successful': report['successful'],
+        'failed': report['failed'],
+        'rows': rows,
+        'rows_stored': stored,
+        'files_per_second': round(report['total_files'] / seconds, 2),
+        'rows_per_second': round(rows / seconds, 1),
+        'bytes_saved': report.get('compaction', {}).get('bytes_saved'),
+        'error': report.get('error')
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--customers', type=int, default=2_000, help='customers per file')
+    parser.add_argument('--periods', type=int, default=6, help='monthly rows per customer in time-series files')
+    parser.add_argument('--files-per-type', type=int, default=2)
+    parser.add_argument('--format', choices=['xlsx', 'csv'], default='xlsx')
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=list(MODES))
+    parser.add_argument('--fast', action='store_true', help='use FastNormalizer')
+    parser.add_argument('--compact', action='store_true', help='compact dtypes and report bytes saved')
+    parser.add_argument('--csv-chunksize', type=int, help='stream CSV files this many rows at a time')
+    parser.add_argument('--fixtures-dir', help='keep the generated files here instead of a temp folder')
+    parser.add_argument('--json', help='also write the results to this file')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(args.fixtures_dir or tmp)
+        print(f"Writing {args.files_per_type} {args.format} file(s) per source type "
+              f"({args.customers:,} customers, {args.periods} periods) to {folder}...")
+        started = time.perf_counter()
+        fixtures = write_fixtures(folder, args.customers, args.periods, args.files_per_type, args.format)
+        print(f"{fixtures['files']} files, {fixtures['rows']:,} rows in {time.perf_counter() - started:.1f}s")
+
+        print(f"{'mode':>10} {'seconds':>8} {'files/s':>8} {'rows/s':>10} {'rows':>9} {'stored':>9} {'failed':>6}")
+        results: List[Dict] = []
+        for mode in args.modes:
+            result = run_mode(folder, mode, args.fast, args.csv_chunksize, args.compact)
+            results.append(result)
+            print(f"{mode:>10} {result['seconds']:>8.2f} {result['files_per_second']:>8.2f} "
+                  f"{result['rows_per_second']:>10,.0f} {result['rows']:>9,} {result['rows_stored']:>9,} "
+                  f"{result['failed']:>6}"
+                  + (f"  saved {result['bytes_saved'] / 1e6:,.1f} MB" if result['bytes_saved'] is not None else '')
+                  + (f"  error: {result['error']}" if result['error'] else ''))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'fixtures': {**fixtures, **vars(args)}, 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Benchmark: legacy normalize_dataframe vs FastNormalizer
+Run from streamlit_app/: python -m benchmarks.bench_normalize [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.fast_normalize import FastNormalizer
+from utils.file_transform import FileTransform
+
+CHANNELS = np.array(['digital', 'branch', 'referral', 'partner', 'broker'], dtype=object)
+
+
+def make_portfolio_frame(n_rows: int, seed: int = 42) -> pd.DataFrame:
+    """Raw-looking portfolio export: everything is text, as read_csv/read_excel hand it over"""
+    rng = np.random.default_rng(seed)
+    balances = np.round(rng.lognormal(8, 1.5, n_rows), 2)
+    amounts = np.round(rng.gamma(2, 800, n_rows), 2)
+    days = rng.integers(0, 730, n_rows)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(days, unit='D')
+
+    frame = {
+        'Customer ID': np.char.add('CUST_', (rng.integers(0, n_rows // 4 + 1, n_rows)).astype(str)),
+        'Portfolio Name': np.char.add('Cartera ', rng.integers(1, 50, n_rows).astype(str)),
+        'Balance': [f'${b:,.2f}' for b in balances],
+        'Amount': [f'{a:,.2f}' for a in amounts],
+        'APR': [f'{r:.1f}%' for r in rng.uniform(8, 36, n_rows)],
+        'DPD': rng.integers(0, 180, n_rows).astype(str),
+        'Date': dates.strftime('%Y-%m-%d'),
+        'Fecha Pago': dates.strftime('%d/%m/%Y'),
+        'Channel': rng.choice(CHANNELS, n_rows),
+    }
+    return pd.DataFrame({col: pd.Series(values, dtype=object) for col, values in frame.items()})
+
+
+def time_call(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - started, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--no-pyarrow', action='store_true', help='force the regex cleaning path')
+    args = parser.parse_args()
+
+    legacy = FileTransform()
+    fast = FastNormalizer(use_pyarrow=not args.no_pyarrow)
+    print(f"pyarrow kernels: {'on' if fast.use_pyarrow else 'off'}")
+    print(f"{'rows':>10} {'legacy s':>10} {'fast s':>10} {'speedup':>8}  numeric columns match")
+
+    for n_rows in args.sizes:
+        raw = make_portfolio_frame(n_rows)
+        legacy_time, (legacy_df, _) = time_call(legacy.normalize_dataframe, raw.copy(), 'bench.csv')
+        fast_time, (fast_df, _) = time_call(fast.normalize, raw.copy(), 'bench.csv')
+
+        numeric_cols = ['balance', 'amount', 'apr', 'dpd']
+        matches = all(
+            np.allclose(legacy_df[col].to_numpy(float), fast_df[col].to_numpy(float), equal_nan=True)
+            for col in numeric_cols
+        )
+        print(f"{n_rows:>10,} {legacy_time:>10.2f} {fast_time:>10.2f} {legacy_time / fast_time:>7.1f}x  {matches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: policy grid sweep vs one evaluate_facility_approval_batch per variant
+A synthetic book is swept over an N x N x N grid of max_pod,
+min_collateral_ratio and collection_rate_threshold; a few variants are also
+re-decided with the batch evaluator to time it and to check approval counts.
+Run from streamlit_app/: python -m benchmarks.bench_policy_sweep [--rows 100000] [--steps 10] [--workers 1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.bench_approval_batch import make_applications
+from utils.business_rules import MYPEBusinessRules
+from utils.policy_sweep import ApprovalPolicySweep
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--steps', type=int, default=10, help='values per parameter')
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    applications = make_applications(args.rows)
+    grid = {
+        'max_pod': np.linspace(0.10, 0.50, args.steps),
+        'min_collateral_ratio': np.linspace(0.5, 2.0, args.steps),
+        'collection_rate_threshold': np.linspace(0.50, 0.90, args.steps)
+    }
+
+    started = time.perf_counter()
+    sweep = ApprovalPolicySweep(applications)
+    results = sweep.run(workers=args.workers, **grid)
+    sweep_seconds = time.perf_counter() - started
+
+    # Re-decide a few variants one at a time with the thresholds patched in
+    checked = results.sample(min(3, len(results)), random_state=0)
+    thresholds = {tier: dict(limits) for tier, limits in MYPEBusinessRules.FACILITY_THRESHOLDS.items()}
+    criteria = dict(MYPEBusinessRules.HIGH_RISK_CRITERIA)
+    mismatches = 0
+    started = time.perf_counter()
+    try:
+        for variant in checked.itertuples():
+            for limits in MYPEBusinessRules.FACILITY_THRESHOLDS.values():
+                limits['max_pod'] = variant.max_pod
+                limits['min_collateral_ratio'] = variant.min_collateral_ratio
+            MYPEBusinessRules.HIGH_RISK_CRITERIA['collection_rate_threshold'] = variant.collection_rate_threshold
+            approved = MYPEBusinessRules.evaluate_facility_approval_batch(applications)['approved'].sum()
+            mismatches += int(approved != variant.approved)
+    finally:
+        for tier, limits in thresholds.items():
+            MYPEBusinessRules.FACILITY_THRESHOLDS[tier].update(limits)
+        MYPEBusinessRules.HIGH_RISK_CRITERIA.update(criteria)
+    per_variant = (time.perf_counter() - started) / len(checked)
+
+    print(f"sweep: {len(results):,} variants x {args.rows:,} applications in {sweep_seconds:.2f}s "
+          f"({args.workers} worker(s))")
+    print(f"batch evaluator: {per_variant:.3f}s per variant, ~{per_variant * len(results):.0f}s for the grid")
+    print(f"approval rate {results['approval_rate'].min():.1%}-{results['approval_rate'].max():.1%}; "
+          f"approval count mismatches in {len(checked)} re-decided variants: {mismatches}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: streaming statistics merged across partitions vs exact pandas
+A DPD-like series is split into partitions, each summarized on its own
+(StreamingStats), and the partials are merged pairwise as a process pool
+would; the merged max/mean/median/std are compared with one pandas pass.
+Run from streamlit_app/: python -m benchmarks.bench_streaming_stats [--values 10000000] [--partitions 64]
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from utils.streaming_stats import StreamingStats
+
+
+def merge_pairwise(partials):
+    """Tree merge, the shape of combining results from parallel workers"""
+    while len(partials) > 1:
+        partials = [
+            partials[i].merge(partials[i + 1]) if i + 1 < len(partials) else partials[i]
+            for i in range(0, len(partials), 2)
+        ]
+    return partials[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--values', type=int, default=10_000_000)
+    parser.add_argument('--partitions', type=int, default=64)
+    parser.add_argument('--compression', type=float, default=200.0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    values = pd.Series(np.where(rng.random(args.values) < 0.4, 0, rng.gamma(1.2, 40, args.values)).round())
+
+    started = time.perf_counter()
+    exact = {'max': values.max(), 'mean': values.mean(), 'median': values.median(), 'std': values.std()}
+    exact_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    partials = [
+        StreamingStats.from_values(part, args.compression)
+        for part in np.array_split(values.to_numpy(), args.partitions)
+    ]
+    merged = merge_pairwise(partials).summary()
+    streaming_seconds = time.perf_counter() - started
+
+    print(f"{args.values:,} values in {args.partitions} partitions: "
+          f"pandas {exact_seconds:.2f}s, streaming + merge {streaming_seconds:.2f}s")
+    print(f"{'stat':>7} {'pandas':>14} {'merged':>14} {'error':>10}")
+    for stat, value in exact.items():
+        error = abs(merged[stat] - value)
+        if stat == 'median':
+            # Quantile error is a rank error: how far 0.5 lies outside the estimate's rank range
+            below, at_or_below = (values < merged[stat]).mean(), (values <= merged[stat]).mean()
+            error = max(below - 0.5, 0.5 - at_or_below, 0.0)
+            label = f"{error:.2%} rank"
+        else:
+            label = f"{error / max(abs(value), 1e-12):.1e} rel"
+        print(f"{stat:>7} {value:>14.6f} {merged[stat]:>14.6f} {label:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: single-request upserts vs BatchUpsertWriter
+Run from streamlit_app/: python -m benchmarks.bench_upsert_writer
+"""
+
+import argparse
+import time
+
+from supabase import create_client
+
+from benchmarks.postgrest_stub import STUB_KEY, PostgRESTStub
+from utils.upsert_writer import BatchUpsertWriter
+
+
+def _files(n_files: int, rows_per_file: int):
+    for f in range(n_files):
+        yield [
+            {'customer_id': f'CUST_{f:03d}_{i:06d}', 'balance': float(i), 'date': '2025-01-01'}
+            for i in range(rows_per_file)
+        ]
+
+
+def run_single_request(client, n_files: int, rows_per_file: int) -> dict:
+    """Baseline: one upsert per file, as ingest_from_drive did before batching"""
+    started = time.perf_counter()
+    failures = 0
+    for rows in _files(n_files, rows_per_file):
+        try:
+            client.table('raw_portfolios').upsert(rows).execute()
+        except Exception:
+            failures += 1
+    return {'seconds': time.perf_counter() - started, 'failed_files': failures}
+
+
+def run_writer(client, n_files: int, rows_per_file: int, batch_size: int, workers: int) -> dict:
+    started = time.perf_counter()
+    with BatchUpsertWriter(client, batch_size=batch_size, workers=workers, backoff_base=0.05) as writer:
+        uploads = [writer.submit('raw_portfolios', rows) for rows in _files(n_files, rows_per_file)]
+    failures = sum(1 for upload in uploads if upload.exception() is not None)
+    return {
+        'seconds': time.perf_counter() - started,
+        'failed_files': failures,
+        'throughput': writer.stats().get('raw_portfolios', {})
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--files', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[500, 2000, 5000])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--max-rows', type=int, default=10_000, help='stub payload limit per request')
+    parser.add_argument('--fail-rate', type=float, default=0.02)
+    args = parser.parse_args()
+
+    total_rows = args.files * args.rows
+    with PostgRESTStub(max_rows=args.max_rows, fail_rate=args.fail_rate) as stub:
+        client = create_client(stub.url, STUB_KEY)
+
+        baseline = run_single_request(client, args.files, args.rows)
+        print(f"single request   : {baseline['seconds']:.2f}s, "
+              f"{baseline['failed_files']}/{args.files} files failed")
+
+        for batch_size in args.batch_sizes:
+            result = run_writer(client, args.files, args.rows, batch_size, args.workers)
+            stats = result['throughput']
+            print(f"batch={batch_size:<6}: {result['seconds']:.2f}s "
+                  f"({total_rows / result['seconds']:,.0f} rows/s wall, "
+                  f"{stats.get('rows_per_second', 0):,.0f} rows/s upsert), "
+                  f"{stats.get('retries', 0)} retries, "
+                  f"{result['failed_files']}/{args.files} files failed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Local PostgREST-compatible stub
+Accepts Supabase upserts (POST /rest/v1/<table>) with simulated latency,
+payload limits and transient failures so upload paths can be benchmarked offline
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+# Shape-valid dummy key - create_client only needs something JWT-like
+STUB_KEY = 'stub.stub.stub'
+
+
+class PostgRESTStub:
+    """
+    In-process HTTP server standing in for Supabase's REST endpoint
+
+    Each request costs latency + rows * per_row_latency seconds. Payloads over
+    max_rows are rejected with 413 (like a proxy body limit) and fail_rate of
+    requests return 503 to exercise retries.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        per_row_latency: float = 0.00002,
+        max_rows: int = 10_000,
+        fail_rate: float = 0.0,
+        seed: int = 42
+    ):
+        self.latency = latency
+        self.per_row_latency = per_row_latency
+        self.max_rows = max_rows
+        self.fail_rate = fail_rate
+        self.rows: Dict[str, int] = {}
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f'http://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: str = '[]'):
+                payload = body.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                table = self.path.split('?')[0].rstrip('/').split('/')[-1]
+                length = int(self.headers.get('Content-Length', 0))
+                rows = json.loads(self.rfile.read(length) or b'[]')
+                rows = rows if isinstance(rows, list) else [rows]
+
+                with stub._lock:
+                    stub.requests += 1
+                    failed = stub._rng.random() < stub.fail_rate
+
+                if len(rows) > stub.max_rows:
+                    return self._reply(413, json.dumps({'message': 'Payload too large'}))
+                time.sleep(stub.latency + len(rows) * stub.per_row_latency)
+                if failed:
+                    return self._reply(503, json.dumps({'message': 'Service unavailable'}))
+
+                with stub._lock:
+                    stub.rows[table] = stub.rows.get(table, 0) + len(rows)
+                self._reply(201)
+
+        return Handler
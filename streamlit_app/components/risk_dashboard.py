@@ -4,14 +4,53 @@ MYPE-specific risk scoring and approval evaluation
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 import plotly.express as px
 from plotly.subplots import make_subplots
-from typing import Dict, List
+from typing import Dict, List, Optional
 
-from ..config.theme import ABACO_THEME, PLOTLY_LAYOUT_4K, PLOTLY_CONFIG_4K
-from ..utils.business_rules import MYPEBusinessRules, RiskLevel, IndustryType
+from config.theme import ABACO_THEME, PLOTLY_LAYOUT_4K, PLOTLY_CONFIG_4K
+from utils.business_rules import MYPEBusinessRules, RiskLevel, IndustryType
+from utils.policy_sweep import ApprovalPolicySweep, PARAMETERS
+
+
+def _high_risk_metrics(features_df: pd.DataFrame) -> pd.DataFrame:
+    """classify_high_risk inputs from ml_feature_snapshots columns (absent columns keep its defaults)"""
+    sources = {
+        'dpd_mean': 'dpd_mean',
+        'avg_dpd': 'dpd_mean',
+        'collection_rate': 'collection_rate',
+        'avg_risk_severity': 'default_risk_score'
+    }
+    metrics = pd.DataFrame(
+        {key: features_df[column] for key, column in sources.items() if column in features_df.columns},
+        index=features_df.index
+    )
+    if 'utilization' in features_df.columns:
+        metrics['ltv'] = features_df['utilization'] * 100  # Convert to percentage
+    return metrics
+
+
+def approval_portfolio(features_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Applications for the policy sweep from ml_feature_snapshots rows
+    Each customer applies for their total facility limit (total balance when
+    they have no facility), with default_risk_score as POD. Snapshots carry
+    no collateral, so collateral_value is left for the sweep to assume
+    """
+    def amounts(column: str) -> pd.Series:
+        if column not in features_df.columns:
+            return pd.Series(np.nan, index=features_df.index)
+        return pd.to_numeric(features_df[column], errors='coerce')
+
+    limit = amounts('total_limit')
+    portfolio = _high_risk_metrics(features_df).drop(columns='avg_dpd', errors='ignore')
+    portfolio.insert(0, 'facility_amount', limit.where(limit > 0, amounts('total_balance')))
+    if 'default_risk_score' in features_df.columns:
+        portfolio['pod'] = features_df['default_risk_score']
+    return portfolio[portfolio['facility_amount'] > 0].reset_index(drop=True)
 
 
 def render_risk_dashboard(features_df: pd.DataFrame):
@@ -29,16 +68,8 @@ def render_risk_dashboard(features_df: pd.DataFrame):
     """)
     
     # Apply MYPE business rules
-    features_df['is_high_risk'] = features_df.apply(
-        lambda row: MYPEBusinessRules.classify_high_risk({
-            'dpd_mean': row.get('dpd_mean', 0),
-            'ltv': row.get('utilization', 0) * 100,  # Convert to percentage
-            'avg_dpd': row.get('dpd_mean', 0),
-            'collection_rate': row.get('collection_rate', 1.0),
-            'avg_risk_severity': row.get('default_risk_score', 0)
-        })[0],
-        axis=1
-    )
+    is_high_risk, risk_reasons = MYPEBusinessRules.classify_high_risk_frame(_high_risk_metrics(features_df))
+    features_df['is_high_risk'] = is_high_risk.to_numpy()
     
     # Calculate NPL status
     features_df['is_npl'] = features_df['dpd_mean'].apply(
@@ -164,16 +195,7 @@ def render_risk_dashboard(features_df: pd.DataFrame):
     
     if len(high_risk_df) > 0:
         # Get risk reasons for each client
-        high_risk_df['risk_reasons'] = high_risk_df.apply(
-            lambda row: ', '.join(MYPEBusinessRules.classify_high_risk({
-                'dpd_mean': row.get('dpd_mean', 0),
-                'ltv': row.get('utilization', 0) * 100,
-                'avg_dpd': row.get('dpd_mean', 0),
-                'collection_rate': row.get('collection_rate', 1.0),
-                'avg_risk_severity': row.get('default_risk_score', 0)
-            })[1]),
-            axis=1
-        )
+        high_risk_df['risk_reasons'] = risk_reasons[is_high_risk.to_numpy()].map(', '.join).to_numpy()
         
         # Get NPL classification
         high_risk_df['npl_status'] = high_risk_df['dpd_mean'].apply(
@@ -247,9 +269,13 @@ def render_risk_dashboard(features_df: pd.DataFrame):
         )
 
 
-def render_approval_simulator():
+def render_approval_simulator(portfolio: Optional[pd.DataFrame] = None):
     """
     Render loan approval simulator using MYPE business rules
+    
+    Args:
+        portfolio: Optional applications (facility_amount, collateral_value and
+                   customer metric columns) to sweep policy variants over
     """
     st.header("🎯 Loan Approval Simulator")
     
@@ -358,3 +384,105 @@ def render_approval_simulator():
             st.subheader("Approval Conditions")
             for condition in decision.conditions:
                 st.warning(f"⚠️ {condition}")
+    
+    if portfolio is not None and len(portfolio) > 0:
+        st.divider()
+        _render_policy_sweep(portfolio)
+
+
+@st.cache_data(show_spinner=False)
+def _policy_sweep(portfolio: pd.DataFrame, tiers: tuple, max_pod: tuple,
+                  min_collateral_ratio: tuple, collection_rate_threshold: tuple) -> pd.DataFrame:
+    """Sweep results per portfolio and grid, reused across reruns"""
+    return ApprovalPolicySweep(portfolio, tiers).run(max_pod, min_collateral_ratio, collection_rate_threshold)
+
+
+def _render_policy_sweep(portfolio: pd.DataFrame):
+    """
+    Approval rate, expected loss and collateral shortfall of a portfolio
+    across a grid of max POD, collateral ratio and collection rate threshold
+    """
+    st.subheader("📐 Policy Sweep")
+    st.caption(f"{len(portfolio):,} applications re-decided under every combination of the values below")
+    
+    if 'collateral_value' not in portfolio.columns:
+        coverage = st.number_input(
+            "Assumed collateral (x facility amount)",
+            min_value=0.0,
+            max_value=3.0,
+            value=1.0,
+            step=0.1,
+            help="The portfolio has no collateral values; every application posts this multiple of its amount"
+        )
+        portfolio = portfolio.assign(collateral_value=portfolio['facility_amount'] * coverage)
+    
+    tier_names = list(MYPEBusinessRules.FACILITY_THRESHOLDS)
+    col1, col2 = st.columns(2)
+    with col1:
+        tiers = st.multiselect("Tiers the POD and collateral values apply to", tier_names, default=tier_names)
+    with col2:
+        steps = st.number_input("Values per parameter", min_value=2, max_value=20, value=6, step=1)
+    
+    col_pod, col_ratio, col_rate = st.columns(3)
+    with col_pod:
+        pod_range = st.slider("Max POD", min_value=0.05, max_value=0.60, value=(0.15, 0.40), step=0.01)
+    with col_ratio:
+        ratio_range = st.slider("Min Collateral Ratio", min_value=0.5, max_value=2.5, value=(0.8, 1.6), step=0.1)
+    with col_rate:
+        rate_range = st.slider("Collection Rate Threshold", min_value=0.50, max_value=0.95, value=(0.60, 0.80), step=0.01)
+    
+    if not tiers:
+        st.warning("Select at least one tier")
+        return
+    
+    grid = [
+        tuple(np.unique(np.linspace(low, high, int(steps)).round(4)))
+        for low, high in (pod_range, ratio_range, rate_range)
+    ]
+    results = _policy_sweep(portfolio, tuple(tiers), *grid)
+    
+    # Discrete labels so each collateral ratio gets its own line
+    plotted = results.assign(min_collateral_ratio=results['min_collateral_ratio'].map('{:.2f}x'.format))
+    
+    fig_rate = px.line(
+        plotted,
+        x='max_pod',
+        y='approval_rate',
+        color='min_collateral_ratio',
+        facet_col='collection_rate_threshold',
+        facet_col_wrap=3,
+        markers=True,
+        labels={
+            'max_pod': 'Max POD',
+            'approval_rate': 'Approval Rate',
+            'min_collateral_ratio': 'Collateral Ratio',
+            'collection_rate_threshold': 'Collection Threshold'
+        }
+    )
+    fig_rate.update_layout(**PLOTLY_LAYOUT_4K)
+    fig_rate.update_layout(title="Approval Rate by Policy")
+    st.plotly_chart(fig_rate, use_container_width=True, config=PLOTLY_CONFIG_4K)
+    
+    fig_tradeoff = px.scatter(
+        results,
+        x='approval_rate',
+        y='expected_loss',
+        color='collateral_shortfall',
+        hover_data=list(PARAMETERS),
+        labels={
+            'approval_rate': 'Approval Rate',
+            'expected_loss': 'Expected Loss (USD)',
+            'collateral_shortfall': 'Collateral Shortfall (USD)'
+        }
+    )
+    fig_tradeoff.update_layout(**PLOTLY_LAYOUT_4K)
+    fig_tradeoff.update_layout(title="Approval vs Expected Loss")
+    st.plotly_chart(fig_tradeoff, use_container_width=True, config=PLOTLY_CONFIG_4K)
+    
+    st.dataframe(results, use_container_width=True, hide_index=True)
+    st.download_button(
+        label="📥 Download Policy Sweep (CSV)",
+        data=results.to_csv(index=False),
+        file_name=f"policy_sweep_{pd.Timestamp.now().strftime('%Y%m%d')}.csv",
+        mime="text/csv"
+    )
@@ -0,0 +1,287 @@
+"""
+Headless Google Drive → Supabase ingestion for cron and schedulers
+Run from streamlit_app/: python -m run_ingestion [--folder-id ID] [--max-concurrency 8]
+
+Credentials come from the environment (SUPABASE_URL, SUPABASE_SERVICE_KEY,
+GDRIVE_SERVICE_ACCOUNT, GDRIVE_FOLDER_ID) or from the Streamlit secrets file
+given with --secrets. --source-dir reads a local folder instead of Drive;
+--postgres-dsn, --parquet-dir or --sqlite-db write to a local Postgres,
+Parquet files or a SQLite database instead of Supabase. --build-features rebuilds
+ml_feature_snapshots from the staged raw tables once the files are loaded: every
+customer the first time (or with --full), afterwards only the customers the runs since
+the last build touched. Recomputed rows are also appended to the date-partitioned
+feature history (data/feature_history) and, with --history-table, to ml_feature_history.
+--feature-workers N spreads a full rebuild over N processes by customer hash partition;
+their partitions go to --partition-dir (default: /dev/shm when it has room, else the temp dir).
+Streamed CSVs (--csv-chunksize) are never staged, so --build-features rejects that option.
+The report is written to the sink's ingestion_logs and printed as JSON.
+
+Exit codes:
+    0  every file was loaded, skipped or unchanged
+    1  some files failed or were quarantined, or the feature build failed or
+       lacked tables the run loaded (features.missing_tables)
+    2  invalid arguments or missing configuration
+    3  the run aborted (e.g. the Drive listing failed)
+    4  the report could not be written to ingestion_logs
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tomllib
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from utils.async_ingestion import AsyncIngestionRunner
+from utils.dirty_set import DirtyCustomerSet
+from utils.feature_builder import FeatureSnapshotBuilder
+from utils.feature_history import FeatureHistoryStore
+from utils.ingestion import DataIngestionEngine
+from utils.sinks import IngestionSink, ParquetSink, PostgresSink, SQLiteSink
+from utils.sources import IngestionSource, LocalFolderSource
+
+# Same local state and staging locations as the Streamlit app
+INGESTION_STATE_DIR = Path(__file__).parent / ".ingestion_state"
+STAGING_DIR = Path(__file__).parent.parent / "data" / "staging"
+# Snapshots and z-score moments of the last feature build, plus customers touched since
+FEATURE_STATE_DIR = INGESTION_STATE_DIR / "features"
+PENDING_CUSTOMERS = FEATURE_STATE_DIR / "pending_customers.json"
+# Append-only, date-partitioned copies of every recomputed snapshot row
+FEATURE_HISTORY_DIR = Path(__file__).parent.parent / "data" / "feature_history"
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_CONFIG = 2
+EXIT_ABORTED = 3
+EXIT_LOG_FAILED = 4
+
+# Environment variables, named like the keys in .streamlit/secrets.toml
+CONFIG_KEYS = ('SUPABASE_URL', 'SUPABASE_SERVICE_KEY', 'GDRIVE_SERVICE_ACCOUNT', 'GDRIVE_FOLDER_ID')
+
+
+def load_configs(secrets_path: Optional[str] = None) -> Dict[str, str]:
+    """Environment variables win over the secrets file"""
+    secrets = {}
+    if secrets_path:
+        with open(secrets_path, 'rb') as f:
+            secrets = tomllib.load(f)
+    return {key: os.environ.get(key) or secrets.get(key, '') for key in CONFIG_KEYS}
+
+
+def exit_code(report: Dict) -> int:
+    if 'error' in report:
+        return EXIT_ABORTED
+    if report['failed'] or report['quarantined']:
+        return EXIT_PARTIAL
+    return EXIT_OK
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Ingest a Google Drive folder into Supabase",
+        epilog="Exit codes: 0 ok, 1 failed/quarantined files, 2 configuration, 3 aborted, 4 log not written"
+    )
+    parser.add_argument('--folder-id', help="Drive folder (default: GDRIVE_FOLDER_ID)")
+    parser.add_argument('--secrets', help="Streamlit secrets.toml to read credentials from")
+    parser.add_argument('--source-dir', help="Ingest this local folder instead of Google Drive")
+    sinks = parser.add_mutually_exclusive_group()
+    sinks.add_argument('--postgres-dsn', help="Upsert into this Postgres database instead of Supabase")
+    sinks.add_argument('--parquet-dir', help="Write Parquet files under this directory instead of Supabase")
+    sinks.add_argument('--sqlite-db', help="Upsert into this SQLite database file instead of Supabase")
+    parser.add_argument('--max-concurrency', type=int, default=AsyncIngestionRunner.DEFAULT_MAX_CONCURRENCY,
+                        help="Global budget of downloads, parses and upload submissions in flight")
+    parser.add_argument('--csv-chunksize', type=int, help="Stream CSV files this many rows at a time")
+    parser.add_argument('--full', action='store_true', help="Reload every file (no manifest, no row delta)")
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue the last interrupted run of this folder from its last committed batch")
+    parser.add_argument('--no-staging', action='store_true', help="Disable the Parquet staging cache")
+    parser.add_argument('--fast', action='store_true', help="Vectorized normalization")
+    parser.add_argument('--compact', action='store_true', help="Downcast numerics and categorize low-cardinality text")
+    parser.add_argument('--build-features', action='store_true',
+                        help="Rebuild ml_feature_snapshots from the staged raw tables after loading")
+    parser.add_argument('--history-table', action='store_true',
+                        help="With --build-features, also insert recomputed rows into ml_feature_history")
+    parser.add_argument('--feature-workers', type=int, default=1,
+                        help="With --build-features, processes for a full rebuild (customer hash partitions)")
+    parser.add_argument('--partition-dir',
+                        help="With --feature-workers, where partitions are written (default: /dev/shm if it has room)")
+    parser.add_argument('--drift', choices=['reject', 'quarantine', 'off'], default='reject',
+                        help="What to do with files whose column types drift")
+    parser.add_argument('--no-log', action='store_true', help="Do not write the report to ingestion_logs")
+    return parser.parse_args(argv)
+
+
+def build_source(args: argparse.Namespace) -> Optional[IngestionSource]:
+    return LocalFolderSource(args.source_dir) if args.source_dir else None
+
+
+def build_sink(args: argparse.Namespace) -> Optional[IngestionSink]:
+    if args.postgres_dsn:
+        return PostgresSink(args.postgres_dsn)
+    if args.parquet_dir:
+        return ParquetSink(args.parquet_dir)
+    if args.sqlite_db:
+        return SQLiteSink(args.sqlite_db)
+    return None
+
+
+def required_configs(args: argparse.Namespace) -> List[str]:
+    """Credentials the chosen source and sink need"""
+    required = []
+    if not (args.postgres_dsn or args.parquet_dir or args.sqlite_db):
+        required += ['SUPABASE_URL', 'SUPABASE_SERVICE_KEY']
+    if not args.source_dir:
+        required += ['GDRIVE_SERVICE_ACCOUNT']
+    return required
+
+
+def load_pending() -> DirtyCustomerSet:
+    """Customers touched by runs that did not rebuild features"""
+    if not PENDING_CUSTOMERS.exists():
+        return DirtyCustomerSet()
+    with open(PENDING_CUSTOMERS, 'r', encoding='utf-8') as f:
+        return DirtyCustomerSet(json.load(f))
+
+
+def remember_touched(engine: DataIngestionEngine) -> None:
+    """Carry this run's touched customers to the next --build-features run, once one has built"""
+    if not engine.dirty or not FEATURE_STATE_DIR.exists():
+        return
+    pending = load_pending()
+    pending.update(engine.dirty)
+    with open(PENDING_CUSTOMERS, 'w', encoding='utf-8') as f:
+        json.dump(pending.to_dict(), f)
+
+
+def build_features(engine: DataIngestionEngine, report: Dict, full: bool = False,
+                   history_table: bool = False, workers: int = 1, partition_dir: Optional[str] = None) -> None:
+    """
+    Refresh ml_feature_snapshots from the staging cache and record the outcome in the report
+    Only customers touched since the last build are recomputed, unless there is no
+    saved state, full is set or the run resumed (its earlier part's touches are unknown)
+    """
+    builder = FeatureSnapshotBuilder(partition_dir=partition_dir)
+    previous = None if full or report.get('resumed') else builder.load_state(FEATURE_STATE_DIR)
+    if previous is None:
+        tables = builder.load_staged_tables(STAGING_DIR)
+        snapshots = changed = builder.build(tables, workers=workers)
+        recomputed = len(snapshots)
+    else:
+        dirty = load_pending()
+        dirty.update(engine.dirty)
+        customers = dirty.customers()
+        tables = builder.load_staged_tables(STAGING_DIR, customers)
+        snapshots, changed = builder.refresh(tables, previous, customers)
+        recomputed = len(customers)
+    # Tables this run loaded that the staging cache lacks (whole or in part) are missing from the snapshots
+    missing_tables = set(report.get('staging', {}).get('unstaged_tables', []))
+    missing_tables.update(table for table in engine.dirty.counts() if table not in tables)
+    rows_written = builder.write(changed, engine.sink)
+    history = FeatureHistoryStore(FEATURE_HISTORY_DIR)
+    history.append(changed, builder.as_of)
+    if history_table:
+        builder.write(history.with_snapshot_date(changed, builder.as_of), engine.sink,
+                      table=history.TABLE, on_conflict=history.CONFLICT_KEYS)
+    builder.save_state(FEATURE_STATE_DIR, snapshots)
+    PENDING_CUSTOMERS.unlink(missing_ok=True)
+    report['features'] = {
+        'table': builder.TABLE,
+        'mode': 'full' if previous is None else 'incremental',
+        'customers': len(snapshots),
+        'recomputed': recomputed,
+        'rows_written': rows_written,
+        'history_date': builder.as_of.date().isoformat(),
+        'missing_tables': sorted(missing_tables)
+    }
+
+
+def build_engine(args: argparse.Namespace, configs: Dict[str, str]) -> DataIngestionEngine:
+    return DataIngestionEngine(
+        supabase_url=configs['SUPABASE_URL'],
+        supabase_key=configs['SUPABASE_SERVICE_KEY'],
+        gdrive_credentials=json.loads(configs['GDRIVE_SERVICE_ACCOUNT']) if not args.source_dir else None,
+        source=build_source(args),
+        sink=build_sink(args),
+        csv_chunksize=args.csv_chunksize,
+        manifest_path=None if args.full else str(INGESTION_STATE_DIR / "manifest.json"),
+        delta_dir=None if args.full else str(INGESTION_STATE_DIR / "delta"),
+        fast_normalize=args.fast,
+        compact=args.compact,
+        staging_dir=None if args.no_staging else str(STAGING_DIR),
+        schema_registry_path=(
+            None if args.drift == 'off' else str(INGESTION_STATE_DIR / "schema_registry.json")
+        ),
+        drift_action='reject' if args.drift == 'off' else args.drift,
+        checkpoint_path=str(INGESTION_STATE_DIR / "checkpoint.json")
+    )
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    try:
+        configs = load_configs(args.secrets)
+    except (OSError, tomllib.TOMLDecodeError) as e:
+        print(f"Cannot read secrets: {e}", file=sys.stderr)
+        return EXIT_CONFIG
+    # A local source reads its root unless --folder-id names a subfolder
+    folder_id = args.folder_id or (None if args.source_dir else configs['GDRIVE_FOLDER_ID'])
+    missing = [key for key in required_configs(args) if not configs[key]]
+    if not folder_id and not args.source_dir:
+        missing.append('GDRIVE_FOLDER_ID')
+    if missing:
+        print(f"Missing configuration: {', '.join(missing)}", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.history_table and not args.build_features:
+        print("--history-table only applies with --build-features", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.feature_workers != 1 and not args.build_features:
+        print("--feature-workers only applies with --build-features", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.feature_workers < 1:
+        print("--feature-workers must be at least 1", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.partition_dir and args.feature_workers == 1:
+        print("--partition-dir only applies with --feature-workers", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.build_features and args.no_staging:
+        print("--build-features reads the staging cache; it cannot be combined with --no-staging", file=sys.stderr)
+        return EXIT_CONFIG
+    if args.build_features and args.csv_chunksize:
+        print("--build-features reads the staging cache, which streamed CSVs never reach; "
+              "it cannot be combined with --csv-chunksize", file=sys.stderr)
+        return EXIT_CONFIG
+
+    try:
+        engine = build_engine(args, configs)
+    except Exception as e:
+        print(f"Cannot initialize ingestion: {e}", file=sys.stderr)
+        return EXIT_CONFIG
+
+    report = asyncio.run(AsyncIngestionRunner(engine, args.max_concurrency).run(folder_id, args.resume))
+    if args.build_features and 'error' not in report:
+        try:
+            build_features(engine, report, args.full, args.history_table, args.feature_workers, args.partition_dir)
+        except Exception as e:
+            report['features_error'] = str(e)
+    if 'features' not in report:
+        remember_touched(engine)
+    # Ids stay out of the printed report; ingestion_logs never stores them
+    touched = engine.dirty.counts()
+    print(json.dumps({**report, 'touched_customers': touched}, indent=2, default=str))
+
+    code = exit_code(report)
+    if 'features_error' in report or report.get('features', {}).get('missing_tables'):
+        code = max(code, EXIT_PARTIAL)
+    if not args.no_log:
+        try:
+            engine.write_ingestion_log(report)
+        except Exception as e:
+            print(f"Cannot write ingestion_logs: {e}", file=sys.stderr)
+            return max(code, EXIT_LOG_FAILED)
+    return code
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,11 @@
+"""
+Tests for the ingestion and feature pipeline in streamlit_app/utils
+Run from the repository root: python -m pytest
+Modules are imported the way app.py and run_ingestion.py import them
+(streamlit_app/ on sys.path), so no client library has to be installed
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
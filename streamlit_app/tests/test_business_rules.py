@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.business_rules import MYPEBusinessRules
+
+RULES = MYPEBusinessRules
+
+
+def metrics_frame(n: int, seed: int = 1) -> pd.DataFrame:
+    """Metrics around every threshold, with NaNs and a shuffled index"""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'dpd_mean': rng.choice([0, 30, 60, 60.4, 60.5, 89.5, 90, 90.4, 91, 150, np.nan], n),
+        'ltv': rng.uniform(0, 120, n).round(2),
+        'avg_dpd': rng.integers(0, 120, n),
+        'collection_rate': rng.choice([0.0, 0.5, 0.69, 0.7, 0.7000001, 0.95, 1.0, np.nan], n),
+        'avg_risk_severity': rng.uniform(0, 1, n),
+    }, index=rng.permutation(n) * 3)
+
+
+def records(frame: pd.DataFrame):
+    """Rows as the customer_metrics dicts the scalar rules take (original dtypes)"""
+    return frame.astype(object).to_dict('records')
+
+
+@pytest.mark.parametrize('columns', [None, ['dpd_mean', 'collection_rate'], ['avg_dpd']])
+def test_classify_high_risk_frame_matches_scalar_rule(columns):
+    frame = metrics_frame(3000)
+    if columns is not None:
+        frame = frame[columns]
+    flags, reasons = RULES.classify_high_risk_frame(frame)
+
+    assert flags.index.equals(frame.index) and reasons.index.equals(frame.index)
+    for metrics, flag, reason in zip(records(frame), flags, reasons):
+        assert (flag, reason) == RULES.classify_high_risk(metrics)
+
+
+def test_classify_high_risk_frame_empty():
+    flags, reasons = RULES.classify_high_risk_frame(metrics_frame(10).iloc[:0])
+    assert flags.empty and reasons.empty
+
+
+def applications(n: int, pod_column='pod', seed: int = 2) -> pd.DataFrame:
+    """Facility applications around the tier, POD and collateral limits"""
+    rng = np.random.default_rng(seed)
+    frame = metrics_frame(n, seed)
+    frame['facility_amount'] = rng.choice(
+        [500, 999.99, 1000, 25_000, 50_000, 50_000.01, 120_000, 200_000, 200_001, 750_000], n)
+    frame['collateral_value'] = rng.choice([0, 1000, 30_000, 60_000, 240_000, 300_000, 1_200_000], n)
+    if pod_column:
+        frame[pod_column] = rng.choice([0.0, 0.1, 0.15, 0.2, 0.2000001, 0.3, 0.35, 0.36, 0.5, 0.9, np.nan], n)
+    return frame
+
+
+def same(left: float, right: float) -> bool:
+    return left == pytest.approx(right, rel=1e-12, nan_ok=True)
+
+
+@pytest.mark.parametrize('pod_column', ['pod', 'default_risk_score', None])
+def test_batch_approval_matches_scalar_rule(pod_column):
+    apps = applications(3000, pod_column)
+    batch = RULES.evaluate_facility_approval_batch(apps)
+    assert batch.index.equals(apps.index)
+
+    for app, (_, row) in zip(records(apps), batch.iterrows()):
+        amount, collateral = app.pop('facility_amount'), app.pop('collateral_value')
+        decision = RULES.evaluate_facility_approval(amount, app, collateral)
+        assert row['approved'] == decision.approved
+        assert row['risk_level'] == decision.risk_level.value
+        assert same(row['recommended_amount'], decision.recommended_amount)
+        assert same(row['required_collateral'], decision.required_collateral)
+        assert same(row['pod'], decision.pod)
+        # One ApprovalCode bit per message text
+        assert bin(int(row['conditions'])).count('1') == len(decision.conditions)
+        assert bin(int(row['reasons'])).count('1') == len(decision.reasons)
+
+
+def test_batch_approval_defaults_collateral_and_needs_amount():
+    apps = applications(50).drop(columns='collateral_value')
+    batch = RULES.evaluate_facility_approval_batch(apps)
+    for app, approved in zip(records(apps), batch['approved']):
+        assert approved == RULES.evaluate_facility_approval(app.pop('facility_amount'), app).approved
+    with pytest.raises(ValueError):
+        RULES.evaluate_facility_approval_batch(apps.drop(columns='facility_amount'))
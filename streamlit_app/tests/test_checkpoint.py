@@ -0,0 +1,91 @@
+import json
+
+import pandas as pd
+import pytest
+
+from utils.ingestion import DataIngestionEngine
+from utils.sinks import SQLiteSink
+from utils.sources import LocalFolderSource
+
+PORTFOLIO_ROWS = 120
+PAYMENT_ROWS = 230
+
+
+class FlakySink(SQLiteSink):
+    """SQLite sink that fails every upsert to raw_portfolios once `budget` of its batches have landed"""
+
+    def __init__(self, path, budget=None):
+        super().__init__(path)
+        self.budget = budget
+        self.sent = []
+
+    def upsert(self, table, rows, on_conflict=None, **options):
+        if table == 'raw_portfolios' and self.budget is not None:
+            if self.budget <= 0:
+                raise ConnectionError('sink timeout')
+            self.budget -= 1
+        self.sent.extend((table, row.get('customer_id'), row.get('payment_id')) for row in rows)
+        return super().upsert(table, rows, on_conflict=on_conflict, **options)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    source = tmp_path / 'source'
+    source.mkdir()
+    for index in range(3):
+        pd.DataFrame({
+            'Customer ID': [f'C{index}-{i}' for i in range(PORTFOLIO_ROWS)],
+            'Balance': range(PORTFOLIO_ROWS),
+            'Date': '2024-01-01'
+        }).to_csv(source / f'portfolio_{index}.csv', index=False)
+    pd.DataFrame({
+        'Payment ID': [f'P{i}' for i in range(PAYMENT_ROWS)],
+        'Customer ID': 'C1',
+        'Amount': '$1,000',
+        'Date': '2024-01-02'
+    }).to_csv(source / 'pagos_feb.csv', index=False)
+    return source
+
+
+def engine(folder, sink, tmp_path):
+    engine = DataIngestionEngine(source=LocalFolderSource(folder), sink=sink,
+                                 conflict_keys=DataIngestionEngine.BUSINESS_KEYS,
+                                 upsert_batch_size=50, checkpoint_path=str(tmp_path / 'checkpoint.json'))
+    engine.writer.max_retries = 0
+    return engine
+
+
+def test_resume_sends_each_row_once(folder, tmp_path):
+    database = str(tmp_path / 'sink.db')
+    total = 3 * PORTFOLIO_ROWS + PAYMENT_ROWS
+
+    interrupted = FlakySink(database, budget=4)
+    first = engine(folder, interrupted, tmp_path).ingest()
+    assert first['failed'] > 0
+    assert 0 < len(interrupted.sent) < total
+
+    resumed_sink = FlakySink(database)
+    second = engine(folder, resumed_sink, tmp_path).ingest(resume=True)
+    assert second['failed'] == 0
+    assert second['resumed'] > 0
+
+    sent = interrupted.sent + resumed_sink.sent
+    assert len(sent) == total
+    assert len(set(sent)) == total
+    assert resumed_sink.row_count('raw_portfolios') == 3 * PORTFOLIO_ROWS
+    assert resumed_sink.row_count('raw_payments') == PAYMENT_ROWS
+
+    checkpoint = json.loads((tmp_path / 'checkpoint.json').read_text())
+    assert checkpoint['completed'] is True
+    assert len(checkpoint['files']) == 4
+
+
+def test_completed_run_is_not_resumed(folder, tmp_path):
+    database = str(tmp_path / 'sink.db')
+    engine(folder, FlakySink(database), tmp_path).ingest()
+
+    rerun = FlakySink(database)
+    report = engine(folder, rerun, tmp_path).ingest(resume=True)
+    assert report['resumed'] == 0
+    assert len(rerun.sent) == 3 * PORTFOLIO_ROWS + PAYMENT_ROWS
+    assert rerun.row_count('raw_portfolios') == 3 * PORTFOLIO_ROWS
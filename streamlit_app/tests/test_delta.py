@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from utils.delta import RowDeltaStore
+from utils.ingestion import DataIngestionEngine
+from utils.sinks import SQLiteSink
+from utils.sources import LocalFolderSource
+
+KEYS = {'raw_payments': ['payment_id']}
+
+
+def payments(n: int = 100) -> pd.DataFrame:
+    return pd.DataFrame({
+        'payment_id': [f'P{i}' for i in range(n)],
+        'customer_id': [f'C{i % 10}' for i in range(n)],
+        'amount': np.arange(n, dtype=float),
+        'refresh_date': '2024-01-01'
+    })
+
+
+def load(store: RowDeltaStore, df: pd.DataFrame):
+    delta, changed, tombstones = store.diff('raw_payments', 'payments.csv', df)
+    store.save(delta)
+    return delta.counts, changed, tombstones
+
+
+def test_inserts_updates_unchanged_and_tombstones(tmp_path):
+    store = RowDeltaStore(tmp_path, KEYS)
+    counts, changed, _ = load(store, payments())
+    assert counts['inserts'] == 100 and len(changed) == 100
+
+    current = payments().drop(index=[0, 1])
+    current.loc[5, 'amount'] = -1.0
+    current = pd.concat([current, pd.DataFrame({'payment_id': ['P100'], 'customer_id': ['C0'],
+                                                'amount': [1.0], 'refresh_date': ['2024-01-01']})])
+    current['refresh_date'] = '2024-02-01'
+    counts, changed, tombstones = load(store, current)
+    assert counts == {'inserts': 1, 'updates': 1, 'unchanged_rows': 97, 'tombstones': 2}
+    assert sorted(changed['payment_id']) == ['P100', 'P5']
+    assert sorted(tombstones['payment_id']) == ['P0', 'P1']
+
+
+def test_chunked_diff_matches_one_shot(tmp_path):
+    baseline = payments(1000)
+    current = baseline.sample(frac=0.9, random_state=0).copy()
+    current.loc[current.index[:25], 'amount'] += 0.5
+
+    one_shot = RowDeltaStore(tmp_path / 'one', KEYS)
+    chunked = RowDeltaStore(tmp_path / 'chunked', KEYS)
+    load(one_shot, baseline)
+    load(chunked, baseline)
+
+    counts, changed, tombstones = load(one_shot, current)
+    delta = chunked.open('raw_payments', 'payments.csv')
+    parts = [delta.diff(current.iloc[start:start + 128]) for start in range(0, len(current), 128)]
+    chunk_tombstones = delta.tombstones()
+
+    assert delta.counts == counts
+    assert pd.concat(parts).equals(changed)
+    assert sorted(chunk_tombstones['payment_id']) == sorted(tombstones['payment_id'])
+
+
+def test_numeric_dtype_changes_are_not_updates(tmp_path):
+    store = RowDeltaStore(tmp_path, KEYS)
+    load(store, payments())
+    as_ints = payments()
+    as_ints['amount'] = as_ints['amount'].astype('int64')
+    counts, changed, _ = load(store, as_ints)
+    assert counts['updates'] == 0 and changed.empty
+
+
+def test_compaction_plus_delta_reports_only_the_changed_row(tmp_path):
+    folder = tmp_path / 'source'
+    folder.mkdir()
+    df = pd.DataFrame({'Customer ID': ['C1', 'C2', 'C3'], 'Payment ID': ['P1', 'P2', 'P3'],
+                       'Amount': [100.0, 200.0, 300.0], 'Date': ['2024-01-01'] * 3})
+    df.to_csv(folder / 'payments.csv', index=False)
+
+    def run():
+        engine = DataIngestionEngine(source=LocalFolderSource(folder), sink=SQLiteSink(),
+                                     conflict_keys=DataIngestionEngine.BUSINESS_KEYS,
+                                     delta_dir=str(tmp_path / 'delta'), compact=True)
+        return engine.ingest()['details'][0]
+
+    first = run()
+    assert first['inserts'] == 3
+
+    df.loc[2, 'Amount'] = 300.5
+    df.to_csv(folder / 'payments.csv', index=False)
+    second = run()
+    assert second['updates'] == 1
+    assert second['inserts'] == 0
+    assert second['tombstones'] == 0
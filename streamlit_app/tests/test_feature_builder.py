@@ -0,0 +1,52 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_feature_snapshots import make_raw_tables, touch_payments
+from utils.feature_builder import FeatureSnapshotBuilder
+
+AS_OF = datetime(2025, 1, 1)
+
+
+@pytest.fixture
+def tables():
+    return make_raw_tables(400, 4)
+
+
+def by_customer(snapshots: pd.DataFrame) -> pd.DataFrame:
+    return snapshots.assign(customer_id=snapshots['customer_id'].astype(str)).set_index('customer_id').sort_index()
+
+
+def assert_same_features(left: pd.DataFrame, right: pd.DataFrame, zscore_tolerance: float) -> None:
+    left, right = by_customer(left), by_customer(right)
+    assert left.index.equals(right.index)
+    zscores = FeatureSnapshotBuilder.ZSCORE_COLUMNS
+    features = [col for col in left.columns if col not in zscores]
+    pd.testing.assert_frame_equal(left[features], right[features], check_dtype=False)
+    difference = np.abs(left[zscores].to_numpy(dtype=float) - right[zscores].to_numpy(dtype=float))
+    assert np.nanmax(difference) <= zscore_tolerance + 1e-4
+
+
+@pytest.mark.parametrize('zscore_tolerance', [0.0, FeatureSnapshotBuilder.ZSCORE_TOLERANCE])
+def test_refresh_matches_full_rebuild(tables, zscore_tolerance):
+    builder = FeatureSnapshotBuilder(as_of=AS_OF)
+    snapshots = builder.build(tables)
+    touched = touch_payments(tables, 0.05)
+
+    refreshed, changed = builder.refresh(tables, snapshots, touched, zscore_tolerance=zscore_tolerance)
+    rebuilt = FeatureSnapshotBuilder(as_of=AS_OF).build(tables)
+
+    assert_same_features(refreshed, rebuilt, zscore_tolerance)
+    assert set(touched) <= set(changed['customer_id'].astype(str))
+    for metric in FeatureSnapshotBuilder.ZSCORE_METRICS:
+        assert builder.moments.mean(metric) == pytest.approx(rebuilt[metric].mean(), rel=1e-9, abs=1e-9)
+
+
+def test_refresh_without_touched_customers_changes_nothing(tables):
+    builder = FeatureSnapshotBuilder(as_of=AS_OF)
+    snapshots = builder.build(tables)
+    refreshed, changed = builder.refresh(tables, snapshots, [])
+    assert refreshed is snapshots
+    assert changed.empty
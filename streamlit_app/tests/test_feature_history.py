@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_feature_snapshots import make_raw_tables, touch_payments
+from utils.feature_builder import FeatureSnapshotBuilder
+from utils.feature_history import FeatureHistoryStore
+
+
+@pytest.fixture
+def history(tmp_path):
+    """Store with a full build on 2024-03-01 and a refresh of touched customers on 2024-03-05"""
+    store = FeatureHistoryStore(tmp_path)
+    tables = make_raw_tables(300, 4)
+    builder = FeatureSnapshotBuilder(as_of='2024-03-01')
+    first = builder.build(tables)
+    store.append(first, '2024-03-01')
+
+    touched = touch_payments(tables, 0.1)
+    builder.as_of = pd.Timestamp('2024-03-05')
+    second, changed = builder.refresh(tables, first, touched)
+    store.append(changed, '2024-03-05')
+    return store, first.set_index('customer_id'), second.set_index('customer_id'), list(touched)
+
+
+def test_empty_store():
+    store = FeatureHistoryStore('does-not-exist')
+    assert store.dates() == []
+    result = store.as_of(pd.DataFrame({'customer_id': ['C1'], 'as_of': ['2024-01-01']}))
+    assert len(result) == 1
+    assert pd.isna(result['snapshot_date'].iloc[0])
+
+
+def test_as_of_picks_latest_snapshot_on_or_before_each_date(history):
+    store, first, second, touched = history
+    untouched = next(customer for customer in first.index if customer not in touched)
+    pairs = pd.DataFrame({
+        'customer_id': [untouched, touched[0], touched[0], untouched, 'missing'],
+        'as_of': ['2024-03-06', '2024-03-04', '2024-03-05', '2024-02-01', '2024-03-10'],
+        'label': range(5)
+    })
+    result = store.as_of(pairs, columns=['total_payments'])
+
+    assert result['label'].tolist() == list(range(5))
+    assert result['total_payments'].iloc[0] == first.loc[untouched, 'total_payments']
+    assert result['total_payments'].iloc[1] == first.loc[touched[0], 'total_payments']
+    assert result['total_payments'].iloc[2] == second.loc[touched[0], 'total_payments']
+    assert result['snapshot_date'].iloc[2] == pd.Timestamp('2024-03-05')
+    assert pd.isna(result['snapshot_date'].iloc[3]) and np.isnan(result['total_payments'].iloc[3])
+    assert np.isnan(result['total_payments'].iloc[4])
+
+
+def test_as_of_over_all_customers_matches_current_snapshots(history):
+    store, _, second, _ = history
+    pairs = pd.DataFrame({'customer_id': second.index, 'as_of': '2024-03-06'})
+    result = store.as_of(pairs, columns=['num_payments', 'total_payments']).set_index('customer_id')
+    pd.testing.assert_series_equal(result['total_payments'], second['total_payments'], check_dtype=False)
+    pd.testing.assert_series_equal(result['num_payments'], second['num_payments'], check_dtype=False)
+
+
+def test_later_part_of_the_same_day_wins(history):
+    store, _, _, touched = history
+    store.append(pd.DataFrame({'customer_id': [touched[0]], 'total_payments': [-1.0]}), '2024-03-05')
+    result = store.as_of(pd.DataFrame({'customer_id': [touched[0]], 'as_of': ['2024-03-05']}),
+                         columns=['total_payments'])
+    assert result['total_payments'].iloc[0] == -1.0
+
+
+def test_empty_pairs(history):
+    store = history[0]
+    result = store.as_of(pd.DataFrame({'customer_id': [], 'as_of': []}), columns=['total_payments'])
+    assert result.empty
+    assert {'customer_id', 'as_of', 'total_payments', 'snapshot_date'} <= set(result.columns)
+
+
+def test_read_prunes_dates_and_customers(history):
+    store, first, _, touched = history
+    assert store.dates() == [pd.Timestamp('2024-03-01'), pd.Timestamp('2024-03-05')]
+    assert len(store.read(end='2024-03-01')) == len(first)
+    later = store.read(start='2024-03-02', columns=['customer_id'])
+    assert set(touched) <= set(later['customer_id'])
+    assert set(store.read(customers=touched[:2])['customer_id']) == set(touched[:2])
+    assert store.read(customers=[]).empty
@@ -0,0 +1,83 @@
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_approval_batch import make_applications
+from utils.business_rules import MYPEBusinessRules
+from utils.policy_sweep import ApprovalPolicySweep
+
+RULES = MYPEBusinessRules
+GRID = {'max_pod': [0.1, 0.3, np.nan], 'min_collateral_ratio': [0.5, 1.2, np.nan],
+        'collection_rate_threshold': [0.6, np.nan]}
+
+
+@pytest.fixture(scope='module')
+def apps():
+    apps = make_applications(4000)
+    apps.loc[apps.sample(100, random_state=1).index, 'pod'] = np.nan
+    apps.loc[apps.sample(100, random_state=2).index, 'collateral_value'] = np.nan
+    apps.loc[apps.sample(20, random_state=3).index, 'facility_amount'] = np.nan
+    return apps
+
+
+def reference(monkeypatch, apps, variant, tiers):
+    """Totals of evaluate_facility_approval_batch with the variant patched into the rules"""
+    thresholds = copy.deepcopy(RULES.FACILITY_THRESHOLDS)
+    criteria = dict(RULES.HIGH_RISK_CRITERIA)
+    for tier in tiers:
+        if not np.isnan(variant['max_pod']):
+            thresholds[tier]['max_pod'] = variant['max_pod']
+        if not np.isnan(variant['min_collateral_ratio']):
+            thresholds[tier]['min_collateral_ratio'] = variant['min_collateral_ratio']
+    if not np.isnan(variant['collection_rate_threshold']):
+        criteria['collection_rate_threshold'] = variant['collection_rate_threshold']
+    with monkeypatch.context() as patch:
+        patch.setattr(RULES, 'FACILITY_THRESHOLDS', thresholds)
+        patch.setattr(RULES, 'HIGH_RISK_CRITERIA', criteria)
+        decisions = RULES.evaluate_facility_approval_batch(apps)
+
+    approved = decisions['approved'].to_numpy()
+    amount = apps['facility_amount'].to_numpy()
+    collateral = apps['collateral_value'].to_numpy()
+    required = decisions['required_collateral'].to_numpy()
+    exposure = apps['pod'].to_numpy() * np.maximum(amount - np.nan_to_num(collateral), 0)
+    shortfall = np.maximum(required - collateral, 0)
+    return {
+        'approved': int(approved.sum()),
+        'approved_amount': np.nansum(amount[approved]),
+        'expected_loss': np.nansum(exposure[approved]),
+        'collateral_shortfall': np.nansum(shortfall[approved & (collateral < required)])
+    }
+
+
+def test_current_policy_matches_batch_evaluator(apps):
+    result = ApprovalPolicySweep(apps).run()
+    assert len(result) == 1
+    assert result['approved'].iloc[0] == RULES.evaluate_facility_approval_batch(apps)['approved'].sum()
+
+
+@pytest.mark.parametrize('tiers', [None, ['small', 'medium']])
+def test_grid_matches_patched_rules(apps, monkeypatch, tiers):
+    sweep = ApprovalPolicySweep(apps, tiers)
+    sweep.BLOCK_CELLS = 10_000  # several blocks per run
+    result = sweep.run(**GRID)
+    assert len(result) == 18
+
+    for _, variant in result.iterrows():
+        expected = reference(monkeypatch, apps, variant, tiers or list(RULES.FACILITY_THRESHOLDS))
+        assert variant['approved'] == expected['approved']
+        for column in ('approved_amount', 'expected_loss', 'collateral_shortfall'):
+            assert variant[column] == pytest.approx(expected[column])
+
+
+def test_workers_match_single_process(apps):
+    sweep = ApprovalPolicySweep(apps)
+    pd.testing.assert_frame_equal(sweep.run(**GRID), sweep.run(workers=2, **GRID))
+
+
+def test_empty_applications(apps):
+    result = ApprovalPolicySweep(apps.iloc[:0]).run(max_pod=[0.2, 0.3])
+    assert len(result) == 2
+    assert (result['approved'] == 0).all()
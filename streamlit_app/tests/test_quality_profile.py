@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.quality_profile import DISTINCT_SKETCH_SIZE, ColumnProfile, QualityProfile
+
+
+def merged(series: pd.Series, chunks: int) -> ColumnProfile:
+    profile = None
+    for chunk in np.array_split(series, chunks):
+        part = ColumnProfile.from_series(pd.Series(chunk))
+        profile = part if profile is None else profile.merge(part)
+    return profile
+
+
+@pytest.mark.parametrize('distinct', [1, 100, DISTINCT_SKETCH_SIZE - 1])
+def test_distinct_is_exact_below_sketch_size(distinct):
+    values = pd.Series(np.random.default_rng(0).permutation(np.arange(3 * distinct) % distinct))
+    assert ColumnProfile.from_series(values).distinct == distinct
+    assert merged(values, 50).distinct == distinct
+
+
+@pytest.mark.parametrize('distinct', [50_000, 500_000])
+def test_distinct_estimate_matches_whole_frame_and_is_close(distinct):
+    values = pd.Series(np.random.default_rng(1).integers(0, distinct, 2 * distinct))
+    true = values.nunique()
+    whole = ColumnProfile.from_series(values)
+    assert merged(values, 200).distinct == whole.distinct
+    assert abs(whole.distinct - true) / true < 0.05
+    assert len(whole.value_hashes) == DISTINCT_SKETCH_SIZE
+
+
+def test_text_distinct_ignores_nulls_and_category_dtype():
+    values = pd.Series(['a', 'b', None, 'a', 'c'])
+    assert ColumnProfile.from_series(values).distinct == 3
+    assert ColumnProfile.from_series(values.astype('category')).distinct == 3
+
+
+def test_chunked_profile_matches_whole_frame():
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({
+        'customer_id': rng.choice(['C1', 'C2', None], 1000),
+        'balance': np.where(rng.random(1000) < 0.1, np.nan, rng.integers(0, 5, 1000)),
+        'amount': rng.integers(0, 3, 1000).astype(float),
+        'date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 30, 1000), unit='D')
+    })
+    whole = QualityProfile.from_frame(df)
+    parts = None
+    for chunk in np.array_split(np.arange(len(df)), 7):
+        part = QualityProfile.from_frame(df.iloc[chunk])
+        parts = part if parts is None else parts.merge(part)
+    assert parts.counts() == whole.counts()
+    assert parts.column_summary() == whole.column_summary()
+    zero_rows = int((df[['balance', 'amount']] == 0).all(axis=1).sum())
+    assert whole.zero_rows == zero_rows
+    assert whole.critical_nulls() == int(df[['customer_id', 'balance', 'amount', 'date']].isna().sum().sum())
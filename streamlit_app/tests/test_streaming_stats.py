@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.feature_engineering import FeatureEngineer
+from utils.streaming_stats import RunningMoments, StreamingStats, TDigest
+
+
+@pytest.fixture
+def values():
+    return np.random.default_rng(0).gamma(1.2, 30, 1800)
+
+
+def test_merged_moments_match_whole(values):
+    merged = RunningMoments.from_values(values[:1]).merge(RunningMoments.from_values(values[1:700]))
+    merged = merged.merge(RunningMoments.from_values(values[700:]))
+    assert merged.count == len(values)
+    assert merged.mean == pytest.approx(values.mean(), rel=1e-12)
+    assert merged.std() == pytest.approx(values.std(ddof=1), rel=1e-9)
+    assert merged.minimum == values.min() and merged.maximum == values.max()
+
+
+def test_subtract_retracts_a_merged_partial(values):
+    kept = RunningMoments.from_values(values[:1000])
+    removed = RunningMoments.from_values(values[1000:])
+    restored = kept.merge(removed).subtract(removed)
+    assert restored.count == 1000
+    assert restored.mean == pytest.approx(kept.mean, rel=1e-9)
+    assert restored.std() == pytest.approx(kept.std(), rel=1e-9)
+
+
+def test_digest_is_exact_below_exact_limit(values):
+    parts = [TDigest.from_values(part) for part in np.array_split(values, 7)]
+    digest = parts[0]
+    for part in parts[1:]:
+        digest = digest.merge(part)
+    assert digest.exact
+    assert digest.median() == float(np.median(values))
+    assert TDigest.from_dict(digest.to_dict()).median() == digest.median()
+
+
+def test_digest_quantiles_stay_within_rank_error():
+    values = np.random.default_rng(1).gamma(1.2, 30, 200_000)
+    merged = StreamingStats.merge_all(StreamingStats.from_values(part) for part in np.array_split(values, 40))
+    assert not merged.digest.exact
+    for q in (0.01, 0.1, 0.5, 0.9, 0.99):
+        assert abs((values < merged.digest.quantile(q)).mean() - q) < 0.01
+
+
+@pytest.mark.parametrize('series', [
+    pd.Series([5.0]),
+    pd.Series([1, 2, np.nan, 9]),
+    pd.Series([0] * 10),
+    pd.Series(np.random.default_rng(2).integers(0, 200, 1500))
+])
+def test_dpd_statistics_from_partials_match_pandas(series):
+    engineer = FeatureEngineer()
+    partials = (StreamingStats.from_values(part) for part in np.array_split(series.to_numpy(dtype=float), 3))
+    streamed = engineer.dpd_statistics(StreamingStats.merge_all(partials))
+    expected = engineer.calculate_dpd_statistics(series)
+    assert streamed.keys() == expected.keys()
+    for key, value in expected.items():
+        assert streamed[key] == pytest.approx(value, rel=1e-9, nan_ok=True)
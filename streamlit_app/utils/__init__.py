@@ -1,15 +1,64 @@
 """Utilities module"""
 from .ingestion import DataIngestionEngine
+from .file_transform import FileTransform
+from .async_ingestion import AsyncIngestionRunner
+from .upsert_writer import BatchUpsertWriter
+from .sources import IngestionSource, DriveSource, LocalFolderSource, ObjectStoreSource
+from .sinks import IngestionSink, SupabaseSink, PostgresSink, ParquetSink, SQLiteSink
+from .ingestion_manifest import IngestionManifest
+from .ingestion_checkpoint import IngestionCheckpoint
+from .delta import RowDeltaStore
+from .dirty_set import DirtyCustomerSet
+from .fast_normalize import FastNormalizer
+from .compaction import FrameCompactor
+from .staging_cache import ParquetStagingCache
+from .excel_reader import ExcelReader
+from .quality_profile import QualityProfile
+from .schema_registry import SchemaRegistry
+from .streaming_stats import RunningMoments, TDigest, StreamingStats
 from .feature_engineering import FeatureEngineer
+from .feature_builder import FeatureSnapshotBuilder, ZScoreMoments
+from .feature_history import FeatureHistoryStore
 from .kpi_engine import KPIEngine
-from .business_rules import MYPEBusinessRules, RiskLevel, IndustryType, ApprovalDecision
+from .business_rules import MYPEBusinessRules, RiskLevel, IndustryType, ApprovalDecision, ApprovalCode
+from .policy_sweep import ApprovalPolicySweep
 
 __all__ = [
     "DataIngestionEngine",
+    "FileTransform",
+    "AsyncIngestionRunner",
+    "BatchUpsertWriter",
+    "IngestionSource",
+    "DriveSource",
+    "LocalFolderSource",
+    "ObjectStoreSource",
+    "IngestionSink",
+    "SupabaseSink",
+    "PostgresSink",
+    "ParquetSink",
+    "SQLiteSink",
+    "IngestionManifest",
+    "IngestionCheckpoint",
+    "RowDeltaStore",
+    "DirtyCustomerSet",
+    "FastNormalizer",
+    "FrameCompactor",
+    "ParquetStagingCache",
+    "ExcelReader",
+    "QualityProfile",
+    "SchemaRegistry",
+    "RunningMoments",
+    "TDigest",
+    "StreamingStats",
     "FeatureEngineer", 
+    "FeatureSnapshotBuilder",
+    "ZScoreMoments",
+    "FeatureHistoryStore",
     "KPIEngine",
     "MYPEBusinessRules",
     "RiskLevel",
     "IndustryType",
-    "ApprovalDecision"
+    "ApprovalDecision",
+    "ApprovalCode",
+    "ApprovalPolicySweep"
 ]
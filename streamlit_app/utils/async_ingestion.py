@@ -0,0 +1,111 @@
+"""
+Asyncio Ingestion Runner
+Drives the source listing, downloads, parsing and upserts of a DataIngestionEngine
+as concurrent asyncio tasks under one global concurrency budget, for headless
+runs (see run_ingestion.py) that are not tied to a Streamlit request
+"""
+
+import asyncio
+import io
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from .ingestion import DataIngestionEngine, _transform_in_worker
+
+
+class AsyncIngestionRunner:
+    """
+    One task per source file, every blocking step awaited on an executor
+
+    The engine's stages are blocking calls (source downloads, pandas, the upsert
+    writer's bounded queue), so each runs on a thread - parsing on a process
+    pool - while the event loop only schedules. max_concurrency caps the
+    blocking steps in flight across all files and stages, so a folder of
+    hundreds of files never opens more than that many downloads, parses and
+    upload submissions at once. The engine's per-stage limits still size the
+    pools behind the budget.
+
+    The report is the same dict DataIngestionEngine.ingest returns, in listing order.
+    """
+
+    DEFAULT_MAX_CONCURRENCY = 8
+
+    def __init__(self, engine: DataIngestionEngine, max_concurrency: Optional[int] = None):
+        self.engine = engine
+        self.max_concurrency = max(1, int(max_concurrency or self.DEFAULT_MAX_CONCURRENCY))
+        self._budget: Optional[asyncio.Semaphore] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._processes: Optional[ProcessPoolExecutor] = None
+
+    async def _blocking(self, func, *args, executor=None):
+        """Run one blocking step under the global budget"""
+        async with self._budget:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor or self._threads, func, *args)
+
+    async def ingest_file(self, file_info: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """Download, transform and queue one file; the same (file_result, quality) as _ingest_file"""
+        engine = self.engine
+        unchanged = engine._unchanged_result(file_info)
+        if unchanged is not None:
+            return unchanged, None
+
+        file_result = engine._new_file_result(file_info['name'])
+        try:
+            staged = await self._blocking(engine._staged_transform, file_info)
+            if staged is not None:
+                return file_result, await self._blocking(engine.load_staged, file_info, file_result, staged)
+
+            if engine.should_stream(file_info['name'], file_info['mimeType']):
+                fh = await self._blocking(
+                    engine.download_file, file_info['id'],
+                    tempfile.TemporaryFile(), engine.STREAM_DOWNLOAD_CHUNK_BYTES
+                )
+                return file_result, await self._blocking(engine._stream_downloaded, fh, file_info, file_result)
+
+            fh: io.BytesIO = await self._blocking(engine.download_file, file_info['id'])
+            content = fh.getvalue()
+            transformed = await self._blocking(
+                _transform_in_worker, content, file_info['name'], file_info['mimeType'],
+                engine.options(), executor=self._processes
+            )
+            quality = await self._blocking(engine.load_transformed, file_info, file_result, transformed, content)
+        except Exception as e:
+            engine._mark_failed(file_result, e)
+            return file_result, None
+        return file_result, quality
+
+    async def ingest_files(self, files: List[Dict]) -> List[Tuple[Dict, Optional[Dict]]]:
+        return list(await asyncio.gather(*(self.ingest_file(file_info) for file_info in files)))
+
+    async def run(self, folder: Optional[str] = None, resume: bool = False) -> Dict:
+        """Ingest a source folder (resume: see DataIngestionEngine.ingest); returns the ingestion report"""
+        engine = self.engine
+        ingestion_report = engine.new_report()
+        self._budget = asyncio.Semaphore(self.max_concurrency)
+        limits = engine.concurrency
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as threads, \
+                ProcessPoolExecutor(max_workers=limits['parse']) as processes:
+            self._threads, self._processes = threads, processes
+            try:
+                files = await self._blocking(engine.list_files, folder)
+                ingestion_report['total_files'] = len(files)
+
+                pending, resumed = engine.begin_run(folder, files, resume)
+                try:
+                    file_results = await self.ingest_files(pending)
+                finally:
+                    # Drain queued upserts so every file result is final
+                    await asyncio.get_running_loop().run_in_executor(threads, engine.writer.close)
+                file_results = engine.merge_resumed(files, resumed, file_results)
+                await asyncio.get_running_loop().run_in_executor(
+                    threads, engine.complete_report, ingestion_report, files, file_results
+                )
+            except Exception as e:
+                ingestion_report['error'] = str(e)
+            finally:
+                self._threads = self._processes = None
+
+        return ingestion_report
@@ -3,9 +3,12 @@ Business Rules Engine - MYPE 2025 Standards
 Implements approval thresholds, risk classification, and industry-specific logic
 """
 
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from dataclasses import dataclass
-from enum import Enum
+from enum import Enum, IntFlag
+
+import numpy as np
+import pandas as pd
 
 
 class RiskLevel(Enum):
@@ -27,6 +30,28 @@ class IndustryType(Enum):
     OTHER = "other"
 
 
+class ApprovalCode(IntFlag):
+    """
+    Packed conditions/reasons of a batch approval decision
+    Each bit stands for one message of evaluate_facility_approval; whether it
+    lands in conditions or reasons follows the scalar rules (e.g. a collateral
+    shortfall is a condition for micro facilities and a decline reason above)
+    """
+    POD_ABOVE_MAX = 1 << 0
+    COLLATERAL_SHORTFALL = 1 << 1
+    ENHANCED_MONITORING = 1 << 2
+    HIGH_RISK_DPD = 1 << 3
+    HIGH_RISK_LTV = 1 << 4
+    HIGH_RISK_AVG_DPD = 1 << 5
+    HIGH_RISK_COLLECTION_RATE = 1 << 6
+    HIGH_RISK_SEVERITY = 1 << 7
+    COLLECTION_BELOW_TARGET = 1 << 8
+    PAYMENT_DELAYS = 1 << 9
+    EINVOICE_REQUIRED = 1 << 10
+    APPROVED = 1 << 11
+    ADEQUATE_COLLATERAL = 1 << 12
+
+
 @dataclass
 class ApprovalDecision:
     """Loan approval decision with reasoning"""
@@ -143,6 +168,79 @@ class MYPEBusinessRules:
         
         return is_high_risk, reasons
     
+    # HIGH_RISK_CRITERIA checks in classify_high_risk's order, with their batch codes
+    HIGH_RISK_CODES = (
+        ApprovalCode.HIGH_RISK_DPD,
+        ApprovalCode.HIGH_RISK_LTV,
+        ApprovalCode.HIGH_RISK_AVG_DPD,
+        ApprovalCode.HIGH_RISK_COLLECTION_RATE,
+        ApprovalCode.HIGH_RISK_SEVERITY
+    )
+    
+    @staticmethod
+    def _metric_column(metrics: pd.DataFrame, name: str, default: float) -> np.ndarray:
+        """float64 values of a metrics column, or its customer_metrics.get default when absent"""
+        if name not in metrics.columns:
+            return np.full(len(metrics), default, dtype=float)
+        return pd.to_numeric(metrics[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    
+    @staticmethod
+    def _high_risk_checks(metrics: pd.DataFrame) -> List[Tuple[np.ndarray, np.ndarray, Callable[[float], str]]]:
+        """(mask, values, reason formatter) per criterion, in HIGH_RISK_CODES order"""
+        criteria = MYPEBusinessRules.HIGH_RISK_CRITERIA
+        column = MYPEBusinessRules._metric_column
+        
+        dpd_mean = column(metrics, 'dpd_mean', 0)
+        ltv = column(metrics, 'ltv', 0)
+        avg_dpd = column(metrics, 'avg_dpd', 0)
+        collection_rate = column(metrics, 'collection_rate', 1.0)
+        avg_risk_severity = column(metrics, 'avg_risk_severity', 0)
+        
+        # Same order and wording as classify_high_risk; NaN never trips a check
+        return [
+            (dpd_mean > criteria['dpd_threshold'], dpd_mean,
+             lambda value: f"DPD {value:.0f} days > {criteria['dpd_threshold']} threshold"),
+            (ltv > criteria['ltv_threshold'], ltv,
+             lambda value: f"LTV {value:.1f}% > {criteria['ltv_threshold']}% threshold"),
+            (avg_dpd > criteria['avg_dpd_threshold'], avg_dpd,
+             lambda value: f"Avg DPD {value:.0f} > {criteria['avg_dpd_threshold']} threshold"),
+            (collection_rate < criteria['collection_rate_threshold'], collection_rate,
+             lambda value: f"Collection rate {value*100:.1f}% < {criteria['collection_rate_threshold']*100}% threshold"),
+            (avg_risk_severity > criteria['avg_risk_severity_threshold'], avg_risk_severity,
+             lambda value: f"Risk severity {value:.2f} > {criteria['avg_risk_severity_threshold']} threshold"),
+        ]
+    
+    @staticmethod
+    def classify_high_risk_frame(metrics: pd.DataFrame) -> Tuple[pd.Series, pd.Series]:
+        """
+        Classify every row of a metrics frame at once (same result as classify_high_risk per row)
+        
+        Args:
+            metrics: DataFrame with classify_high_risk's keys as columns
+                     (dpd_mean, ltv, avg_dpd, collection_rate, avg_risk_severity);
+                     a missing column takes that key's default
+            
+        Returns:
+            (is_high_risk, reasons) Series aligned with metrics; reasons holds
+            a list per row, empty for rows that are not high-risk
+        """
+        checks = MYPEBusinessRules._high_risk_checks(metrics)
+        
+        is_high_risk = np.zeros(len(metrics), dtype=bool)
+        for mask, _, _ in checks:
+            is_high_risk |= mask
+        
+        # Reason strings are formatted for flagged rows only
+        reasons = [[] for _ in range(len(metrics))]
+        for mask, values, describe in checks:
+            for position, value in zip(np.flatnonzero(mask).tolist(), values[mask].tolist()):
+                reasons[position].append(describe(value))
+        
+        return (
+            pd.Series(is_high_risk, index=metrics.index, name='is_high_risk'),
+            pd.Series(reasons, index=metrics.index, name='high_risk_reasons', dtype=object)
+        )
+    
     @staticmethod
     def evaluate_facility_approval(
         facility_amount: float,
@@ -241,6 +339,95 @@ class MYPEBusinessRules:
             pod=pod
         )
     
+    @staticmethod
+    def evaluate_facility_approval_batch(applications: pd.DataFrame) -> pd.DataFrame:
+        """
+        Evaluate many facility applications at once (same decisions as evaluate_facility_approval)
+        
+        Args:
+            applications: DataFrame with facility_amount, collateral_value
+                          (default 0.0) and customer_metrics keys as columns
+                          (pod or default_risk_score, dpd_mean, ltv, avg_dpd,
+                          collection_rate, avg_risk_severity)
+            
+        Returns:
+            DataFrame aligned with applications: tier, approved, risk_level
+            (RiskLevel values), recommended_amount, required_collateral, pod,
+            and conditions/reasons as ApprovalCode bit masks. The message
+            texts of one row are evaluate_facility_approval's for that row
+        """
+        if 'facility_amount' not in applications.columns:
+            raise ValueError("applications need a facility_amount column")
+        rules = MYPEBusinessRules
+        column = rules._metric_column
+        amount = column(applications, 'facility_amount', np.nan)
+        collateral = column(applications, 'collateral_value', 0.0)
+        if 'pod' in applications.columns:
+            pod = column(applications, 'pod', 0.5)
+        else:
+            pod = column(applications, 'default_risk_score', 0.5)
+        
+        # Tier: first whose max_amount covers the amount, the last one catches the rest (and NaN)
+        tiers = list(rules.FACILITY_THRESHOLDS)
+        limits = [rules.FACILITY_THRESHOLDS[tier] for tier in tiers]
+        max_amounts = np.array([limit['max_amount'] for limit in limits[:-1]], dtype=float)
+        tier = np.minimum(np.searchsorted(max_amounts, amount, side='left'), len(tiers) - 1)
+        max_pod = np.array([limit['max_pod'] for limit in limits])[tier]
+        ratio = np.array([limit['min_collateral_ratio'] for limit in limits])[tier]
+        micro = tier == tiers.index('micro')
+        
+        def code(mask: np.ndarray, flag: ApprovalCode) -> np.ndarray:
+            return np.where(mask, np.int32(flag), np.int32(0))
+        
+        # Check POD threshold
+        pod_fail = pod > max_pod
+        approved = ~pod_fail
+        reasons = code(pod_fail, ApprovalCode.POD_ABOVE_MAX)
+        recommended_amount = np.where(pod_fail, 0.0, amount)
+        
+        # Check collateral requirements
+        required_collateral = amount * ratio
+        shortfall = collateral < required_collateral
+        conditions = code(shortfall & micro, ApprovalCode.COLLATERAL_SHORTFALL)
+        declined = shortfall & ~micro
+        approved &= ~declined
+        reasons |= code(declined, ApprovalCode.COLLATERAL_SHORTFALL)
+        recommended_amount = np.where(declined, collateral / ratio, recommended_amount)
+        
+        # Check high-risk classification
+        risk_codes = np.zeros(len(applications), dtype=np.int32)
+        for (mask, _, _), flag in zip(rules._high_risk_checks(applications), rules.HIGH_RISK_CODES):
+            risk_codes |= code(mask, flag)
+        high_risk = risk_codes != 0
+        approved &= ~(high_risk & ~micro)
+        reasons |= np.where(micro, 0, risk_codes)
+        conditions |= np.where(micro, risk_codes, 0)
+        conditions |= code(high_risk & micro, ApprovalCode.ENHANCED_MONITORING)
+        
+        # Additional conditions based on metrics
+        conditions |= code(column(applications, 'collection_rate', 1.0) < rules.TARGET_COLLECTION_RATE,
+                           ApprovalCode.COLLECTION_BELOW_TARGET)
+        conditions |= code(column(applications, 'dpd_mean', 0) > 30, ApprovalCode.PAYMENT_DELAYS)
+        conditions |= code(amount >= rules.EINVOICE_THRESHOLD, ApprovalCode.EINVOICE_REQUIRED)
+        
+        # Final risk level (NaN POD falls through to critical, as in the scalar rule)
+        risk_level = np.select([pod < 0.15, pod < 0.30, pod < 0.50], [0, 1, 2], default=3)
+        
+        # Success reasons
+        reasons |= code(approved, ApprovalCode.APPROVED)
+        reasons |= code(approved & (collateral >= required_collateral), ApprovalCode.ADEQUATE_COLLATERAL)
+        
+        return pd.DataFrame({
+            'tier': pd.Categorical.from_codes(tier, categories=tiers),
+            'approved': approved,
+            'risk_level': pd.Categorical.from_codes(risk_level, categories=[level.value for level in RiskLevel]),
+            'recommended_amount': recommended_amount,
+            'required_collateral': required_collateral,
+            'pod': pod,
+            'conditions': conditions,
+            'reasons': reasons
+        }, index=applications.index)
+    
     @staticmethod
     def calculate_industry_adjustment(industry: IndustryType) -> float:
         """
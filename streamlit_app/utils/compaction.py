@@ -0,0 +1,101 @@
+"""
+Frame Compaction
+Optional stage after normalization: numeric columns are downcast to the
+smallest dtype that holds every value exactly, and low-cardinality text
+columns (channel, segment, customer_type, status...) become categoricals.
+Compact frames are what gets staged, so feature jobs that join several raw
+tables from the staging cache hold a fraction of the float64/object bytes
+"""
+
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or isinstance(series.dtype, pd.StringDtype)
+
+
+class FrameCompactor:
+    """
+    Lossless dtype compaction of a normalized frame
+
+    - integers: smallest signed/unsigned width for the column's range
+    - floats: integers when every value is whole and none is null, else
+      float32 when every value round-trips through float32 exactly
+    - text: category when the column has at most max_categories distinct
+      values and they are no more than max_category_ratio of its rows
+
+    Every value keeps its numeric value, but not necessarily its type: whole
+    float columns reach the sink as ints (3 rather than 3.0), and the dtype a
+    column gets depends on the values of that load. Row deltas hash numbers
+    as float64 for that reason (delta._hash_rows).
+    """
+
+    DEFAULT_MAX_CATEGORY_RATIO = 0.5
+    DEFAULT_MAX_CATEGORIES = 4096
+
+    def __init__(self, max_category_ratio: float = DEFAULT_MAX_CATEGORY_RATIO,
+                 max_categories: int = DEFAULT_MAX_CATEGORIES):
+        self.max_category_ratio = max_category_ratio
+        self.max_categories = max_categories
+
+    @staticmethod
+    def _downcast_integers(series: pd.Series) -> pd.Series:
+        if len(series) == 0:
+            return series
+        return pd.to_numeric(series, downcast='unsigned' if series.min() >= 0 else 'integer')
+
+    def _compact_floats(self, series: pd.Series) -> pd.Series:
+        values = series.to_numpy()
+        if len(values) == 0:
+            return series
+        finite = np.isfinite(values)
+        if finite.all() and (values == np.round(values)).all() \
+                and np.iinfo(np.int64).min <= values.min() and values.max() <= np.iinfo(np.int64).max:
+            return self._downcast_integers(series.astype(np.int64))
+        narrow = values.astype(np.float32)
+        if np.array_equal(narrow.astype(values.dtype), values, equal_nan=True):
+            return pd.Series(narrow, index=series.index, name=series.name)
+        return series
+
+    def _categorize(self, series: pd.Series) -> pd.Series:
+        distinct = series.nunique(dropna=True)
+        if distinct <= self.max_categories and distinct <= len(series) * self.max_category_ratio:
+            return series.astype('category')
+        return series
+
+    def compact_column(self, series: pd.Series) -> pd.Series:
+        dtype = series.dtype
+        if pd.api.types.is_bool_dtype(dtype) or isinstance(dtype, pd.CategoricalDtype):
+            return series
+        if isinstance(dtype, np.dtype) and dtype.kind in 'iu':
+            return self._downcast_integers(series)
+        if isinstance(dtype, np.dtype) and dtype.kind == 'f':
+            return self._compact_floats(series)
+        if _is_text(series):
+            return self._categorize(series)
+        return series
+
+    def compact(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, Dict]:
+        """Compacted frame and its byte counts before/after (deep memory usage)"""
+        bytes_before = int(df.memory_usage(deep=True).sum())
+        compacted = df.copy(deep=False)
+        # By position, so duplicate column names survive
+        for position in range(len(df.columns)):
+            compacted.isetitem(position, self.compact_column(df.iloc[:, position]))
+        df = compacted
+        bytes_after = int(df.memory_usage(deep=True).sum())
+        return df, {
+            'bytes_before': bytes_before,
+            'bytes_after': bytes_after,
+            'bytes_saved': bytes_before - bytes_after
+        }
+
+    @staticmethod
+    def combine(stats) -> Dict:
+        """Sum per-sheet (or per-file) compaction stats"""
+        stats = list(stats)
+        keys = ('bytes_before', 'bytes_after', 'bytes_saved')
+        return {key: sum(entry[key] for entry in stats) for key in keys}
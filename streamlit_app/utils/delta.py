@@ -0,0 +1,163 @@
+"""
+Row-Level Delta Detection
+Hashes business keys and row content after normalization and diffs them
+against a locally cached snapshot of the previous load, so only inserted and
+updated rows are upserted and removed rows surface as tombstones
+"""
+
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Metadata stamped on every load - excluded so re-runs don't look like updates
+VOLATILE_COLUMNS = ['refresh_date']
+
+SNAPSHOT_COLUMNS = ['key_hash', 'content_hash']
+
+# Kept in snapshots next to the keys so tombstones still name their customer
+CARRIED_COLUMNS = ['customer_id']
+
+
+def _canonical(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Numbers as float64, whatever their width: hashes depend on dtype, and
+    compaction (or a chunk without nulls) narrows whole-number floats to
+    ints and others to float32 depending on the values of that load
+    """
+    numeric = [
+        col for col in df.columns
+        if pd.api.types.is_numeric_dtype(df[col].dtype) and not pd.api.types.is_bool_dtype(df[col].dtype)
+        and not isinstance(df[col].dtype, pd.CategoricalDtype)
+    ]
+    if not numeric:
+        return df
+    return df.astype({col: np.float64 for col in numeric})
+
+
+def _hash_rows(df: pd.DataFrame) -> np.ndarray:
+    return pd.util.hash_pandas_object(_canonical(df), index=False).to_numpy(dtype=np.uint64)
+
+
+class FileDelta:
+    """
+    Delta state for one source file against its previous snapshot
+
+    diff() can be called once for a whole frame or repeatedly for chunks of
+    the same file; tombstones() is valid once every chunk has been diffed.
+    """
+
+    def __init__(self, table: str, file_key: str, key_columns: List[str], previous: Optional[pd.DataFrame],
+                 fallback_key_columns: Optional[List[str]] = None):
+        self.table = table
+        self.file_key = file_key
+        self.key_columns = key_columns
+        self.fallback_key_columns = fallback_key_columns or []
+        self.previous = previous
+        self.counts = {'inserts': 0, 'updates': 0, 'unchanged_rows': 0, 'tombstones': 0}
+        self._seen: List[pd.DataFrame] = []
+
+        if previous is not None and len(previous):
+            self._previous_index = pd.Index(previous['key_hash'].to_numpy(dtype=np.uint64))
+            self._previous_content = previous['content_hash'].to_numpy(dtype=np.uint64)
+        else:
+            self._previous_index = pd.Index(np.array([], dtype=np.uint64))
+            self._previous_content = np.array([], dtype=np.uint64)
+
+    def _keys_for(self, df: pd.DataFrame) -> List[str]:
+        """Key columns, else the fallback keys, when df has them all; [] identifies rows by their full content"""
+        for keys in (self.key_columns, self.fallback_key_columns):
+            if keys and all(col in df.columns for col in keys):
+                return keys
+        return []
+
+    def diff(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Return only the inserted and updated rows of df"""
+        content_cols = [col for col in df.columns if col not in VOLATILE_COLUMNS]
+        content_hash = _hash_rows(df[content_cols])
+        keys = self._keys_for(df)
+        key_hash = _hash_rows(df[keys]) if keys else content_hash
+
+        position = self._previous_index.get_indexer(key_hash)
+        is_insert = position == -1
+        if len(self._previous_content):
+            previous_content = self._previous_content[np.where(is_insert, 0, position)]
+            is_update = ~is_insert & (previous_content != content_hash)
+        else:
+            is_update = np.zeros(len(df), dtype=bool)
+        changed = is_insert | is_update
+
+        self.counts['inserts'] += int(is_insert.sum())
+        self.counts['updates'] += int(is_update.sum())
+        self.counts['unchanged_rows'] += int(len(df) - changed.sum())
+
+        carried = keys + [col for col in CARRIED_COLUMNS if col in df.columns and col not in keys]
+        seen = df[carried].reset_index(drop=True)
+        seen['key_hash'] = key_hash
+        seen['content_hash'] = content_hash
+        self._seen.append(seen)
+
+        return df[changed]
+
+    def tombstones(self) -> pd.DataFrame:
+        """Previous rows whose key no longer appears in the file"""
+        if self.previous is None or not len(self.previous):
+            return pd.DataFrame(columns=self.key_columns)
+        seen_keys = np.concatenate([s['key_hash'].to_numpy() for s in self._seen]) if self._seen else []
+        removed = self.previous[~self.previous['key_hash'].isin(seen_keys)]
+        self.counts['tombstones'] = len(removed)
+        return removed.drop(columns=SNAPSHOT_COLUMNS)
+
+    def snapshot(self) -> pd.DataFrame:
+        """Key values and hashes of the current load, one row per key"""
+        if not self._seen:
+            return pd.DataFrame(columns=SNAPSHOT_COLUMNS)
+        current = pd.concat(self._seen, ignore_index=True)
+        return current.drop_duplicates(subset='key_hash', keep='last')
+
+
+class RowDeltaStore:
+    """
+    On-disk snapshots of the last successful load, one per table and source file
+
+    key_columns maps table name -> business key columns (e.g. BUSINESS_KEYS).
+    preferred_key_columns (e.g. upsert conflict keys) are used instead for
+    frames that have all of them; a frame missing any keeps its business keys.
+    A table without keys, or a frame missing any key column, is diffed on full
+    row content: changed rows then show up as an insert plus a tombstone.
+    """
+
+    def __init__(self, snapshot_dir, key_columns: Optional[Dict[str, List[str]]] = None,
+                 preferred_key_columns: Optional[Dict[str, List[str]]] = None):
+        self.snapshot_dir = Path(snapshot_dir)
+        self.key_columns = key_columns or {}
+        self.preferred_key_columns = preferred_key_columns or {}
+
+    def _path(self, table: str, file_key: str) -> Path:
+        safe_key = re.sub(r'[^A-Za-z0-9_.-]', '_', file_key)
+        return self.snapshot_dir / table / f'{safe_key}.pkl'
+
+    def open(self, table: str, file_key: str) -> FileDelta:
+        path = self._path(table, file_key)
+        previous = pd.read_pickle(path) if path.exists() else None
+        business_keys = self.key_columns.get(table, [])
+        preferred_keys = self.preferred_key_columns.get(table)
+        if preferred_keys:
+            return FileDelta(table, file_key, preferred_keys, previous, business_keys)
+        return FileDelta(table, file_key, business_keys, previous)
+
+    def diff(self, table: str, file_key: str, df: pd.DataFrame) -> Tuple[FileDelta, pd.DataFrame, pd.DataFrame]:
+        """One-shot diff: (delta, changed rows, tombstones)"""
+        delta = self.open(table, file_key)
+        changed = delta.diff(df)
+        return delta, changed, delta.tombstones()
+
+    def save(self, delta: FileDelta) -> None:
+        """Persist the current load as the baseline for the next diff"""
+        path = self._path(delta.table, delta.file_key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        delta.snapshot().to_pickle(tmp_path)
+        tmp_path.replace(path)
@@ -0,0 +1,70 @@
+"""
+Dirty Customer Set
+Which customer_ids an ingestion run touched, per raw table: every row it
+upserted (after row deltas) and every row a delta found removed. The feature
+builder recomputes snapshots for these customers only, so a daily refresh
+costs in proportion to what changed rather than to the portfolio
+"""
+
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+import pandas as pd
+
+
+class DirtyCustomerSet:
+    """
+    Touched customer ids keyed by raw table
+    add() is called from upsert-writer callbacks, so it is thread-safe.
+    """
+
+    def __init__(self, touched: Dict[str, Iterable] = None):
+        self._lock = threading.Lock()
+        self._tables: Dict[str, set] = {}
+        for table, ids in (touched or {}).items():
+            self.add(table, ids)
+
+    @staticmethod
+    def ids_of(df: pd.DataFrame) -> np.ndarray:
+        """Distinct non-null customer ids of a frame, as strings"""
+        if df is None or df.empty or 'customer_id' not in df.columns:
+            return np.array([], dtype=object)
+        return pd.unique(df['customer_id'].dropna().astype(str).to_numpy(dtype=object))
+
+    def add(self, table: str, ids: Iterable) -> None:
+        ids = [str(customer_id) for customer_id in ids]
+        if not ids:
+            return
+        with self._lock:
+            self._tables.setdefault(table, set()).update(ids)
+
+    def update(self, other: 'DirtyCustomerSet') -> None:
+        """Fold another set in (e.g. a previous run whose features were not rebuilt)"""
+        for table, ids in other.to_dict().items():
+            self.add(table, ids)
+
+    def tables(self) -> List[str]:
+        with self._lock:
+            return sorted(table for table, ids in self._tables.items() if ids)
+
+    def customers(self) -> List[str]:
+        """Sorted union across tables"""
+        with self._lock:
+            return sorted(set().union(*self._tables.values()))
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            return {table: len(ids) for table, ids in sorted(self._tables.items())}
+
+    def to_dict(self) -> Dict[str, List[str]]:
+        """JSON-ready: sorted ids per table"""
+        with self._lock:
+            return {table: sorted(ids) for table, ids in sorted(self._tables.items())}
+
+    def __len__(self) -> int:
+        return len(self.customers())
+
+    def __bool__(self) -> bool:
+        with self._lock:
+            return any(self._tables.values())
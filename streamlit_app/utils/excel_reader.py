@@ -0,0 +1,78 @@
+"""
+Excel Reader Backends
+Picks the fastest installed pd.read_excel engine (calamine via python-calamine,
+else openpyxl) and can prune workbooks to the columns ingestion actually uses
+"""
+
+import time
+from typing import Callable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from .fast_normalize import FastNormalizer
+
+try:
+    import python_calamine  # noqa: F401
+    CALAMINE_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    CALAMINE_AVAILABLE = False
+
+# Fastest first; openpyxl ships with the requirements and is always the fallback
+EXCEL_ENGINES = ['calamine', 'openpyxl']
+
+
+def available_engines() -> list:
+    return [engine for engine in EXCEL_ENGINES if engine != 'calamine' or CALAMINE_AVAILABLE]
+
+
+def select_excel_engine(preferred: Optional[str] = None) -> str:
+    """preferred when it is installed, else the fastest available engine"""
+    engines = available_engines()
+    if preferred in engines:
+        return preferred
+    return engines[0]
+
+
+class ExcelReader:
+    """
+    pd.read_excel with engine selection and header-based column pruning
+
+    Columns are matched on their normalized names (lowercase/underscore), so
+    'Customer ID' in the workbook matches 'customer_id' in REQUIRED_COLUMNS.
+    Pruned columns are never converted into Python objects, which is most of
+    the cost of wide exports.
+    """
+
+    def __init__(self, engine: Optional[str] = None):
+        self.engine = select_excel_engine(engine)
+
+    @staticmethod
+    def column_filter(columns: Iterable[str]) -> Callable[[str], bool]:
+        wanted = set(columns)
+        return lambda col: FastNormalizer.normalize_column_name(col) in wanted
+
+    def open(self, fh) -> pd.ExcelFile:
+        """Open a workbook once so several sheets can be parsed from it"""
+        try:
+            return pd.ExcelFile(fh, engine=self.engine)
+        except ImportError:
+            if self.engine == 'openpyxl':
+                raise
+            # Engine importable at startup but rejected by this pandas version
+            self.engine = 'openpyxl'
+            fh.seek(0)
+            return pd.ExcelFile(fh, engine=self.engine)
+
+    def parse(self, book: pd.ExcelFile, sheet_name=0, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        usecols = self.column_filter(columns) if columns else None
+        return book.parse(sheet_name, usecols=usecols)
+
+    def read(self, fh, columns: Optional[Iterable[str]] = None, sheet_name=0) -> pd.DataFrame:
+        with self.open(fh) as book:
+            return self.parse(book, sheet_name, columns)
+
+    def timed_read(self, fh, columns: Optional[Iterable[str]] = None, sheet_name=0) -> Tuple[pd.DataFrame, float]:
+        """(frame, seconds spent parsing)"""
+        started = time.perf_counter()
+        df = self.read(fh, columns, sheet_name)
+        return df, time.perf_counter() - started
@@ -0,0 +1,700 @@
+"""
+Feature Snapshot Builder
+Materializes ml_feature_snapshots from the raw_* tables in Python: every raw
+table is grouped once per customer with vectorized groupbys, the per-customer
+aggregates are joined on one customer index and FeatureEngineer's frame
+methods derive segments, DPD buckets and utilization. The result is
+bulk-written through an ingestion sink, replacing the placeholder
+refresh_ml_features() SQL function. After a first full build, refresh()
+recomputes only the customers an ingestion run touched (DirtyCustomerSet)
+and re-applies z-scores from running moments (ZScoreMoments). build(workers=N)
+hash-partitions the raw tables by customer_id and aggregates the partitions
+in a process pool over Arrow IPC files
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .feature_engineering import FeatureEngineer
+from .ingestion import DataIngestionEngine
+from .sinks import IngestionSink
+from .streaming_stats import RunningMoments
+from .staging_cache import ParquetStagingCache
+from .upsert_writer import BatchUpsertWriter
+
+try:
+    import pyarrow
+    import pyarrow.feather  # Arrow IPC partitions for build(workers=N)
+    import pyarrow.parquet  # customer filters pushed into staged Parquet reads
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PYARROW_AVAILABLE = False
+
+# tmpfs where available and large enough, so partitions handed to workers never touch disk
+SHARED_MEMORY_DIR = '/dev/shm'
+
+
+def _numeric(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors='coerce').astype(float)
+
+
+def _first_column(df: pd.DataFrame, candidates) -> Optional[str]:
+    return next((column for column in candidates if column in df.columns), None)
+
+
+class ZScoreMoments:
+    """
+    Running moments per z-score metric (streaming_stats.RunningMoments)
+    Customers are added and retracted as they are recomputed; mean and std
+    then match pandas' mean()/std() (ddof=1, NaN skipped) over the current
+    population.
+    """
+
+    def __init__(self, moments: Dict[str, RunningMoments]):
+        self.metrics = list(moments)
+        self.moments = dict(moments)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, metrics: List[str]) -> 'ZScoreMoments':
+        return cls({metric: RunningMoments.from_values(df[metric]) for metric in metrics})
+
+    def add(self, df: pd.DataFrame) -> None:
+        for metric in self.metrics:
+            self.moments[metric] = self.moments[metric].update(df[metric])
+
+    def merge(self, other: 'ZScoreMoments') -> 'ZScoreMoments':
+        """Moments of both populations, e.g. of two customer partitions"""
+        return ZScoreMoments({metric: self.moments[metric].merge(other.moments[metric]) for metric in self.metrics})
+
+    def remove(self, df: pd.DataFrame) -> None:
+        """Retract rows previously added (their stored metric values)"""
+        for metric in self.metrics:
+            self.moments[metric] = self.moments[metric].subtract(RunningMoments.from_values(df[metric]))
+
+    def mean(self, metric: str) -> float:
+        return self.moments[metric].mean_or_nan()
+
+    def std(self, metric: str) -> float:
+        return self.moments[metric].std()
+
+    def zscores(self, df: pd.DataFrame, engineer: Optional[FeatureEngineer] = None) -> pd.DataFrame:
+        """calculate_z_scores columns for df against the running population"""
+        engineer = engineer or FeatureEngineer()
+        zscores = engineer.calculate_z_scores(df[self.metrics].astype(float), self.metrics, self.moments)
+        return zscores[[f'{metric}_zscore' for metric in self.metrics]]
+
+    def to_dict(self) -> Dict:
+        return {metric: moments.to_dict() for metric, moments in self.moments.items()}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'ZScoreMoments':
+        return cls({metric: RunningMoments.from_dict(moments) for metric, moments in state.items()})
+
+
+class FeatureSnapshotBuilder:
+    """
+    One ml_feature_snapshots row per customer seen in any raw table
+
+    Aggregates (customers without rows in a table get 0 sums/counts):
+    - balances: total_balance is the balance at the customer's latest portfolio
+      date; avg_balance/max_balance span every portfolio row
+    - facilities: total_limit, num_facilities; utilization = total_balance /
+      total_limit capped at 1 (calculate_utilization_frame)
+    - payments: total/avg/num_payments; payment_ratio = total_payments /
+      avg_balance capped at 1
+    - risk events: calculate_dpd_statistics per customer (0 without events);
+      dpd_bucket and is_delinquent from the latest event's DPD
+    - revenue, collections: totals; collection_rate = total_collected /
+      total_payments capped at 1 (NULL without payments)
+    - marketing: channel and date of the earliest acquisition, customer_age_months
+
+    Scores (0-1): activity_score falls linearly to 0 after INACTIVITY_MONTHS
+    without a payment; churn_risk_score blends inactivity with the unpaid share
+    of the balance; default_risk_score blends dpd_mean / 90, utilization and the
+    uncollected share. ltv is the loan-to-value proxy the risk dashboard uses
+    (utilization %), profitability_score the revenue net of expected loss per
+    unit of average balance, clipped to its column's range.
+
+    Incremental refresh: build() keeps the population's ZScoreMoments;
+    refresh() recomputes the touched customers from their raw rows only,
+    swaps their metrics in the moments and re-applies z-scores to everyone.
+    Untouched rows are only rewritten when one of their z-scores moved by more
+    than ZSCORE_TOLERANCE; their as-of columns (customer_age_months,
+    activity/churn scores, feature_snapshot_date) stay as of their last
+    recompute.
+    """
+
+    TABLE = 'ml_feature_snapshots'
+
+    # Every data column of ml_feature_snapshots, in schema order
+    SNAPSHOT_COLUMNS = [
+        'customer_id', 'name', 'customer_type', 'is_b2g', 'segment',
+        'total_balance', 'avg_balance', 'max_balance',
+        'total_limit', 'num_facilities', 'utilization',
+        'total_payments', 'avg_payment', 'num_payments', 'payment_ratio',
+        'dpd_max', 'dpd_mean', 'dpd_median', 'dpd_std', 'dpd_bucket', 'is_delinquent',
+        'total_revenue', 'avg_revenue',
+        'total_collected', 'collection_rate',
+        'channel', 'acquisition_date', 'customer_age_months',
+        'industry_code',
+        'total_balance_zscore', 'utilization_zscore', 'dpd_mean_zscore',
+        'payment_ratio_zscore', 'total_revenue_zscore',
+        'ltv', 'churn_risk_score', 'default_risk_score', 'activity_score', 'profitability_score',
+        'feature_snapshot_date'
+    ]
+
+    ZSCORE_METRICS = ['total_balance', 'utilization', 'dpd_mean', 'payment_ratio', 'total_revenue']
+
+    # Date column per raw table: the schema name first, then the ingestion REQUIRED_COLUMNS one
+    DATE_COLUMNS = {
+        'raw_portfolios': ('date',),
+        'raw_payments': ('payment_date', 'date'),
+        'raw_risk_events': ('event_date', 'date'),
+        'raw_revenue': ('revenue_date', 'date'),
+        'raw_collections': ('collection_date', 'date'),
+        'raw_marketing': ('acquisition_date',)
+    }
+
+    ZSCORE_TOLERANCE = 0.01
+
+    INACTIVITY_MONTHS = 6
+    DELINQUENCY_DAYS = 90
+    DAYS_PER_MONTH = 30.4375
+
+    # profitability_score is NUMERIC(10,4): an unbounded ratio (tiny avg_balance) would fail its upsert batch
+    PROFITABILITY_LIMIT = 999_999.9999
+
+    # NUMERIC scales of the snapshot columns
+    MONEY_COLUMNS = ['total_balance', 'avg_balance', 'max_balance', 'total_limit', 'total_payments', 'avg_payment',
+                     'total_revenue', 'avg_revenue', 'total_collected', 'ltv', 'dpd_mean', 'dpd_median', 'dpd_std',
+                     'customer_age_months']
+    RATIO_COLUMNS = ['utilization', 'payment_ratio', 'collection_rate', 'churn_risk_score', 'default_risk_score',
+                     'activity_score', 'profitability_score']
+    ZSCORE_COLUMNS = [f'{metric}_zscore' for metric in ZSCORE_METRICS]
+
+    # Files of a saved state: the snapshots as written and their z-score moments
+    STATE_SNAPSHOTS = 'snapshots.parquet'
+    STATE_MOMENTS = 'moments.json'
+
+    def __init__(self, feature_engineer: Optional[FeatureEngineer] = None, as_of: Optional[datetime] = None,
+                 partition_dir: Optional[str] = None):
+        """
+        partition_dir holds the partitions of build(workers=N); by default
+        SHARED_MEMORY_DIR when it has room for them, else the system temp dir
+        """
+        self.feature_engineer = feature_engineer or FeatureEngineer()
+        self.as_of = pd.Timestamp(as_of or datetime.now())
+        self.partition_dir = partition_dir
+        self.moments: Optional[ZScoreMoments] = None
+
+    # ------------------------------------------------------------------ inputs
+
+    @staticmethod
+    def load_staged_tables(staging_dir, customers: Optional[Iterable] = None) -> Dict[str, pd.DataFrame]:
+        """
+        raw_* frames rebuilt from the Parquet staging cache
+        Files are stacked oldest first and deduplicated on the table's business
+        keys (last wins), as the upserts resolved them. With customers, only
+        their rows are read (filtered per file, before stacking)
+        """
+        cache = ParquetStagingCache(staging_dir)
+        parts: Dict[str, List] = {}
+        for path, metadata in cache.entries():
+            table = DataIngestionEngine.TABLE_NAMES.get(metadata.get('source_type'))
+            if table:
+                parts.setdefault(table, []).append((metadata.get('modifiedTime') or '', path))
+
+        if customers is not None:
+            customers = customers if isinstance(customers, pd.Index) else pd.Index(list(customers), dtype=object)
+        tables = {}
+        for table, paths in parts.items():
+            if customers is None:
+                frames = [pd.read_parquet(path) for _, path in sorted(paths)]
+            else:
+                frames = [FeatureSnapshotBuilder.read_customer_rows(path, customers) for _, path in sorted(paths)]
+            df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+            keys = DataIngestionEngine.BUSINESS_KEYS.get(table, [])
+            if keys and all(key in df.columns for key in keys):
+                df = df.drop_duplicates(subset=keys, keep='last', ignore_index=True)
+            tables[table] = df
+        return tables
+
+    @staticmethod
+    def read_customer_rows(path, customers: pd.Index) -> pd.DataFrame:
+        """
+        customer_rows of a Parquet file, with the filter pushed into the read
+        so row groups without those customers are skipped. Non-text ids
+        (filtered on their string form) and files read without pyarrow are
+        read whole and filtered in memory
+        """
+        if not PYARROW_AVAILABLE:
+            return FeatureSnapshotBuilder.customer_rows(pd.read_parquet(path), customers)
+        schema = pyarrow.parquet.read_schema(path)
+        if 'customer_id' not in schema.names or not len(customers):
+            return schema.empty_table().to_pandas()
+        id_type = schema.field('customer_id').type
+        if pyarrow.types.is_dictionary(id_type):
+            id_type = id_type.value_type
+        if not (pyarrow.types.is_string(id_type) or pyarrow.types.is_large_string(id_type)):
+            return FeatureSnapshotBuilder.customer_rows(pd.read_parquet(path), customers)
+        return pd.read_parquet(path, filters=[('customer_id', 'in', customers.astype(str).tolist())])
+
+    @staticmethod
+    def customer_rows(df: pd.DataFrame, customers: Iterable) -> pd.DataFrame:
+        """Rows of a raw frame that belong to customers"""
+        if 'customer_id' not in df.columns:
+            return df.iloc[:0]
+        wanted = customers if isinstance(customers, pd.Index) else pd.Index(list(customers), dtype=object)
+        return df[df['customer_id'].astype(str).isin(wanted)]
+
+    @staticmethod
+    def customer_index(tables: Dict[str, pd.DataFrame]) -> pd.Index:
+        """Sorted customer ids across every raw table"""
+        ids = [
+            pd.unique(df['customer_id'].dropna().astype(str))
+            for df in tables.values() if df is not None and 'customer_id' in df.columns
+        ]
+        if not ids:
+            return pd.Index([], dtype=object, name='customer_id')
+        return pd.Index(np.sort(pd.unique(np.concatenate(ids).astype(object))), name='customer_id')
+
+    # ------------------------------------------------------------------ grouping
+
+    @staticmethod
+    def _rows(tables: Dict[str, pd.DataFrame], table: str, customers: pd.Index) -> Optional[pd.DataFrame]:
+        """Rows of a raw table with their position in the customer index (_customer)"""
+        df = tables.get(table)
+        if df is None or df.empty or 'customer_id' not in df.columns:
+            return None
+        df = df[df['customer_id'].notna()]
+        return df.assign(_customer=customers.get_indexer(df['customer_id'].astype(str)))
+
+    def _date(self, df: pd.DataFrame, table: str) -> Optional[pd.Series]:
+        column = _first_column(df, self.DATE_COLUMNS.get(table, ()))
+        return pd.to_datetime(df[column], errors='coerce') if column else None
+
+    @staticmethod
+    def _aggregate(values: pd.Series, groups: pd.Series, size: int, how) -> pd.DataFrame:
+        """groupby(customer).agg(how), one row per customer position"""
+        return values.groupby(groups.to_numpy(), sort=False).agg(how).reindex(range(size))
+
+    @staticmethod
+    def _latest(df: pd.DataFrame, dates: Optional[pd.Series], first: bool = False) -> pd.DataFrame:
+        """The latest (or earliest) row per customer, undated rows ranking lowest"""
+        if dates is not None:
+            df = df.assign(_date=dates).sort_values('_date', kind='stable', na_position='last' if first else 'first')
+        return df.drop_duplicates(subset='_customer', keep='first' if first else 'last').set_index('_customer')
+
+    def _balances(self, features: pd.DataFrame, tables, customers) -> None:
+        df = self._rows(tables, 'raw_portfolios', customers)
+        size = len(customers)
+        if df is None:
+            features[['total_balance', 'avg_balance', 'max_balance']] = [0.0, np.nan, np.nan]
+            return
+        balance = _numeric(df, 'balance')
+        stats = self._aggregate(balance, df['_customer'], size, ['mean', 'max'])
+        dates = self._date(df, 'raw_portfolios')
+        if dates is not None:
+            latest = dates.groupby(df['_customer'].to_numpy()).transform('max')
+            balance = balance[(dates == latest) | latest.isna()]
+        total = balance.groupby(df.loc[balance.index, '_customer'].to_numpy()).sum().reindex(range(size))
+        features['total_balance'] = total.fillna(0).to_numpy()
+        features['avg_balance'] = stats['mean'].to_numpy()
+        features['max_balance'] = stats['max'].to_numpy()
+
+    def _facilities(self, features: pd.DataFrame, tables, customers) -> None:
+        df = self._rows(tables, 'raw_facilities', customers)
+        if df is None:
+            features['total_limit'], features['num_facilities'] = 0.0, 0
+            return
+        limit_column = _first_column(df, ('limit_amount', 'limit'))
+        limits = _numeric(df, limit_column) if limit_column else pd.Series(np.nan, index=df.index)
+        size = len(customers)
+        features['total_limit'] = self._aggregate(limits, df['_customer'], size, 'sum').fillna(0).to_numpy()
+        facilities = df['facility_id'] if 'facility_id' in df.columns else pd.Series(df.index, index=df.index)
+        features['num_facilities'] = self._aggregate(facilities, df['_customer'], size, 'nunique').fillna(0).astype(int).to_numpy()
+
+    def _payments(self, features: pd.DataFrame, tables, customers) -> None:
+        df = self._rows(tables, 'raw_payments', customers)
+        size = len(customers)
+        if df is None:
+            features['total_payments'], features['avg_payment'], features['num_payments'] = 0.0, np.nan, 0
+            features['last_payment_date'] = pd.NaT
+            return
+        stats = self._aggregate(_numeric(df, 'amount'), df['_customer'], size, ['sum', 'mean', 'count'])
+        features['total_payments'] = stats['sum'].fillna(0).to_numpy()
+        features['avg_payment'] = stats['mean'].to_numpy()
+        features['num_payments'] = stats['count'].fillna(0).astype(int).to_numpy()
+        dates = self._date(df, 'raw_payments')
+        features['last_payment_date'] = (
+            self._aggregate(dates, df['_customer'], size, 'max').to_numpy() if dates is not None else pd.NaT
+        )
+
+    def _delinquency(self, features: pd.DataFrame, tables, customers) -> None:
+        df = self._rows(tables, 'raw_risk_events', customers)
+        size = len(customers)
+        if df is None or 'dpd' not in df.columns:
+            features[['dpd_max', 'dpd_mean', 'dpd_median', 'dpd_std']] = 0.0
+            features['current_dpd'] = 0.0
+            return
+        dpd = _numeric(df, 'dpd')
+        # Same statistics as calculate_dpd_statistics per customer; no events -> 0
+        stats = self._aggregate(dpd, df['_customer'], size, ['max', 'mean', 'median', 'std'])
+        has_events = self._aggregate(dpd, df['_customer'], size, 'size').notna().to_numpy()
+        for stat in ('max', 'mean', 'median', 'std'):
+            features[f'dpd_{stat}'] = np.where(has_events, stats[stat].to_numpy(), 0.0)
+        latest = self._latest(df.assign(_dpd=dpd), self._date(df, 'raw_risk_events'))
+        features['current_dpd'] = latest['_dpd'].reindex(range(size)).fillna(0).to_numpy()
+
+    def _revenue_and_collections(self, features: pd.DataFrame, tables, customers) -> None:
+        size = len(customers)
+        df = self._rows(tables, 'raw_revenue', customers)
+        if df is None:
+            features['total_revenue'], features['avg_revenue'] = 0.0, np.nan
+        else:
+            stats = self._aggregate(_numeric(df, 'revenue'), df['_customer'], size, ['sum', 'mean'])
+            features['total_revenue'] = stats['sum'].fillna(0).to_numpy()
+            features['avg_revenue'] = stats['mean'].to_numpy()
+
+        df = self._rows(tables, 'raw_collections', customers)
+        features['total_collected'] = 0.0 if df is None else self._aggregate(
+            _numeric(df, 'collected_amount'), df['_customer'], size, 'sum'
+        ).fillna(0).to_numpy()
+
+    def _profile(self, features: pd.DataFrame, tables, customers) -> None:
+        """Name, type, industry and acquisition columns (one row per customer)"""
+        size = len(customers)
+        for column in ('name', 'customer_type', 'industry_code', 'channel'):
+            features[column] = None
+        features['acquisition_date'] = pd.NaT
+
+        df = self._rows(tables, 'raw_customers', customers)
+        if df is not None:
+            latest = self._latest(df, None).reindex(range(size))
+            for column in ('name', 'customer_type', 'industry_code'):
+                if column in latest.columns:
+                    features[column] = latest[column].astype(object).to_numpy()
+
+        df = self._rows(tables, 'raw_industry', customers)
+        if df is not None and 'industry_code' in df.columns:
+            codes = self._latest(df, None)['industry_code'].reindex(range(size)).astype(object).to_numpy()
+            features['industry_code'] = features['industry_code'].where(features['industry_code'].notna(), codes)
+
+        df = self._rows(tables, 'raw_marketing', customers)
+        if df is not None:
+            dates = self._date(df, 'raw_marketing')
+            earliest = self._latest(df, dates, first=True).reindex(range(size))
+            if 'channel' in earliest.columns:
+                features['channel'] = earliest['channel'].astype(object).to_numpy()
+            if dates is not None:
+                features['acquisition_date'] = pd.to_datetime(earliest['_date']).to_numpy()
+
+    # ------------------------------------------------------------------ build
+
+    def _features(self, tables: Dict[str, pd.DataFrame], customers: pd.Index) -> pd.DataFrame:
+        """Every snapshot column but the z-scores, one row per customer of the index"""
+        engineer = self.feature_engineer
+        features = pd.DataFrame({'customer_id': customers.to_numpy()})
+
+        self._balances(features, tables, customers)
+        self._facilities(features, tables, customers)
+        self._payments(features, tables, customers)
+        self._delinquency(features, tables, customers)
+        self._revenue_and_collections(features, tables, customers)
+        self._profile(features, tables, customers)
+
+        # Ratios capped at 1, 0 without a denominator - the calculate_utilization contract
+        features['utilization'] = engineer.calculate_utilization_frame(features, 'total_balance', 'total_limit')
+        features['payment_ratio'] = engineer.calculate_utilization_frame(features, 'total_payments', 'avg_balance')
+        features['collection_rate'] = engineer.calculate_utilization_frame(
+            features, 'total_collected', 'total_payments'
+        ).where(features['total_payments'] > 0)
+
+        # Classification and segmentation
+        known_type = features['customer_type'].isin(list(engineer.CUSTOMER_TYPES))
+        if not known_type.all():
+            named = features.assign(name=features['name'].fillna(''))
+            features['customer_type'] = features['customer_type'].where(
+                known_type, engineer.classify_customer_type_frame(named, 'name')
+            )
+        features['is_b2g'] = (features['customer_type'] == 'B2G').astype(int)
+        features['segment'] = engineer.calculate_segmentation_frame(
+            features[['dpd_mean', 'utilization', 'payment_ratio']].rename(columns={'dpd_mean': 'avg_dpd'})
+        )
+        features['dpd_bucket'] = engineer.bucket_dpd_frame(features, 'current_dpd')
+        features['is_delinquent'] = (features['dpd_bucket'] != engineer.DPD_LABELS[0]).astype(int)
+
+        # Tenure and activity
+        as_of = self.as_of
+        features['customer_age_months'] = (as_of - features['acquisition_date']).dt.days / self.DAYS_PER_MONTH
+        months_inactive = ((as_of - features['last_payment_date']).dt.days / self.DAYS_PER_MONTH).fillna(self.INACTIVITY_MONTHS)
+        inactivity = (months_inactive / self.INACTIVITY_MONTHS).clip(0, 1)
+
+        # Scores
+        delinquency = (features['dpd_mean'] / self.DELINQUENCY_DAYS).clip(0, 1)
+        uncollected = 1 - features['collection_rate'].fillna(1)
+        features['activity_score'] = 1 - inactivity
+        features['churn_risk_score'] = (0.6 * inactivity + 0.4 * (1 - features['payment_ratio'])).clip(0, 1)
+        features['default_risk_score'] = (
+            0.5 * delinquency + 0.25 * features['utilization'] + 0.25 * uncollected
+        ).clip(0, 1)
+        features['ltv'] = features['utilization'] * 100
+        expected_loss = features['default_risk_score'] * features['total_balance']
+        avg_balance = features['avg_balance']
+        features['profitability_score'] = np.where(
+            avg_balance > 0, (features['total_revenue'] - expected_loss) / avg_balance.where(avg_balance > 0, 1), 0.0
+        ).clip(-self.PROFITABILITY_LIMIT, self.PROFITABILITY_LIMIT)
+
+        features['feature_snapshot_date'] = as_of
+        features[self.MONEY_COLUMNS] = features[self.MONEY_COLUMNS].round(2)
+        features[self.RATIO_COLUMNS] = features[self.RATIO_COLUMNS].round(4)
+        features['dpd_max'] = features['dpd_max'].round().astype('Int64')
+        return features
+
+    def _apply_zscores(self, features: pd.DataFrame) -> pd.DataFrame:
+        """
+        Z-score columns from self.moments
+        The moments hold the metrics as stored (rounded), so retracting a
+        customer's stored row later cancels exactly what was added
+        """
+        features[self.ZSCORE_COLUMNS] = self.moments.zscores(features, self.feature_engineer).round(4)
+        return features
+
+    def build(self, tables: Dict[str, pd.DataFrame], workers: int = 1,
+              partitions: Optional[int] = None) -> pd.DataFrame:
+        """
+        Snapshot frame with SNAPSHOT_COLUMNS, one row per customer; resets self.moments
+        With workers > 1 the aggregation runs per customer_id hash partition
+        (default: 2 per worker) in a process pool; the result is the same
+        """
+        if workers > 1:
+            features, self.moments = self._build_partitioned(tables, workers, partitions or 2 * workers)
+        else:
+            features = self._features(tables, self.customer_index(tables))
+            self.moments = ZScoreMoments.from_frame(features, self.ZSCORE_METRICS)
+        return self._apply_zscores(features)[self.SNAPSHOT_COLUMNS]
+
+    # ------------------------------------------------------------------ partitioned build
+
+    @staticmethod
+    def customer_partition(customer_ids: pd.Series, partitions: int) -> np.ndarray:
+        """Stable hash partition of each id (the same id always lands in the same partition)"""
+        codes, uniques = pd.factorize(customer_ids)
+        # Hash each distinct id once; raw tables repeat an id on many rows
+        hashes = pd.util.hash_array(pd.Index(uniques).astype(str).to_numpy(dtype=object))
+        return (hashes % np.uint64(partitions)).astype(np.int64)[codes]
+
+    def partition_rows(self, tables: Dict[str, pd.DataFrame], partitions: int) -> Dict[str, np.ndarray]:
+        """
+        Partition of every row of every raw table (-1 where customer_id is null)
+        Ids are factorized across all tables first, so each distinct id is hashed
+        once. Selecting a partition's rows keeps their relative order, so
+        per-customer latest/earliest picks match the unpartitioned build
+        """
+        keyed = {table: df['customer_id'] for table, df in tables.items()
+                 if df is not None and 'customer_id' in df.columns}
+        if not keyed:
+            return {}
+        codes, uniques = pd.factorize(pd.concat(list(keyed.values()), ignore_index=True))
+        # Null ids factorize to code -1, which picks the appended -1
+        assignment = np.append(self.customer_partition(pd.Series(uniques, dtype=object), partitions), -1)
+        rows = assignment[codes]
+        bounds = np.cumsum([0] + [len(ids) for ids in keyed.values()])
+        return {table: rows[bounds[index]:bounds[index + 1]] for index, table in enumerate(keyed)}
+
+    def _partition_parent(self, tables: Dict[str, pd.DataFrame]) -> Optional[str]:
+        """partition_dir, else SHARED_MEMORY_DIR if its free space exceeds the tables' size, else None (temp dir)"""
+        if self.partition_dir is not None:
+            return self.partition_dir
+        if not os.path.isdir(SHARED_MEMORY_DIR):
+            return None
+        # In-memory size plus the int64 partition of every row; the Arrow files are about as large
+        needed = sum(int(df.memory_usage(deep=True).sum()) + 8 * len(df) for df in tables.values() if df is not None)
+        return SHARED_MEMORY_DIR if shutil.disk_usage(SHARED_MEMORY_DIR).free > needed else None
+
+    def _build_partitioned(self, tables: Dict[str, pd.DataFrame], workers: int,
+                           partitions: int) -> Tuple[pd.DataFrame, 'ZScoreMoments']:
+        """
+        Aggregate hash partitions in worker processes and merge features and moments
+        Each table is written once to the partition directory with the partition
+        of every row; workers memory-map it and take their own rows, so the
+        parent does not copy partitions out serially. If shared memory fills up
+        anyway (other tenants, the estimate missing), the build reruns in the
+        temp dir
+        """
+        parent = self._partition_parent(tables)
+        try:
+            return self._build_partitions_in(parent, tables, workers, partitions)
+        except OSError:
+            if self.partition_dir is not None or parent is None:
+                raise
+            return self._build_partitions_in(None, tables, workers, partitions)
+
+    def _build_partitions_in(self, parent: Optional[str], tables: Dict[str, pd.DataFrame], workers: int,
+                             partitions: int) -> Tuple[pd.DataFrame, 'ZScoreMoments']:
+        with tempfile.TemporaryDirectory(prefix='feature-partitions-', dir=parent) as directory:
+            inputs = {}
+            for table, partition in self.partition_rows(tables, partitions).items():
+                rows_path = Path(directory) / f'{table}-partition.npy'
+                np.save(rows_path, partition)
+                inputs[table] = (_save_frame(tables[table], Path(directory) / table), str(rows_path))
+            jobs = [(inputs, index, str(Path(directory) / f'features-{index}')) for index in range(partitions)]
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(
+                    _features_in_worker, jobs, [self.feature_engineer] * len(jobs), [self.as_of] * len(jobs)
+                ))
+            features = pd.concat([_load_frame(path) for path, _ in results], ignore_index=True)
+        moments = None
+        for _, partial in results:
+            partial = ZScoreMoments.from_dict(partial)
+            moments = partial if moments is None else moments.merge(partial)
+        features = features.sort_values('customer_id', kind='stable', ignore_index=True)
+        return features, moments
+
+    def refresh(self, tables: Dict[str, pd.DataFrame], snapshots: pd.DataFrame,
+                customers: Iterable, zscore_tolerance: float = ZSCORE_TOLERANCE) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """
+        Recompute only customers against the snapshots of the last build/refresh
+        tables may be full or already narrowed to customers (load_staged_tables).
+        Returns (snapshots, changed): the full table as it stands once changed
+        is written - the recomputed customers plus untouched rows whose
+        z-scores drifted past zscore_tolerance. Customers left without any raw
+        row drop out of snapshots and the moments (sinks do not delete rows)
+        """
+        if self.moments is None:
+            raise ValueError("refresh needs the moments of a previous build (build() or load_state())")
+        dirty = pd.Index(sorted({str(customer_id) for customer_id in customers}), dtype=object)
+        previous = snapshots.assign(customer_id=snapshots['customer_id'].astype(str)).set_index('customer_id')
+        if dirty.empty:
+            return snapshots, snapshots.iloc[:0]
+
+        subset = {table: self.customer_rows(df, dirty) for table, df in tables.items() if df is not None}
+        fresh = self._features(subset, self.customer_index(subset))
+
+        retracted = previous.index.isin(dirty)
+        self.moments.remove(previous.loc[retracted])
+        self.moments.add(fresh)
+
+        kept = previous.loc[~retracted].reset_index()
+        stored = kept[self.ZSCORE_COLUMNS].to_numpy(dtype=float, na_value=np.nan)
+        current = self.moments.zscores(kept, self.feature_engineer).round(4).to_numpy(dtype=float, na_value=np.nan)
+        moved = np.abs(current - stored) > zscore_tolerance
+        moved |= np.isnan(current) != np.isnan(stored)
+        drifted = moved.any(axis=1)
+        # Rows under the tolerance keep the z-scores the table holds
+        kept.loc[drifted, self.ZSCORE_COLUMNS] = current[drifted]
+
+        fresh = self._apply_zscores(fresh)[self.SNAPSHOT_COLUMNS]
+        changed = pd.concat([fresh, kept.loc[drifted, self.SNAPSHOT_COLUMNS]], ignore_index=True)
+        snapshots = pd.concat([kept[self.SNAPSHOT_COLUMNS], fresh], ignore_index=True)
+        snapshots = snapshots.sort_values('customer_id', kind='stable', ignore_index=True)
+        return snapshots, changed
+
+    # ------------------------------------------------------------------ state
+
+    def save_state(self, directory, snapshots: pd.DataFrame) -> None:
+        """Keep the snapshots as written and the moments for the next refresh"""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        snapshots.to_parquet(directory / self.STATE_SNAPSHOTS, index=False)
+        with open(directory / self.STATE_MOMENTS, 'w', encoding='utf-8') as f:
+            json.dump(self.moments.to_dict(), f)
+
+    def load_state(self, directory) -> Optional[pd.DataFrame]:
+        """Snapshots of the last save_state (and its moments), or None without a readable one"""
+        directory = Path(directory)
+        if not (directory / self.STATE_SNAPSHOTS).exists() or not (directory / self.STATE_MOMENTS).exists():
+            return None
+        try:
+            with open(directory / self.STATE_MOMENTS, 'r', encoding='utf-8') as f:
+                self.moments = ZScoreMoments.from_dict(json.load(f))
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return None  # written by an older layout - the caller rebuilds in full
+        return pd.read_parquet(directory / self.STATE_SNAPSHOTS)
+
+    # ------------------------------------------------------------------ output
+
+    @staticmethod
+    def records(snapshots: pd.DataFrame) -> List[Dict]:
+        """JSON-ready rows: ISO timestamps, NULL for NaN/NaT"""
+        df = snapshots.copy()
+        for column in df.columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column]):
+                df[column] = df[column].dt.strftime('%Y-%m-%dT%H:%M:%S')
+        df = df.astype(object).where(df.notna(), None)
+        return df.to_dict(orient='records')
+
+    @staticmethod
+    def _chunks(snapshots: pd.DataFrame, chunk_rows: int) -> Iterator[pd.DataFrame]:
+        for start in range(0, len(snapshots), chunk_rows):
+            yield snapshots.iloc[start:start + chunk_rows]
+
+    def write(self, snapshots: pd.DataFrame, sink: IngestionSink, batch_size: int = 1000,
+              workers: int = 2, chunk_rows: int = 50_000, table: str = TABLE,
+              on_conflict: str = 'customer_id') -> int:
+        """
+        Upsert snapshots on customer_id (or on_conflict into another table,
+        e.g. ml_feature_history); returns rows written
+        Records are built chunk_rows at a time while earlier chunks upload,
+        so a million customers never exist as one list of dicts
+        """
+        with BatchUpsertWriter(sink, batch_size=batch_size, workers=workers) as writer:
+            uploads = [
+                writer.submit(table, self.records(chunk), on_conflict=on_conflict)
+                for chunk in self._chunks(snapshots, chunk_rows)
+            ]
+        return sum(upload.result() for upload in uploads)
+
+
+def _save_frame(df: pd.DataFrame, stem: Path) -> str:
+    """Arrow IPC (uncompressed feather) when the frame converts, else a pickle"""
+    if PYARROW_AVAILABLE:
+        try:
+            path = stem.with_suffix('.arrow')
+            df.reset_index(drop=True).to_feather(path, compression='uncompressed')
+            return str(path)
+        except (pyarrow.ArrowException, TypeError, ValueError):
+            pass  # e.g. an object column mixing numbers and text
+    path = stem.with_suffix('.pkl')
+    df.to_pickle(path)
+    return str(path)
+
+
+def _load_frame(path: str, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+    """The saved frame, or only its rows at the given positions"""
+    if path.endswith('.arrow'):
+        table = pyarrow.feather.read_table(path, memory_map=True)
+        if rows is not None:
+            table = table.take(pyarrow.array(rows))
+        return table.to_pandas()
+    df = pd.read_pickle(path)
+    return df if rows is None else df.iloc[rows]
+
+
+def _features_in_worker(job: Tuple[Dict[str, Tuple[str, str]], int, str], feature_engineer: FeatureEngineer,
+                        as_of: pd.Timestamp) -> Tuple[str, Dict]:
+    """
+    Process-pool entry point: aggregate one customer partition
+    job is ({table: (frame path, row partition path)}, partition, output stem).
+    Returns the path of its features (without z-scores) and its z-score moments
+    """
+    inputs, index, output = job
+    tables = {}
+    for table, (path, rows_path) in inputs.items():
+        rows = np.flatnonzero(np.load(rows_path, mmap_mode='r') == index)
+        tables[table] = _load_frame(path, rows)
+    builder = FeatureSnapshotBuilder(feature_engineer, as_of)
+    features = builder._features(tables, builder.customer_index(tables))
+    moments = ZScoreMoments.from_frame(features, builder.ZSCORE_METRICS)
+    return _save_frame(features, Path(output)), moments.to_dict()
@@ -3,12 +3,22 @@ Feature Engineering Module - 28+ Dimensions
 Transforms raw data into ML-ready features for predictive analytics
 """
 
+import re
+
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional
 from scipy import stats
 
+from .streaming_stats import RunningMoments, StreamingStats
+
+try:
+    import pyarrow  # noqa: F401 - enables Arrow-backed string scans
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PYARROW_AVAILABLE = False
+
 
 class FeatureEngineer:
     """Enterprise-grade feature engineering for financial analytics"""
@@ -34,6 +44,12 @@ class FeatureEngineer:
     DPD_BUCKETS = [0, 1, 15, 30, 45, 60, 90, 120, 180, float('inf')]
     DPD_LABELS = ['Current', '1-14', '15-29', '30-44', '45-59', '60-89', '90-119', '120-179', '180+']
     
+    # One compiled alternation per customer type, checked in CUSTOMER_TYPES order
+    CUSTOMER_TYPE_PATTERNS = {
+        customer_type: re.compile('|'.join(map(re.escape, keywords)))
+        for customer_type, keywords in CUSTOMER_TYPES.items()
+    }
+    
     def classify_customer_type(self, customer_name: str, customer_data: Dict) -> str:
         """Classify customer as B2B, B2C, or B2G - Requirement 2"""
         name_lower = customer_name.lower()
@@ -44,6 +60,29 @@ class FeatureEngineer:
         
         return 'B2C'
     
+    def classify_customer_type_frame(self, df: pd.DataFrame, name_column: str = 'customer_name') -> pd.Series:
+        """
+        classify_customer_type for every row of df
+        The first type (in CUSTOMER_TYPES order) with a keyword in the
+        lowercased name wins, as in the scalar version; missing names are B2C
+        """
+        # str.lower per name keeps Unicode case mapping identical to the scalar version;
+        # the keyword scans then run on Arrow strings when pyarrow is installed
+        names = df[name_column].astype(object).str.lower()
+        if PYARROW_AVAILABLE:
+            names = names.astype('string[pyarrow]')
+            conditions = [
+                names.str.contains(pattern.pattern, regex=True).fillna(False).to_numpy(dtype=bool)
+                for pattern in self.CUSTOMER_TYPE_PATTERNS.values()
+            ]
+        else:
+            conditions = [
+                names.str.contains(pattern, na=False).to_numpy(dtype=bool)
+                for pattern in self.CUSTOMER_TYPE_PATTERNS.values()
+            ]
+        labels = np.select(conditions, list(self.CUSTOMER_TYPE_PATTERNS), default='B2C')
+        return pd.Series(labels.astype(object), index=df.index, name='customer_type')
+    
     def calculate_segmentation(self, customer_metrics: Dict) -> str:
         """Segment customers A-F based on performance - Requirement 2"""
         dpd = customer_metrics.get('avg_dpd', 0)
@@ -58,6 +97,28 @@ class FeatureEngineer:
         
         return 'F'
     
+    def calculate_segmentation_frame(self, df: pd.DataFrame) -> pd.Series:
+        """
+        calculate_segmentation for every row of df (avg_dpd, utilization,
+        payment_ratio columns; a missing column counts as 0)
+        Threshold cascade: the first segment whose thresholds a row meets wins;
+        NaN metrics fail every comparison and fall through to F
+        """
+        def column(name: str) -> np.ndarray:
+            if name not in df.columns:
+                return np.zeros(len(df))
+            return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        
+        dpd, utilization, payment_ratio = column('avg_dpd'), column('utilization'), column('payment_ratio')
+        conditions = [
+            (dpd <= thresholds['dpd_max'])
+            & (utilization >= thresholds['utilization_min'])
+            & (payment_ratio >= thresholds['payment_ratio_min'])
+            for thresholds in self.SEGMENTATION_THRESHOLDS.values()
+        ]
+        labels = np.select(conditions, list(self.SEGMENTATION_THRESHOLDS), default='F')
+        return pd.Series(labels.astype(object), index=df.index, name='segment')
+    
     def bucket_dpd(self, dpd_value: float) -> str:
         """Bucket DPD into categories - Requirement 2"""
         for i, threshold in enumerate(self.DPD_BUCKETS[1:]):
@@ -65,6 +126,18 @@ class FeatureEngineer:
                 return self.DPD_LABELS[i]
         return self.DPD_LABELS[-1]
     
+    def bucket_dpd_frame(self, df: pd.DataFrame, dpd_column: str = 'dpd') -> pd.Series:
+        """
+        bucket_dpd for every row of df
+        np.searchsorted over the bucket upper bounds: a value's bucket is the
+        number of bounds it has reached, capped at the last (NaN sorts last, so
+        it lands in 180+ like in the scalar version)
+        """
+        dpd = pd.to_numeric(df[dpd_column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        positions = np.searchsorted(np.asarray(self.DPD_BUCKETS[1:], dtype=float), dpd, side='right')
+        labels = np.asarray(self.DPD_LABELS, dtype=object)
+        return pd.Series(labels[np.minimum(positions, len(labels) - 1)], index=df.index, name='dpd_bucket')
+    
     def calculate_dpd_statistics(self, dpd_series: pd.Series) -> Dict:
         """Calculate DPD statistics - Requirement 2"""
         return {
@@ -74,12 +147,33 @@ class FeatureEngineer:
             'dpd_std': float(dpd_series.std()) if len(dpd_series) > 0 else 0,
         }
     
+    @staticmethod
+    def dpd_statistics(dpd_stats: StreamingStats) -> Dict:
+        """
+        calculate_dpd_statistics from streaming stats, e.g. partials of chunks
+        or partitions combined with StreamingStats.merge_all. The median comes
+        from the merged digest: exact up to its exact_limit values, else an
+        approximation
+        """
+        summary = dpd_stats.summary()
+        return {f'dpd_{stat}': float(summary[stat]) for stat in ('max', 'mean', 'median', 'std')}
+    
     def calculate_utilization(self, balance: float, limit: float) -> float:
         """Calculate credit utilization - Requirement 2"""
         if limit == 0 or pd.isna(limit):
             return 0.0
         return min(balance / limit, 1.0)
     
+    def calculate_utilization_frame(self, df: pd.DataFrame, balance_column: str = 'balance',
+                                    limit_column: str = 'limit') -> pd.Series:
+        """calculate_utilization for every row of df: balance / limit capped at 1, 0 without a limit"""
+        balance = pd.to_numeric(df[balance_column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        limit = pd.to_numeric(df[limit_column], errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+        no_limit = (limit == 0) | np.isnan(limit)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            utilization = np.minimum(balance / np.where(no_limit, 1.0, limit), 1.0)
+        return pd.Series(np.where(no_limit, 0.0, utilization), index=df.index, name='utilization')
+    
     def calculate_weighted_apr(self, facilities: List[Dict]) -> float:
         """Calculate weighted average APR - Requirement 2"""
         total_balance = sum(f.get('balance', 0) for f in facilities)
@@ -89,14 +183,27 @@ class FeatureEngineer:
         weighted_sum = sum(f.get('balance', 0) * f.get('apr', 0) for f in facilities)
         return weighted_sum / total_balance
     
-    def calculate_z_scores(self, df: pd.DataFrame, metrics: List[str]) -> pd.DataFrame:
-        """Calculate Z-scores - Requirement 2"""
+    def calculate_z_scores(self, df: pd.DataFrame, metrics: List[str],
+                           population: Optional[Dict[str, RunningMoments]] = None) -> pd.DataFrame:
+        """
+        Calculate Z-scores - Requirement 2
+        Returns a copy of df with a {metric}_zscore column per metric. Mean and
+        std come from population when given (moments merged across chunks or
+        partitions, see z_score_moments), else from df in one pass per metric
+        """
+        zscores = {}
         for metric in metrics:
             if metric in df.columns:
-                mean = df[metric].mean()
-                std = df[metric].std()
+                moments = population[metric] if population and metric in population else \
+                    RunningMoments.from_values(df[metric])
+                std = moments.std()
                 if std > 0:
-                    df[f'{metric}_zscore'] = (df[metric] - mean) / std
+                    zscores[f'{metric}_zscore'] = (df[metric] - moments.mean) / std
                 else:
-                    df[f'{metric}_zscore'] = 0
-        return df
+                    zscores[f'{metric}_zscore'] = 0
+        return df.assign(**zscores)
+    
+    @staticmethod
+    def z_score_moments(df: pd.DataFrame, metrics: List[str]) -> Dict[str, RunningMoments]:
+        """Per-metric moments of one chunk/partition; merge them for calculate_z_scores(population=...)"""
+        return {metric: RunningMoments.from_values(df[metric]) for metric in metrics if metric in df.columns}
@@ -0,0 +1,140 @@
+"""
+Feature History Store
+Append-only, date-partitioned Parquet copies of ml_feature_snapshots rows,
+one directory per snapshot date (root/snapshot_date=YYYY-MM-DD/part-*.parquet,
+Hive layout). Every feature build appends the rows it recomputed; nothing is
+rewritten, so features as of any past date are one as-of join away instead of
+a rebuild from the raw tables. The ml_feature_history table (see
+supabase/migrations/20261018_ml_feature_history.sql) mirrors the layout
+"""
+
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+
+import pandas as pd
+
+DateLike = Union[str, date, datetime, pd.Timestamp]
+
+
+class FeatureHistoryStore:
+    """
+    Snapshot rows keyed by (customer_id, snapshot_date)
+
+    A date partition can receive several parts (e.g. two refreshes on the same
+    day); the latest part wins for a customer, like the table's upsert on
+    (customer_id, snapshot_date). A customer missing from a partition simply
+    keeps its earlier snapshot: as-of lookups take the latest partition on or
+    before the requested date, so incremental builds only append what changed.
+    """
+
+    TABLE = 'ml_feature_history'
+    PARTITION = 'snapshot_date'
+    CONFLICT_KEYS = 'customer_id,snapshot_date'
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    @staticmethod
+    def _day(value: DateLike) -> pd.Timestamp:
+        return pd.Timestamp(value).normalize()
+
+    def _partition(self, snapshot_date: pd.Timestamp) -> Path:
+        return self.root / f'{self.PARTITION}={snapshot_date.date().isoformat()}'
+
+    def with_snapshot_date(self, snapshots: pd.DataFrame, snapshot_date: DateLike) -> pd.DataFrame:
+        """Rows as stored in ml_feature_history"""
+        return snapshots.assign(**{self.PARTITION: self._day(snapshot_date)})
+
+    def append(self, snapshots: pd.DataFrame, snapshot_date: Optional[DateLike] = None) -> Optional[Path]:
+        """Write snapshots as a new part of their date partition (default: today); returns the part"""
+        if snapshots.empty:
+            return None
+        snapshot_date = self._day(snapshot_date or datetime.now())
+        partition = self._partition(snapshot_date)
+        partition.mkdir(parents=True, exist_ok=True)
+        # Time-ordered, collision-free names: later parts sort (and win) last
+        name = f"part-{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp_path = partition / f'.{name}.tmp'
+        snapshots.to_parquet(tmp_path, index=False)
+        tmp_path.replace(partition / name)
+        return partition / name
+
+    def dates(self) -> List[pd.Timestamp]:
+        """Snapshot dates with at least one part, oldest first"""
+        if not self.root.exists():
+            return []
+        prefix = f'{self.PARTITION}='
+        return sorted(
+            pd.Timestamp(path.name[len(prefix):])
+            for path in self.root.glob(f'{prefix}*') if path.is_dir() and any(path.glob('part-*.parquet'))
+        )
+
+    def read(self, start: Optional[DateLike] = None, end: Optional[DateLike] = None,
+             customers: Optional[Iterable] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Stored rows with their snapshot_date, between start and end inclusive
+        customers and columns prune what is read from each part
+        """
+        start = self._day(start) if start is not None else None
+        end = self._day(end) if end is not None else None
+        if columns is not None:
+            columns = list(dict.fromkeys(['customer_id', *columns]))
+        filters = None
+        if customers is not None:
+            customer_ids = sorted({str(customer_id) for customer_id in customers})
+            if not customer_ids:
+                return self._empty(columns)
+            filters = [('customer_id', 'in', customer_ids)]
+
+        frames = []
+        for snapshot_date in self.dates():
+            if (start is not None and snapshot_date < start) or (end is not None and snapshot_date > end):
+                continue
+            for part in sorted(self._partition(snapshot_date).glob('part-*.parquet')):
+                frame = pd.read_parquet(part, columns=columns, filters=filters)
+                frames.append(frame.assign(**{self.PARTITION: snapshot_date}))
+        if not frames:
+            return self._empty(columns)
+        history = pd.concat(frames, ignore_index=True)
+        history['customer_id'] = history['customer_id'].astype(str)
+        return history.drop_duplicates(subset=['customer_id', self.PARTITION], keep='last', ignore_index=True)
+
+    def _empty(self, columns: Optional[List[str]]) -> pd.DataFrame:
+        """read() result without rows"""
+        empty = pd.DataFrame(columns=columns or ['customer_id'])
+        return empty.assign(**{self.PARTITION: pd.Series(dtype='datetime64[ns]')})
+
+    def as_of(self, pairs: pd.DataFrame, columns: Optional[List[str]] = None,
+              as_of_column: str = 'as_of') -> pd.DataFrame:
+        """
+        Point-in-time features for (customer_id, as_of) pairs
+        Each pair gets the customer's latest snapshot dated on or before its
+        as_of date (NaN features and snapshot_date when there is none). Rows
+        come back in the order of pairs, with its columns first
+        """
+        requested = pairs.reset_index(drop=True)
+        if not len(requested):
+            columns = list(dict.fromkeys(['customer_id', *columns])) if columns is not None else None
+            features = self._empty(columns).drop(columns='customer_id')
+            return pd.concat([requested, features], axis=1)
+        keys = pd.DataFrame({
+            'customer_id': requested['customer_id'].astype(str),
+            '_as_of': pd.to_datetime(requested[as_of_column]).dt.normalize(),
+            '_row': range(len(requested))
+        })
+        history = self.read(end=keys['_as_of'].max() if len(keys) else None,
+                            customers=keys['customer_id'].unique(), columns=columns)
+        # merge_asof needs the same key dtypes (and datetime resolution) on both sides
+        history['customer_id'] = history['customer_id'].astype(keys['customer_id'].dtype)
+        history[self.PARTITION] = history[self.PARTITION].astype('datetime64[ns]')
+        keys['_as_of'] = keys['_as_of'].astype('datetime64[ns]')
+        history = history.sort_values(self.PARTITION, kind='stable')
+        keys = keys.sort_values('_as_of', kind='stable')
+        joined = pd.merge_asof(
+            keys, history, left_on='_as_of', right_on=self.PARTITION,
+            by='customer_id', direction='backward'
+        )
+        features = joined.sort_values('_row').drop(columns=['customer_id', '_as_of', '_row'])
+        return pd.concat([requested, features.reset_index(drop=True)], axis=1)
@@ -0,0 +1,373 @@
+"""
+File Transform - the CPU stage of ingestion
+Detects a downloaded file's source type, parses it (pruned to the columns
+worth reading), checks schema drift, then normalizes, validates and scores
+each frame. It holds no clients or run state, so process-pool workers build
+one from options(); DataIngestionEngine extends it with sources, sinks and
+loading
+"""
+
+import io
+import re
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .compaction import FrameCompactor
+from .excel_reader import ExcelReader
+from .fast_normalize import FastNormalizer
+from .quality_profile import QualityProfile
+from .schema_registry import SchemaRegistry
+
+
+class FileTransform:
+    """Detect, parse, drift-check, normalize, validate and score downloaded files"""
+    
+    # Required columns for each source type
+    REQUIRED_COLUMNS = {
+        'portfolio': ['customer_id', 'balance', 'date'],
+        'facility': ['facility_id', 'customer_id', 'limit'],
+        'customer': ['customer_id', 'name'],
+        'payment': ['payment_id', 'customer_id', 'amount', 'date'],
+        'risk': ['customer_id', 'dpd', 'date'],
+        'revenue': ['customer_id', 'revenue', 'date'],
+        'collections': ['customer_id', 'collected_amount', 'date'],
+        'marketing': ['customer_id', 'channel', 'acquisition_date'],
+        'industry': ['customer_id', 'industry_code']
+    }
+    
+    # Known optional columns per source type (raw_* table schema)
+    OPTIONAL_COLUMNS = {
+        'portfolio': ['portfolio_name'],
+        'facility': ['facility_type', 'limit_amount', 'apr', 'origination_date'],
+        'customer': ['customer_type', 'industry_code', 'segment', 'is_active'],
+        'payment': ['payment_date', 'payment_type'],
+        'risk': ['event_date', 'risk_severity'],
+        'revenue': ['revenue_date', 'revenue_type'],
+        'collections': ['collection_date'],
+        'marketing': ['acquisition_cost'],
+        'industry': ['industry_name']
+    }
+    
+    def __init__(
+        self,
+        fast_normalizer: Optional[FastNormalizer] = None,
+        compactor: Optional[FrameCompactor] = None,
+        excel_engine: Optional[str] = None,
+        prune_columns: bool = True,
+        schema_registry: Optional[SchemaRegistry] = None
+    ):
+        """
+        fast_normalizer swaps normalize_dataframe for the vectorized FastNormalizer;
+        compactor compacts every frame after scoring; excel_engine forces a
+        pd.read_excel engine and prune_columns reads only the required and known
+        optional columns of each workbook; schema_registry enables drift checks
+        """
+        self.fast_normalizer = fast_normalizer
+        self.compactor = compactor
+        self.excel_reader = ExcelReader(excel_engine)
+        self.prune_columns = prune_columns
+        self.schema_registry = schema_registry
+    
+    def options(self) -> Dict:
+        """Picklable settings that rebuild this transform in a worker process (from_options)"""
+        return {
+            'fast_normalize': self.fast_normalizer is not None,
+            'compact': self.compactor is not None,
+            'excel_engine': self.excel_reader.engine,
+            'prune_columns': self.prune_columns,
+            'schema_entries': self.schema_registry.snapshot() if self.schema_registry is not None else None
+        }
+    
+    @classmethod
+    def from_options(cls, options: Dict, fast_normalizer: Optional[FastNormalizer] = None) -> 'FileTransform':
+        """
+        Transform with the settings of options()
+        fast_normalizer is reused when fast normalization is on, so detected
+        date formats carry over between the files a worker transforms
+        """
+        entries = options['schema_entries']
+        return cls(
+            fast_normalizer=(fast_normalizer or FastNormalizer()) if options['fast_normalize'] else None,
+            compactor=FrameCompactor() if options['compact'] else None,
+            excel_engine=options['excel_engine'],
+            prune_columns=options['prune_columns'],
+            schema_registry=SchemaRegistry(entries=entries) if entries is not None else None
+        )
+    
+    def normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Normalize column names to lowercase with underscores
+        Requirement 1: lowercase/underscore column names
+        """
+        df.columns = [
+            re.sub(r'[^a-z0-9_]', '_', col.lower().strip().replace(' ', '_'))
+            for col in df.columns
+        ]
+        # Remove duplicate underscores
+        df.columns = [re.sub(r'_+', '_', col).strip('_') for col in df.columns]
+        return df
+    
+    def convert_numeric_tolerant(self, series: pd.Series) -> pd.Series:
+        """
+        Tolerant numeric conversion - removes currency symbols, commas
+        Requirement 1: tolerant numeric conversion
+        """
+        if series.dtype == 'object':
+            # Remove currency symbols and formatting
+            series = series.astype(str).str.replace(r'[\$,₡,€,%]', '', regex=True)
+            series = series.str.replace(',', '', regex=True)
+            series = series.str.strip()
+            # Convert to numeric, coerce errors to NaN
+            series = pd.to_numeric(series, errors='coerce')
+        return series
+    
+    def standardize_dates(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Standardize date columns to datetime
+        Requirement 1: date standardization
+        """
+        date_columns = [col for col in df.columns if 'date' in col or 'fecha' in col]
+        for col in date_columns:
+            df[col] = pd.to_datetime(df[col], errors='coerce')
+        return df
+    
+    def normalize_dataframe(self, df: pd.DataFrame, source_name: str) -> pd.DataFrame:
+        """
+        Complete normalization pipeline
+        Requirement 1: robust handling with deduplication and state saving
+        """
+        if self.fast_normalizer is not None:
+            return self.fast_normalizer.normalize(df, source_name)
+        
+        # Step 1: Normalize column names
+        df = self.normalize_columns(df)
+        
+        # Step 2: Convert numeric columns
+        for col in df.columns:
+            if col not in ['workbook_name', 'refresh_date'] and 'id' not in col and 'name' not in col:
+                df[col] = self.convert_numeric_tolerant(df[col])
+        
+        # Step 3: Standardize dates
+        df = self.standardize_dates(df)
+        
+        # Step 4: Add metadata
+        df['workbook_name'] = source_name
+        df['refresh_date'] = datetime.now()
+        
+        # Step 5: Deduplication
+        initial_rows = len(df)
+        df = df.drop_duplicates()
+        duplicates_removed = initial_rows - len(df)
+        
+        return df, duplicates_removed
+    
+    def validate_required_columns(self, df: pd.DataFrame, source_type: str) -> Tuple[bool, List[str]]:
+        """
+        Validate that required columns are present
+        Requirement 1: skip if core missing with alert
+        """
+        if source_type not in self.REQUIRED_COLUMNS:
+            return True, []  # Unknown source type, allow
+        
+        required = self.REQUIRED_COLUMNS[source_type]
+        missing = [col for col in required if col not in df.columns]
+        
+        return len(missing) == 0, missing
+    
+    def profile_quality(self, df: pd.DataFrame) -> QualityProfile:
+        """
+        Columnar quality profile for one frame or chunk
+        One pass per column; chunk profiles combine with QualityProfile.merge
+        """
+        return QualityProfile.from_frame(df)
+    
+    def quality_counts(self, df: pd.DataFrame) -> Dict:
+        """Raw data quality counts for one frame or chunk"""
+        return self.profile_quality(df).counts()
+    
+    @staticmethod
+    def score_quality_counts(counts: Dict) -> Dict:
+        """Turn raw quality counts into the quality report entry"""
+        total_rows = counts['total_rows']
+        total_cells = total_rows * counts['total_columns']
+        null_cells = counts['null_cells']
+        null_percentage = (null_cells / total_cells * 100) if total_cells > 0 else 0
+        
+        # Completeness score (100% - null%)
+        completeness_score = 100 - null_percentage
+        
+        # Penalize critical nulls heavily
+        critical_penalty = (counts['critical_nulls'] / total_rows * 50) if total_rows > 0 else 0
+        
+        final_score = max(0, completeness_score - critical_penalty)
+        
+        return {
+            'total_rows': total_rows,
+            'total_columns': counts['total_columns'],
+            'null_cells': int(null_cells),
+            'null_percentage': round(null_percentage, 2),
+            'zero_rows': int(counts['zero_rows']),
+            'completeness_score': round(completeness_score, 2),
+            'critical_penalty': round(critical_penalty, 2),
+            'final_quality_score': round(final_score, 2)
+        }
+    
+    def score_profile(self, profile: QualityProfile) -> Dict:
+        """Quality report entry plus per-column nulls, zeros, distinct counts and min/max"""
+        return {**self.score_quality_counts(profile.counts()), 'columns': profile.column_summary()}
+    
+    def calculate_data_quality_score(self, df: pd.DataFrame) -> Dict:
+        """
+        Calculate data quality metrics
+        Requirement 8: Data Quality Audit with score %, nulls, zero-rows
+        """
+        return self.score_profile(self.profile_quality(df))
+    
+    def detect_source_type(self, filename: str) -> Optional[str]:
+        """Detect source type from filename"""
+        filename_lower = filename.lower()
+        
+        type_keywords = {
+            'portfolio': ['portfolio', 'portafolio', 'cartera', 'balances'],
+            'facility': ['facility', 'facilities', 'linea', 'credito', 'limite'],
+            'customer': ['customer', 'cliente', 'clients'],
+            'payment': ['payment', 'pago', 'pagos', 'cobro'],
+            'risk': ['risk', 'riesgo', 'dpd', 'mora'],
+            'revenue': ['revenue', 'ingreso', 'ingresos'],
+            'collections': ['collection', 'cobranza', 'recuperacion'],
+            'marketing': ['marketing', 'adquisicion', 'canal'],
+            'industry': ['industry', 'industria', 'sector']
+        }
+        
+        for source_type, keywords in type_keywords.items():
+            if any(keyword in filename_lower for keyword in keywords):
+                return source_type
+        
+        return None
+    
+    def ingest_columns(self, source_type: Optional[str]) -> Optional[List[str]]:
+        """Columns worth reading for a source type, None to read everything"""
+        if not self.prune_columns or source_type not in self.REQUIRED_COLUMNS:
+            return None
+        return ['id'] + self.REQUIRED_COLUMNS[source_type] + self.OPTIONAL_COLUMNS.get(source_type, [])
+    
+    @staticmethod
+    def is_excel(file_name: str, mime_type: str) -> bool:
+        return mime_type.endswith('spreadsheetml.sheet') or file_name.endswith('.xlsx')
+    
+    @staticmethod
+    def is_csv(file_name: str, mime_type: str) -> bool:
+        return mime_type == 'text/csv' or file_name.endswith('.csv')
+    
+    def parse_file(self, fh: io.BytesIO, file_name: str, mime_type: str,
+                   source_type: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Parse file based on type, None when the type is unsupported
+        Workbooks are pruned to ingest_columns(source_type)
+        """
+        if self.is_excel(file_name, mime_type):
+            return self.excel_reader.read(fh, self.ingest_columns(source_type))
+        if self.is_csv(file_name, mime_type):
+            return pd.read_csv(fh)
+        return None
+    
+    def plan_sheets(self, sheet_names: List, file_name: str) -> Optional[List[Tuple[str, str]]]:
+        """
+        (sheet, source_type) for each sheet to ingest from a multi-sheet workbook
+        Sheet names are matched with detect_source_type; None keeps the single-sheet
+        behaviour (first sheet, source type from the filename) when no sheet matches
+        """
+        if len(sheet_names) < 2:
+            return None
+        matched = [(str(sheet), self.detect_source_type(str(sheet))) for sheet in sheet_names]
+        matched = [(sheet, source_type) for sheet, source_type in matched if source_type]
+        return matched or None
+    
+    def check_schema(self, df: pd.DataFrame, source_type: str) -> Tuple[Optional[Dict[str, str]], List[str]]:
+        """
+        Cheap pre-normalization drift check against the schema registry
+        Returns the frame's column fingerprint and drift issues (none without a registry)
+        """
+        if self.schema_registry is None:
+            return None, []
+        return self.schema_registry.check(source_type, df)
+    
+    @staticmethod
+    def drift_result(issues: List[str], where: str = '') -> Dict:
+        return {'status': 'failed', 'message': f'Schema drift{where}: {"; ".join(issues)}', 'drift': issues}
+    
+    def transform_frame(self, df: pd.DataFrame, source_name: str, source_type: str) -> Dict:
+        """Normalize, validate and score one parsed frame"""
+        # Normalize data
+        df, duplicates_removed = self.normalize_dataframe(df, source_name)
+        
+        # Validate required columns
+        is_valid, missing_cols = self.validate_required_columns(df, source_type)
+        if not is_valid:
+            return {'status': 'failed', 'message': f'Missing required columns: {", ".join(missing_cols)}'}
+        
+        transformed = {
+            'status': 'ready',
+            'source_type': source_type,
+            'duplicates_removed': duplicates_removed,
+            'quality_metrics': self.calculate_data_quality_score(df)
+        }
+        # Compact after scoring, so quality reports do not depend on the dtypes
+        if self.compactor is not None:
+            df, transformed['compaction'] = self.compactor.compact(df)
+        transformed['df'] = df
+        return transformed
+    
+    def transform_file(self, fh: io.BytesIO, file_name: str, mime_type: str) -> Dict:
+        """
+        Detect, parse, drift-check, normalize, validate and score one downloaded file
+        Pure CPU stage - does not touch Supabase or Drive, so it can run in a worker process.
+        Multi-sheet workbooks come back as {'status': 'ready', 'sheets': {sheet: transform}}
+        """
+        if not (self.is_excel(file_name, mime_type) or self.is_csv(file_name, mime_type)):
+            return {'status': 'skipped', 'message': f'Unsupported file type: {mime_type}'}
+        
+        started = time.perf_counter()
+        plan = None
+        if self.is_excel(file_name, mime_type):
+            # Open the workbook once; every matching sheet is parsed from the same handle
+            with self.excel_reader.open(fh) as book:
+                plan = self.plan_sheets(book.sheet_names, file_name)
+                if plan is None:
+                    source_type = self.detect_source_type(file_name)
+                    if not source_type:
+                        return {'status': 'skipped', 'message': 'Could not detect source type from filename'}
+                    plan = [(None, source_type)]
+                frames = [
+                    (sheet, source_type, self.excel_reader.parse(book, sheet or 0, self.ingest_columns(source_type)))
+                    for sheet, source_type in plan
+                ]
+        else:
+            # Detect source type
+            source_type = self.detect_source_type(file_name)
+            if not source_type:
+                return {'status': 'skipped', 'message': 'Could not detect source type from filename'}
+            frames = [(None, source_type, self.parse_file(fh, file_name, mime_type, source_type))]
+        parse_seconds = round(time.perf_counter() - started, 3)
+        
+        # Drift anywhere holds back the whole file, before any sheet is normalized
+        schemas = []
+        for sheet, source_type, df in frames:
+            schema, drift = self.check_schema(df, source_type)
+            if drift:
+                where = f' in sheet {sheet}' if sheet is not None else ''
+                return {**self.drift_result(drift, where), 'parse_seconds': parse_seconds}
+            schemas.append(schema)
+        
+        transforms = {}
+        for (sheet, source_type, df), schema in zip(frames, schemas):
+            transforms[sheet] = self.transform_frame(df, file_name, source_type)
+            if schema is not None:
+                transforms[sheet]['schema'] = schema
+        
+        if None in transforms:
+            return {**transforms[None], 'parse_seconds': parse_seconds}
+        return {'status': 'ready', 'sheets': transforms, 'parse_seconds': parse_seconds}
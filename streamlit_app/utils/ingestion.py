@@ -1,327 +1,922 @@
 """
 Data Ingestion Module - Google Drive to Supabase
-Handles 9+ source types with robust normalization and validation
+Handles 9+ source types with robust normalization and validation.
+Files come from an IngestionSource (Drive by default) and rows go to an
+IngestionSink (Supabase by default) - see sources.py and sinks.py
 """
 
 import pandas as pd
 import numpy as np
 import re
+import json
+import logging
+import shutil
 from datetime import datetime
 from typing import Dict, List, Optional, Tuple
+from pathlib import Path
 import io
+import tempfile
+import threading
 import warnings
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
 warnings.filterwarnings('ignore')
 
-from google.oauth2 import service_account
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoBaseDownload
-from supabase import create_client
+from .delta import RowDeltaStore
+from .dirty_set import DirtyCustomerSet
+from .compaction import FrameCompactor
+from .fast_normalize import FastNormalizer
+from .file_transform import FileTransform
+from .schema_registry import SchemaRegistry
+from .sinks import IngestionSink, SupabaseSink
+from .sources import DriveSource, IngestionSource
+from .ingestion_checkpoint import IngestionCheckpoint
+from .ingestion_manifest import IngestionManifest
+from .staging_cache import ParquetStagingCache
+from .upsert_writer import BatchUpsertWriter
 
+logger = logging.getLogger(__name__)
 
-class DataIngestionEngine:
-    """Enterprise-grade data ingestion with normalization and validation"""
-    
-    # Required columns for each source type
-    REQUIRED_COLUMNS = {
-        'portfolio': ['customer_id', 'balance', 'date'],
-        'facility': ['facility_id', 'customer_id', 'limit'],
-        'customer': ['customer_id', 'name'],
-        'payment': ['payment_id', 'customer_id', 'amount', 'date'],
-        'risk': ['customer_id', 'dpd', 'date'],
-        'revenue': ['customer_id', 'revenue', 'date'],
-        'collections': ['customer_id', 'collected_amount', 'date'],
-        'marketing': ['customer_id', 'channel', 'acquisition_date'],
-        'industry': ['customer_id', 'industry_code']
+class DataIngestionEngine(FileTransform):
+    """
+    Enterprise-grade data ingestion with normalization and validation
+    The per-file transform (parse, normalize, validate, score) is FileTransform's
+    """
+    
+    # Target raw_* table per source type
+    TABLE_NAMES = {
+        'portfolio': 'raw_portfolios',
+        'facility': 'raw_facilities',
+        'customer': 'raw_customers',
+        'payment': 'raw_payments',
+        'risk': 'raw_risk_events',
+        'revenue': 'raw_revenue',
+        'collections': 'raw_collections',
+        'marketing': 'raw_marketing',
+        'industry': 'raw_industry'
+    }
+    
+    # Business keys used for row-level delta detection
+    BUSINESS_KEYS = {
+        'raw_portfolios': ['customer_id', 'date'],
+        'raw_facilities': ['facility_id'],
+        'raw_customers': ['customer_id'],
+        'raw_payments': ['payment_id'],
+        'raw_risk_events': ['customer_id', 'date'],
+        'raw_revenue': ['customer_id', 'date'],
+        'raw_collections': ['customer_id', 'date'],
+        'raw_marketing': ['customer_id', 'channel', 'acquisition_date'],
+        'raw_industry': ['customer_id', 'industry_code']
+    }
+    
+    # BUSINESS_KEYS with a unique index in the Supabase schema
+    # (supabase/migrations/20261019_raw_business_key_indexes.sql) - the only
+    # on_conflict targets PostgREST accepts there
+    SUPABASE_CONFLICT_KEYS = {
+        'raw_portfolios': ['customer_id', 'date'],
+        'raw_facilities': ['facility_id'],
+        'raw_customers': ['customer_id'],
+        'raw_payments': ['payment_id'],
+        'raw_marketing': ['customer_id', 'channel', 'acquisition_date'],
+        'raw_industry': ['customer_id', 'industry_code']
+    }
+    
+    # Per-stage worker limits for concurrent ingestion
+    DEFAULT_CONCURRENCY = {
+        'download': 4,  # threads running MediaIoBaseDownload chunk loops
+        'parse': 2,     # processes running read_excel/read_csv + normalization
+        'upsert': 2     # upsert writer threads (and streamed-CSV workers)
+    }
+    
+    # Report counter incremented for each final file status
+    STATUS_COUNTERS = {
+        'success': 'successful',
+        'failed': 'failed',
+        'skipped': 'skipped',
+        'unchanged': 'unchanged',
+        'quarantined': 'quarantined'
     }
     
-    def __init__(self, supabase_url: str, supabase_key: str, gdrive_credentials: Dict):
-        """Initialize clients"""
-        self.supabase = create_client(supabase_url, supabase_key)
+    # What happens to a file whose column kinds drift from the schema registry
+    DRIFT_ACTIONS = ('reject', 'quarantine')
+    
+    # Download chunk size for the streaming path (Drive's MediaIoBaseDownload defaults to 100MB)
+    STREAM_DOWNLOAD_CHUNK_BYTES = 8 * 1024 * 1024
+    
+    def __init__(
+        self,
+        supabase_url: Optional[str] = None,
+        supabase_key: Optional[str] = None,
+        gdrive_credentials: Optional[Dict] = None,
+        concurrency: Optional[Dict[str, int]] = None,
+        csv_chunksize: Optional[int] = None,
+        upsert_batch_size: int = 500,
+        upsert_queue_size: int = 2,
+        manifest_path: Optional[str] = None,
+        delta_dir: Optional[str] = None,
+        fast_normalize: bool = False,
+        staging_dir: Optional[str] = None,
+        excel_engine: Optional[str] = None,
+        prune_columns: bool = True,
+        schema_registry_path: Optional[str] = None,
+        drift_action: str = 'reject',
+        quarantine_dir: Optional[str] = None,
+        checkpoint_path: Optional[str] = None,
+        source: Optional[IngestionSource] = None,
+        sink: Optional[IngestionSink] = None,
+        conflict_keys: Optional[Dict[str, List[str]]] = None,
+        compact: bool = False
+    ):
+        """
+        Initialize clients
+        source/sink replace the Drive folder and Supabase project built from
+        gdrive_credentials and supabase_url/supabase_key (local folder, S3,
+        Postgres and Parquet implementations live in sources.py and sinks.py)
+        conflict_keys maps tables to the upsert conflict columns (and delta
+        business keys) to use instead of the 'id' column
+        csv_chunksize enables streaming CSV ingestion: files are spooled to disk
+        and read, normalized and upserted csv_chunksize rows at a time.
+        Upserts are sent upsert_batch_size rows per request; at most
+        upsert_queue_size files/chunks wait for upload before parsing blocks.
+        manifest_path enables incremental runs: files whose Drive checksum or
+        modifiedTime match the last successful load are skipped as unchanged.
+        delta_dir enables row-level deltas: only inserted/updated rows are
+        upserted, diffed against per-file snapshots kept under delta_dir.
+        fast_normalize swaps normalize_dataframe for the vectorized FastNormalizer
+        staging_dir enables the Parquet staging cache: normalized files are kept
+        per Drive id and modifiedTime and reloaded instead of re-downloaded
+        excel_engine forces a pd.read_excel engine (default: calamine when
+        installed, else openpyxl); prune_columns reads only the required and
+        known optional columns of each workbook
+        schema_registry_path enables schema-drift detection: files whose column
+        kinds drift from the registered baseline of their source type are
+        rejected, or with drift_action='quarantine' copied to quarantine_dir
+        (default: next to the registry) for review
+        checkpoint_path enables resumable runs: completed files and committed
+        upsert batches are checkpointed as they land, and
+        ingest(resume=True) continues an interrupted run from there
+        compact downcasts numerics and categorizes low-cardinality text of every
+        in-memory frame after normalization (FrameCompactor) and reports the
+        bytes saved per file; streamed CSV chunks are upserted as-is
+        """
+        if drift_action not in self.DRIFT_ACTIONS:
+            raise ValueError(f"drift_action must be one of {self.DRIFT_ACTIONS}")
         
-        credentials = service_account.Credentials.from_service_account_info(
-            gdrive_credentials,
-            scopes=['https://www.googleapis.com/auth/drive.readonly']
+        if sink is None and not (supabase_url and supabase_key):
+            raise ValueError("supabase_url and supabase_key are required without a sink")
+        if source is None and gdrive_credentials is None:
+            raise ValueError("gdrive_credentials are required without a source")
+        self.sink = sink if sink is not None else SupabaseSink.connect(supabase_url, supabase_key)
+        self.source = source if source is not None else DriveSource(gdrive_credentials)
+        self.conflict_keys = dict(conflict_keys or {})
+        self._missing_conflict_keys = set()
+        
+        limits = {**self.DEFAULT_CONCURRENCY, **(concurrency or {})}
+        self.concurrency = {stage: max(1, int(limit)) for stage, limit in limits.items()}
+        self.csv_chunksize = csv_chunksize
+        self.writer = BatchUpsertWriter(
+            self.sink,
+            batch_size=upsert_batch_size,
+            max_pending=upsert_queue_size,
+            workers=self.concurrency['upsert']
+        )
+        self.manifest = IngestionManifest(manifest_path) if manifest_path else None
+        self.delta_store = RowDeltaStore(
+            delta_dir, self.BUSINESS_KEYS, self.conflict_keys
+        ) if delta_dir else None
+        self.staging_cache = ParquetStagingCache(staging_dir) if staging_dir else None
+        self._staging_stats = {'hits': 0, 'staged': 0, 'unstaged_tables': set()}
+        self._staging_lock = threading.Lock()
+        self.dirty = DirtyCustomerSet()
+        super().__init__(
+            fast_normalizer=FastNormalizer() if fast_normalize else None,
+            compactor=FrameCompactor() if compact else None,
+            excel_engine=excel_engine,
+            prune_columns=prune_columns,
+            schema_registry=SchemaRegistry(schema_registry_path) if schema_registry_path else None
         )
-        self.drive = build('drive', 'v3', credentials=credentials)
+        self.drift_action = drift_action
+        if quarantine_dir is None and schema_registry_path:
+            quarantine_dir = Path(schema_registry_path).parent / 'quarantine'
+        self.quarantine_dir = Path(quarantine_dir) if quarantine_dir else None
+        self.checkpoint = IngestionCheckpoint(checkpoint_path) if checkpoint_path else None
         
-    def normalize_columns(self, df: pd.DataFrame) -> pd.DataFrame:
-        """
-        Normalize column names to lowercase with underscores
-        Requirement 1: lowercase/underscore column names
-        """
-        df.columns = [
-            re.sub(r'[^a-z0-9_]', '_', col.lower().strip().replace(' ', '_'))
-            for col in df.columns
-        ]
-        # Remove duplicate underscores
-        df.columns = [re.sub(r'_+', '_', col).strip('_') for col in df.columns]
-        return df
-    
-    def convert_numeric_tolerant(self, series: pd.Series) -> pd.Series:
+    def get_table_name(self, source_type: str) -> str:
+        """Map source type to Supabase table name"""
+        return self.TABLE_NAMES.get(source_type, 'raw_unknown')
+    
+    
+    def conflict_target(self, table_name: str, columns) -> Optional[str]:
         """
-        Tolerant numeric conversion - removes currency symbols, commas
-        Requirement 1: tolerant numeric conversion
+        on_conflict for an upsert: the table's conflict keys when present, else 'id'
+        Configured keys the frame lacks are logged once per table, since the
+        fallback upserts on a different identity than the one configured
         """
-        if series.dtype == 'object':
-            # Remove currency symbols and formatting
-            series = series.astype(str).str.replace(r'[\$,₡,€,%]', '', regex=True)
-            series = series.str.replace(',', '', regex=True)
-            series = series.str.strip()
-            # Convert to numeric, coerce errors to NaN
-            series = pd.to_numeric(series, errors='coerce')
-        return series
-    
-    def standardize_dates(self, df: pd.DataFrame) -> pd.DataFrame:
+        keys = self.conflict_keys.get(table_name)
+        if keys:
+            missing = [key for key in keys if key not in columns]
+            if not missing:
+                return ','.join(keys)
+            if table_name not in self._missing_conflict_keys:
+                self._missing_conflict_keys.add(table_name)
+                logger.warning("%s lacks conflict key columns %s; upserting on %s instead",
+                               table_name, missing, "'id'" if 'id' in columns else 'no conflict target')
+        return 'id' if 'id' in columns else None
+    
+    def download_file(self, file_id: str, fh=None, chunksize: Optional[int] = None):
+        """Download a source file into fh (an in-memory buffer by default)"""
+        return self.source.download(file_id, fh, chunksize)
+    
+    def should_stream(self, file_name: str, mime_type: str) -> bool:
+        """True when the file goes through the chunked CSV path"""
+        return bool(self.csv_chunksize) and not self.is_excel(file_name, mime_type) \
+            and self.is_csv(file_name, mime_type)
+    
+    def load_file(self, file_result: Dict, transformed: Dict, file_key: Optional[str] = None) -> Future:
         """
-        Standardize date columns to datetime
-        Requirement 1: date standardization
+        Queue a transformed file for batched upsert
+        The file result is marked successful (or failed) once its last batch lands.
+        With a delta store, only rows changed since the last load of file_key are sent
         """
-        date_columns = [col for col in df.columns if 'date' in col or 'fecha' in col]
-        for col in date_columns:
-            df[col] = pd.to_datetime(df[col], errors='coerce')
-        return df
+        # Release the frame once its records are queued
+        df = transformed.pop('df')
+        
+        # Get target table
+        table_name = self.get_table_name(transformed['source_type'])
+        
+        # Keep only inserted/updated rows
+        touched = [df]
+        if self.delta_store is not None and file_key:
+            delta, df, removed = self.delta_store.diff(table_name, file_key, df)
+            transformed['delta'] = delta
+            touched = [df, removed]
+        transformed['touched'] = np.concatenate([DirtyCustomerSet.ids_of(frame) for frame in touched])
+        
+        # Convert to records
+        data = df.to_dict(orient='records')
+        
+        # Upsert to Supabase
+        # Note: Requires unique constraint on customer_id + date or similar
+        future = self.writer.submit(
+            table_name,
+            data,
+            on_conflict=self.conflict_target(table_name, df.columns),
+            **self._checkpoint_options(file_key)
+        )
+        future.add_done_callback(
+            lambda done: self._complete_load(file_result, transformed, table_name, done)
+        )
+        return future
     
-    def normalize_dataframe(self, df: pd.DataFrame, source_name: str) -> pd.DataFrame:
+    def load_workbook(self, file_result: Dict, transformed: Dict, file_key: Optional[str] = None) -> List[Future]:
         """
-        Complete normalization pipeline
-        Requirement 1: robust handling with deduplication and state saving
+        Queue every ready sheet of a multi-sheet workbook
+        Each sheet is its own writer job, so the upsert workers fill the sheets'
+        tables in parallel. Per-sheet outcomes land in file_result['sheets'] and
+        are rolled up by finalize_workbook once the writer has drained.
         """
-        # Step 1: Normalize column names
-        df = self.normalize_columns(df)
+        file_result['sheets'] = []
+        futures = []
+        for sheet, sheet_transformed in transformed['sheets'].items():
+            sheet_result = self._new_file_result(sheet)
+            file_result['sheets'].append(sheet_result)
+            if not self._apply_transform(sheet_result, sheet_transformed):
+                continue
+            try:
+                futures.append(self.load_file(
+                    sheet_result, sheet_transformed, f'{file_key}#{sheet}' if file_key else None
+                ))
+            except Exception as e:
+                self._mark_failed(sheet_result, e)
+        return futures
+    
+    def load(self, file_result: Dict, transformed: Dict, file_key: Optional[str] = None) -> List[Future]:
+        """Queue a ready transform - a single frame or a multi-sheet workbook"""
+        if 'sheets' in transformed:
+            return self.load_workbook(file_result, transformed, file_key)
+        return [self.load_file(file_result, transformed, file_key)]
+    
+    def _checkpoint_options(self, job_key: Optional[str]) -> Dict:
+        """writer.submit options resuming an upsert job from its last committed batch"""
+        checkpoint = self.checkpoint
+        if checkpoint is None or not job_key:
+            return {}
+        return {
+            'offset': checkpoint.offset(job_key),
+            'on_batch': lambda rows: checkpoint.committed(job_key, rows)
+        }
+    
+    def _checkpoint_on_load(self, file_info: Dict, file_result: Dict, quality: Optional[Dict],
+                            futures: List[Future]) -> None:
+        """Checkpoint a file once its last upsert job has landed, if it loaded successfully"""
+        if self.checkpoint is None or not futures:
+            return
         
-        # Step 2: Convert numeric columns
-        for col in df.columns:
-            if col not in ['workbook_name', 'refresh_date'] and 'id' not in col and 'name' not in col:
-                df[col] = self.convert_numeric_tolerant(df[col])
+        def on_done(_):
+            if not all(future.done() for future in futures):
+                return
+            self.finalize_workbook(file_result)
+            if file_result['status'] == 'success':
+                self.checkpoint.complete(file_info, file_result, quality)
         
-        # Step 3: Standardize dates
-        df = self.standardize_dates(df)
+        for future in futures:
+            future.add_done_callback(on_done)
+    
+    @staticmethod
+    def finalize_workbook(file_result: Dict) -> None:
+        """Roll per-sheet results up into the workbook's file result"""
+        sheets = file_result.get('sheets')
+        if sheets is None:
+            return
+        loaded = [sheet for sheet in sheets if sheet['status'] == 'success']
+        failed = [sheet for sheet in sheets if sheet['status'] == 'failed']
         
-        # Step 4: Add metadata
-        df['workbook_name'] = source_name
-        df['refresh_date'] = datetime.now()
+        file_result['rows_processed'] = sum(sheet['rows_processed'] for sheet in loaded)
+        file_result['duplicates_removed'] = sum(sheet['duplicates_removed'] for sheet in loaded)
+        for key in ('inserts', 'updates', 'tombstones'):
+            if any(key in sheet for sheet in loaded):
+                file_result[key] = sum(sheet.get(key, 0) for sheet in loaded)
+        compacted = [sheet['compaction'] for sheet in loaded if 'compaction' in sheet]
+        if compacted:
+            file_result['compaction'] = FrameCompactor.combine(compacted)
         
-        # Step 5: Deduplication
-        initial_rows = len(df)
-        df = df.drop_duplicates()
-        duplicates_removed = initial_rows - len(df)
+        # A failed sheet fails the workbook so the manifest retries it next run
+        file_result['status'] = 'failed' if failed else 'success'
+        file_result['message'] = (
+            f"Upserted {file_result['rows_processed']} rows from {len(loaded)} of {len(sheets)} sheets"
+        )
+        if failed:
+            file_result['message'] += '; ' + '; '.join(
+                f"{sheet['filename']}: {sheet['message']}" for sheet in failed
+            )
+    
+    @staticmethod
+    def quality_for(file_name: str, transformed: Dict) -> Optional[Dict]:
+        """Quality report entries keyed by file (or 'file [sheet]') name"""
+        if 'sheets' in transformed:
+            return {
+                f'{file_name} [{sheet}]': sheet_transformed['quality_metrics']
+                for sheet, sheet_transformed in transformed['sheets'].items()
+                if 'quality_metrics' in sheet_transformed
+            }
+        if 'quality_metrics' in transformed:
+            return {file_name: transformed['quality_metrics']}
+        return None
+    
+    def _complete_load(self, file_result: Dict, transformed: Dict, table_name: str, future: Future) -> None:
+        try:
+            rows_written = future.result()
+        except Exception as e:
+            self._mark_failed(file_result, e)
+            return
         
-        return df, duplicates_removed
+        self.dirty.add(table_name, transformed.pop('touched', ()))
+        file_result['status'] = 'success'
+        file_result['message'] = f'Upserted {rows_written} rows to {table_name}'
+        file_result['rows_processed'] = rows_written
+        file_result['duplicates_removed'] = transformed['duplicates_removed']
+        file_result['quality_score'] = transformed['quality_metrics']['final_quality_score']
+        if 'compaction' in transformed:
+            file_result['compaction'] = transformed['compaction']
+        self._complete_delta(file_result, transformed.get('delta'))
+    
+    def _complete_delta(self, file_result: Dict, delta) -> None:
+        """Report delta counts and make this load the baseline for the next one"""
+        if delta is None:
+            return
+        file_result.update({key: delta.counts[key] for key in ('inserts', 'updates', 'tombstones')})
+        self.delta_store.save(delta)
     
-    def validate_required_columns(self, df: pd.DataFrame, source_type: str) -> Tuple[bool, List[str]]:
+    def _staged_transform(self, file_info: Dict) -> Optional[Dict]:
         """
-        Validate that required columns are present
-        Requirement 1: skip if core missing with alert
+        Ready transform result from the staging cache, or None on a miss
+        Streamed CSVs are never staged - holding the whole frame would defeat streaming
         """
-        if source_type not in self.REQUIRED_COLUMNS:
-            return True, []  # Unknown source type, allow
-        
-        required = self.REQUIRED_COLUMNS[source_type]
-        missing = [col for col in required if col not in df.columns]
+        if self.staging_cache is None or self.should_stream(file_info['name'], file_info['mimeType']):
+            return None
+        try:
+            parts = self.staging_cache.get_parts(file_info['id'], file_info.get('modifiedTime'))
+        except Exception:
+            return None  # unreadable entry - fall back to a fresh download
+        if not parts:
+            return None
         
-        return len(missing) == 0, missing
+        now = datetime.now()
+        transforms = {}
+        for df, metadata in parts:
+            df['refresh_date'] = now
+            transforms[metadata.get('sheet')] = staged = {
+                'status': 'ready',
+                'df': df,
+                'source_type': metadata['source_type'],
+                'duplicates_removed': metadata['duplicates_removed'],
+                'quality_metrics': metadata['quality_metrics']
+            }
+            # Parquet keeps the compact dtypes; parts staged without compaction are compacted now
+            if 'compaction' in metadata:
+                staged['compaction'] = metadata['compaction']
+            elif self.compactor is not None:
+                staged['df'], staged['compaction'] = self.compactor.compact(df)
+        self._count_staging('hits')
+        if None in transforms:
+            return transforms[None]
+        return {'status': 'ready', 'sheets': transforms}
+    
+    def _stage(self, file_info: Dict, transformed: Dict) -> None:
+        """
+        Write a ready transform to the staging cache before it is loaded
+        Workbooks are staged one part per sheet, and only when every sheet is ready
+        """
+        if self.staging_cache is None or transformed['status'] != 'ready':
+            return
+        sheets = transformed.get('sheets', {None: transformed})
+        if any(sheet_transformed['status'] != 'ready' for sheet_transformed in sheets.values()):
+            return
+        try:
+            for sheet, sheet_transformed in sheets.items():
+                metadata = {
+                    'name': file_info['name'],
+                    'source_type': sheet_transformed['source_type'],
+                    'duplicates_removed': sheet_transformed['duplicates_removed'],
+                    'quality_metrics': sheet_transformed['quality_metrics']
+                }
+                if 'compaction' in sheet_transformed:
+                    metadata['compaction'] = sheet_transformed['compaction']
+                if sheet is not None:
+                    metadata['sheet'] = sheet
+                staged = self.staging_cache.put(
+                    file_info['id'], file_info.get('modifiedTime'), sheet_transformed['df'], metadata, sheet
+                )
+        except Exception:
+            # e.g. mixed-type object columns Parquet cannot store - load without staging
+            self.staging_cache.evict(file_info['id'])
+            with self._staging_lock:
+                self._staging_stats['unstaged_tables'].update(
+                    self.get_table_name(sheet_transformed['source_type']) for sheet_transformed in sheets.values()
+                )
+            return
+        if staged is not None:
+            self._count_staging('staged')
+    
+    def _count_staging(self, counter: str) -> None:
+        """Files are staged and replayed from several threads at once"""
+        with self._staging_lock:
+            self._staging_stats[counter] += 1
     
-    def calculate_data_quality_score(self, df: pd.DataFrame) -> Dict:
+    def stream_csv(self, fh, file_name: str, file_result: Dict, file_key: Optional[str] = None) -> Optional[Dict]:
         """
-        Calculate data quality metrics
-        Requirement 8: Data Quality Audit with score %, nulls, zero-rows
+        Streaming CSV path: read, normalize and upsert one chunk at a time
+        Peak memory is bounded by csv_chunksize rows instead of the file size.
+        Duplicates are removed within each chunk; repeats across chunks are
+        absorbed by the upsert conflict key. Returns quality metrics aggregated
+        across chunks, or None when the file is skipped or rejected
         """
-        total_cells = df.shape[0] * df.shape[1]
-        null_cells = df.isnull().sum().sum()
-        null_percentage = (null_cells / total_cells * 100) if total_cells > 0 else 0
+        source_type = self.detect_source_type(file_name)
+        if not source_type:
+            self._apply_transform(file_result, {
+                'status': 'skipped', 'message': 'Could not detect source type from filename'
+            })
+            return None
         
-        # Zero rows check (rows with all zeros)
-        numeric_cols = df.select_dtypes(include=[np.number]).columns
-        if len(numeric_cols) > 0:
-            zero_rows = (df[numeric_cols] == 0).all(axis=1).sum()
-        else:
-            zero_rows = 0
+        # Validate required columns from the header before touching any rows
+        header = self.normalize_columns(pd.read_csv(fh, nrows=0))
+        fh.seek(0)
+        is_valid, missing_cols = self.validate_required_columns(header, source_type)
+        if not is_valid:
+            self._apply_transform(file_result, {
+                'status': 'failed', 'message': f'Missing required columns: {", ".join(missing_cols)}'
+            })
+            return None
         
-        # Completeness score (100% - null%)
-        completeness_score = 100 - null_percentage
+        table_name = self.get_table_name(source_type)
+        delta = self.delta_store.open(table_name, file_key) if self.delta_store is not None and file_key else None
+        profile = None
+        uploads = []
+        touched = []
+        duplicates_removed = 0
         
-        # Critical column penalty
-        critical_cols = ['customer_id', 'balance', 'amount', 'date']
-        critical_nulls = 0
-        for col in critical_cols:
-            if col in df.columns:
-                critical_nulls += df[col].isnull().sum()
+        # Chunk N uploads while chunk N+1 is parsed; the writer queue bounds the overlap
+        # The reader is closed explicitly so an early return leaves fh open for quarantine
+        with pd.read_csv(fh, chunksize=self.csv_chunksize) as reader:
+            for index, chunk in enumerate(reader):
+                # Chunks are drift-checked before normalization; drift stops the upload there
+                schema, drift = self.check_schema(chunk, source_type)
+                if drift:
+                    for upload in uploads:
+                        upload.exception()
+                    self._apply_transform(file_result, self.drift_result(drift, f' in chunk {index + 1}'))
+                    return None
+                if index == 0:
+                    self._learn_schema(source_type, schema, file_name)
+                
+                chunk, chunk_duplicates = self.normalize_dataframe(chunk, file_name)
+                chunk_profile = self.profile_quality(chunk)
+                profile = chunk_profile if profile is None else profile.merge(chunk_profile)
+                if delta is not None:
+                    chunk = delta.diff(chunk)
+                touched.append(DirtyCustomerSet.ids_of(chunk))
+                
+                uploads.append(self.writer.submit(
+                    table_name,
+                    chunk.to_dict(orient='records'),
+                    on_conflict=self.conflict_target(table_name, chunk.columns),
+                    **self._checkpoint_options(f'{file_key}#chunk:{index}' if file_key else None)
+                ))
+                duplicates_removed += chunk_duplicates
         
-        # Penalize critical nulls heavily
-        critical_penalty = (critical_nulls / len(df) * 50) if len(df) > 0 else 0
+        rows_processed = sum(upload.result() for upload in uploads)
+        chunks = len(uploads)
         
-        final_score = max(0, completeness_score - critical_penalty)
+        if profile is None:
+            profile = self.profile_quality(header)
+        quality_metrics = self.score_profile(profile)
         
+        file_result['status'] = 'success'
+        file_result['message'] = f'Upserted {rows_processed} rows to {table_name} in {chunks} chunks'
+        file_result['rows_processed'] = rows_processed
+        file_result['duplicates_removed'] = duplicates_removed
+        file_result['quality_score'] = quality_metrics['final_quality_score']
+        file_result['chunks'] = chunks
+        if delta is not None:
+            touched.append(DirtyCustomerSet.ids_of(delta.tombstones()))
+        for ids in touched:
+            self.dirty.add(table_name, ids)
+        self._complete_delta(file_result, delta)
+        return quality_metrics
+    
+    def _stream_downloaded(self, fh, file_info: Dict, file_result: Dict) -> Optional[Dict]:
+        """Run stream_csv over a spooled download and release the temp file; returns quality entries"""
+        try:
+            fh.seek(0)
+            quality_metrics = self.stream_csv(fh, file_info['name'], file_result, file_info['id'])
+            self._quarantine(file_info, file_result, fh)
+        finally:
+            fh.close()
+        quality = {file_info['name']: quality_metrics} if quality_metrics is not None else None
+        if self.checkpoint is not None and file_result['status'] == 'success':
+            self.checkpoint.complete(file_info, file_result, quality)
+        return quality
+    
+    def _learn_schema(self, source_type: str, schema: Optional[Dict[str, str]], source_name: str) -> None:
+        if self.schema_registry is not None and schema is not None:
+            self.schema_registry.learn(source_type, schema, source_name)
+    
+    def _learn_transform(self, file_name: str, transformed: Dict) -> None:
+        """Extend the schema registry with the columns of a ready transform"""
+        for sheet_transformed in transformed.get('sheets', {None: transformed}).values():
+            if sheet_transformed['status'] == 'ready':
+                self._learn_schema(sheet_transformed['source_type'], sheet_transformed.get('schema'), file_name)
+    
+    def _quarantine(self, file_info: Dict, file_result: Dict, source) -> None:
+        """Copy a drifting file's raw bytes aside when drift_action is 'quarantine'"""
+        if not file_result.get('drift') or self.drift_action != 'quarantine' or self.quarantine_dir is None:
+            return
+        self.quarantine_dir.mkdir(parents=True, exist_ok=True)
+        path = self.quarantine_dir / re.sub(r'[^A-Za-z0-9_.-]', '_', f"{file_info['id']}__{file_info['name']}")
+        with open(path, 'wb') as out:
+            if isinstance(source, bytes):
+                out.write(source)
+            else:
+                source.seek(0)
+                shutil.copyfileobj(source, out)
+        file_result['status'] = 'quarantined'
+        file_result['message'] += f' (quarantined to {path})'
+    
+    @staticmethod
+    def _new_file_result(file_name: str) -> Dict:
         return {
-            'total_rows': len(df),
-            'total_columns': len(df.columns),
-            'null_cells': int(null_cells),
-            'null_percentage': round(null_percentage, 2),
-            'zero_rows': int(zero_rows),
-            'completeness_score': round(completeness_score, 2),
-            'critical_penalty': round(critical_penalty, 2),
-            'final_quality_score': round(final_score, 2)
+            'filename': file_name,
+            'status': 'unknown',
+            'message': '',
+            'rows_processed': 0,
+            'duplicates_removed': 0
         }
     
-    def detect_source_type(self, filename: str) -> Optional[str]:
-        """Detect source type from filename"""
-        filename_lower = filename.lower()
+    def _unchanged_result(self, file_info: Dict) -> Optional[Dict]:
+        """File result for a file the manifest says was already loaded, else None"""
+        if self.manifest is None or not self.manifest.is_unchanged(file_info):
+            return None
+        file_result = self._new_file_result(file_info['name'])
+        file_result['status'] = 'unchanged'
+        file_result['message'] = f"Unchanged since last ingestion (modified {file_info.get('modifiedTime')})"
+        return file_result
+    
+    @staticmethod
+    def _apply_transform(file_result: Dict, transformed: Dict) -> bool:
+        """Copy a skipped/failed transform outcome into the file result; True when ready to load"""
+        if 'parse_seconds' in transformed:
+            file_result['parse_seconds'] = transformed['parse_seconds']
+        if 'drift' in transformed:
+            file_result['drift'] = transformed['drift']
+        if transformed['status'] == 'ready':
+            return True
+        file_result['status'] = transformed['status']
+        file_result['message'] = transformed['message']
+        return False
+    
+    @staticmethod
+    def _mark_failed(file_result: Dict, error: Exception) -> None:
+        file_result['status'] = 'failed'
+        file_result['message'] = f'Error: {str(error)}'
+    
+    def _ingest_file(self, file_info: Dict) -> Tuple[Dict, Optional[Dict]]:
+        """
+        Download, transform and queue one file for upload
+        Returns the file result and its quality report entries (see quality_for).
+        The upload overlaps with the next file; the result is final after writer.close()
+        """
+        unchanged = self._unchanged_result(file_info)
+        if unchanged is not None:
+            return unchanged, None
         
-        type_keywords = {
-            'portfolio': ['portfolio', 'portafolio', 'cartera', 'balances'],
-            'facility': ['facility', 'facilities', 'linea', 'credito', 'limite'],
-            'customer': ['customer', 'cliente', 'clients'],
-            'payment': ['payment', 'pago', 'pagos', 'cobro'],
-            'risk': ['risk', 'riesgo', 'dpd', 'mora'],
-            'revenue': ['revenue', 'ingreso', 'ingresos'],
-            'collections': ['collection', 'cobranza', 'recuperacion'],
-            'marketing': ['marketing', 'adquisicion', 'canal'],
-            'industry': ['industry', 'industria', 'sector']
-        }
+        file_result = self._new_file_result(file_info['name'])
+        quality = None
         
-        for source_type, keywords in type_keywords.items():
-            if any(keyword in filename_lower for keyword in keywords):
-                return source_type
+        try:
+            if self.should_stream(file_info['name'], file_info['mimeType']):
+                fh = self.download_file(
+                    file_info['id'], tempfile.TemporaryFile(), self.STREAM_DOWNLOAD_CHUNK_BYTES
+                )
+                return file_result, self._stream_downloaded(fh, file_info, file_result)
+            
+            staged = self._staged_transform(file_info)
+            if staged is not None:
+                return file_result, self.load_staged(file_info, file_result, staged)
+            fh = self.download_file(file_info['id'])
+            transformed = self.transform_file(fh, file_info['name'], file_info['mimeType'])
+            quality = self.load_transformed(file_info, file_result, transformed, fh)
+        except Exception as e:
+            self._mark_failed(file_result, e)
         
-        return None
+        return file_result, quality
     
-    def get_table_name(self, source_type: str) -> str:
-        """Map source type to Supabase table name"""
-        table_map = {
-            'portfolio': 'raw_portfolios',
-            'facility': 'raw_facilities',
-            'customer': 'raw_customers',
-            'payment': 'raw_payments',
-            'risk': 'raw_risk_events',
-            'revenue': 'raw_revenue',
-            'collections': 'raw_collections',
-            'marketing': 'raw_marketing',
-            'industry': 'raw_industry'
-        }
-        return table_map.get(source_type, 'raw_unknown')
+    def load_staged(self, file_info: Dict, file_result: Dict, staged: Dict) -> Optional[Dict]:
+        """Queue a staging-cache hit for upload; returns its quality entries"""
+        quality = self.quality_for(file_info['name'], staged)
+        try:
+            self._checkpoint_on_load(file_info, file_result, quality, self.load(file_result, staged, file_info['id']))
+        except Exception as e:
+            self._mark_failed(file_result, e)
+        return quality
     
-    def ingest_from_drive(self, folder_id: str) -> Dict:
+    def load_transformed(self, file_info: Dict, file_result: Dict, transformed: Dict, source) -> Optional[Dict]:
         """
-        Main ingestion pipeline: Google Drive → Supabase
-        Returns detailed ingestion report
+        Learn, stage and queue a freshly parsed file for upload, or quarantine
+        it when it drifted; source is its raw content. Returns its quality entries
         """
-        ingestion_report = {
+        quality = self.quality_for(file_info['name'], transformed)
+        self._learn_transform(file_info['name'], transformed)
+        if self._apply_transform(file_result, transformed):
+            try:
+                self._stage(file_info, transformed)
+                futures = self.load(file_result, transformed, file_info['id'])
+                self._checkpoint_on_load(file_info, file_result, quality, futures)
+            except Exception as e:
+                self._mark_failed(file_result, e)
+        else:
+            self._quarantine(file_info, file_result, source)
+        return quality
+    
+    def _ingest_files_concurrently(self, files: List[Dict]) -> List[Tuple[Dict, Optional[Dict]]]:
+        """
+        Pipeline files through bounded per-stage pools
+        Downloads run on threads, parsing/normalization on processes and upserts on
+        the writer threads; streamed CSVs are parsed chunk by chunk on a thread pool.
+        Results are returned in listing order so the report matches the sequential run.
+        """
+        results = [(self._new_file_result(f['name']), None) for f in files]
+        limits = self.concurrency
+        
+        with ThreadPoolExecutor(max_workers=limits['download']) as download_pool, \
+                ProcessPoolExecutor(max_workers=limits['parse']) as parse_pool, \
+                ThreadPoolExecutor(max_workers=limits['upsert']) as stream_pool:
+            pending = {}
+            downloads = {}  # raw bytes kept until parsed, for quarantine
+            for idx, file_info in enumerate(files):
+                unchanged = self._unchanged_result(file_info)
+                staged = self._staged_transform(file_info) if unchanged is None else None
+                if unchanged is not None:
+                    results[idx] = (unchanged, None)
+                elif staged is not None:
+                    # Already normalized for this modifiedTime - straight to the writer
+                    results[idx] = (results[idx][0], self.load_staged(file_info, results[idx][0], staged))
+                elif self.should_stream(file_info['name'], file_info['mimeType']):
+                    future = download_pool.submit(
+                        self.download_file, file_info['id'],
+                        tempfile.TemporaryFile(), self.STREAM_DOWNLOAD_CHUNK_BYTES
+                    )
+                    pending[future] = ('spool', idx)
+                else:
+                    pending[download_pool.submit(self.download_file, file_info['id'])] = ('download', idx)
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, idx = pending.pop(future)
+                    file_info = files[idx]
+                    file_result = results[idx][0]
+                    
+                    try:
+                        value = future.result()
+                    except Exception as e:
+                        downloads.pop(idx, None)
+                        self._mark_failed(file_result, e)
+                        continue
+                    
+                    if stage == 'download':
+                        downloads[idx] = value.getvalue()
+                        parse_future = parse_pool.submit(
+                            _transform_in_worker, downloads[idx], file_info['name'], file_info['mimeType'],
+                            self.options()
+                        )
+                        pending[parse_future] = ('parse', idx)
+                    elif stage == 'spool':
+                        # Streamed CSVs parse and queue upserts chunk by chunk
+                        stream_future = stream_pool.submit(
+                            self._stream_downloaded, value, file_info, file_result
+                        )
+                        pending[stream_future] = ('stream', idx)
+                    elif stage == 'stream':
+                        results[idx] = (file_result, value)
+                    elif stage == 'parse':
+                        quality = self.load_transformed(file_info, file_result, value, downloads.pop(idx))
+                        results[idx] = (file_result, quality)
+        
+        return results
+    
+    def list_files(self, folder: Optional[str] = None) -> List[Dict]:
+        """Files in a source folder with the metadata incremental runs compare"""
+        return self.source.list_files(folder)
+    
+    @staticmethod
+    def new_report() -> Dict:
+        return {
             'total_files': 0,
             'successful': 0,
             'failed': 0,
             'skipped': 0,
+            'unchanged': 0,
+            'quarantined': 0,
             'details': [],
             'quality_scores': {}
         }
+    
+    def begin_run(self, folder: Optional[str], files: List[Dict], resume: bool = False
+                  ) -> Tuple[List[Dict], Dict[str, Tuple[Dict, Optional[Dict]]]]:
+        """
+        Reset per-run counters before the first file is ingested
+        Returns the files to ingest and, when resuming, the results of files the
+        interrupted run already loaded (by file id)
+        """
+        self.writer.reset_stats()
+        self._staging_stats = {'hits': 0, 'staged': 0, 'unstaged_tables': set()}
+        self.dirty = DirtyCustomerSet()
+        if self.checkpoint is None:
+            return files, {}
+        self.checkpoint.start(folder, resume)
+        return self.checkpoint.plan(files)
+    
+    @staticmethod
+    def merge_resumed(files: List[Dict], resumed: Dict[str, Tuple[Dict, Optional[Dict]]],
+                      file_results: List[Tuple[Dict, Optional[Dict]]]) -> List[Tuple[Dict, Optional[Dict]]]:
+        """Resumed and fresh results back in listing order"""
+        fresh = iter(file_results)
+        return [resumed[file_info['id']] if file_info['id'] in resumed else next(fresh) for file_info in files]
+    
+    def complete_report(self, ingestion_report: Dict, files: List[Dict],
+                        file_results: List[Tuple[Dict, Optional[Dict]]]) -> Dict:
+        """
+        Fill the report from final file results (after writer.close()), persist
+        the manifest and schema registry and refresh ML features
+        touched_customers lists the customer ids each raw table received or lost
+        rows for (DirtyCustomerSet); ingestion_logs only gets their counts
+        """
+        for file_result, _ in file_results:
+            self.finalize_workbook(file_result)
+        ingestion_report['upsert_throughput'] = self.writer.stats()
+        ingestion_report['parse'] = {
+            'excel_engine': self.excel_reader.engine,
+            'seconds': round(sum(file_result.get('parse_seconds', 0) for file_result, _ in file_results), 3)
+        }
+        if self.staging_cache is not None:
+            ingestion_report['staging'] = {
+                **self._staging_stats, 'unstaged_tables': sorted(self._staging_stats['unstaged_tables'])
+            }
+        if self.compactor is not None:
+            ingestion_report['compaction'] = FrameCompactor.combine(
+                file_result['compaction'] for file_result, _ in file_results if 'compaction' in file_result
+            )
+        ingestion_report['touched_customers'] = self.dirty.to_dict()
+        if self.delta_store is not None:
+            ingestion_report['delta'] = {
+                key: sum(file_result.get(key, 0) for file_result, _ in file_results)
+                for key in ('inserts', 'updates', 'tombstones')
+            }
+        
+        for file_result, quality in file_results:
+            if quality:
+                ingestion_report['quality_scores'].update(quality)
+            status_counter = self.STATUS_COUNTERS.get(file_result['status'])
+            if status_counter:
+                ingestion_report[status_counter] += 1
+            ingestion_report['details'].append(file_result)
+        
+        # Remember successful loads for the next incremental run
+        if self.manifest is not None:
+            for file_info, (file_result, _) in zip(files, file_results):
+                if file_result['status'] == 'success':
+                    self.manifest.record(file_info, file_result['rows_processed'])
+            self.manifest.save()
+        if self.schema_registry is not None:
+            self.schema_registry.save()
+        
+        if self.checkpoint is not None:
+            ingestion_report['resumed'] = sum(1 for file_result, _ in file_results if file_result.get('resumed'))
+        
+        # Refresh ML features if any data was ingested (or an interrupted run still owes the refresh)
+        if ingestion_report['successful'] > 0 or (self.checkpoint is not None and self.checkpoint.ml_refresh_pending):
+            try:
+                self.sink.call('refresh_ml_features')
+                ingestion_report['ml_features_refreshed'] = True
+            except Exception as e:
+                ingestion_report['ml_features_refreshed'] = False
+                ingestion_report['ml_refresh_error'] = str(e)
+        
+        if self.checkpoint is not None:
+            self.checkpoint.finish(ingestion_report.get('ml_features_refreshed', False), ingestion_report['failed'])
+        return ingestion_report
+    
+    def ingest_from_drive(self, folder_id: str, concurrent: bool = False, resume: bool = False) -> Dict:
+        """Ingest a Drive folder (see ingest)"""
+        return self.ingest(folder_id, concurrent, resume)
+    
+    def ingest(self, folder: Optional[str] = None, concurrent: bool = False, resume: bool = False) -> Dict:
+        """
+        Main ingestion pipeline: source folder → sink (Google Drive → Supabase by default)
+        Set concurrent=True to overlap downloads, parsing and upserts within
+        the limits in self.concurrency. With a checkpoint, resume=True skips the
+        files an interrupted run of this folder already loaded and continues
+        partially uploaded files from their last committed batch.
+        Returns detailed ingestion report, including upsert throughput per table
+        """
+        ingestion_report = self.new_report()
         
         try:
-            # List files in Google Drive folder
-            query = f"'{folder_id}' in parents and trashed = false"
-            results = self.drive.files().list(
-                q=query,
-                fields="files(id, name, mimeType, modifiedTime, size)"
-            ).execute()
-            
-            files = results.get('files', [])
+            # List files in the source folder
+            files = self.list_files(folder)
             ingestion_report['total_files'] = len(files)
             
-            for file_info in files:
-                file_id = file_info['id']
-                file_name = file_info['name']
-                mime_type = file_info['mimeType']
-                
-                file_result = {
-                    'filename': file_name,
-                    'status': 'unknown',
-                    'message': '',
-                    'rows_processed': 0,
-                    'duplicates_removed': 0
-                }
-                
-                try:
-                    # Download file
-                    request = self.drive.files().get_media(fileId=file_id)
-                    fh = io.BytesIO()
-                    downloader = MediaIoBaseDownload(fh, request)
-                    done = False
-                    while not done:
-                        status, done = downloader.next_chunk()
-                    fh.seek(0)
-                    
-                    # Parse file based on type
-                    if mime_type.endswith('spreadsheetml.sheet') or file_name.endswith('.xlsx'):
-                        df = pd.read_excel(fh)
-                    elif mime_type == 'text/csv' or file_name.endswith('.csv'):
-                        df = pd.read_csv(fh)
-                    else:
-                        file_result['status'] = 'skipped'
-                        file_result['message'] = f'Unsupported file type: {mime_type}'
-                        ingestion_report['skipped'] += 1
-                        ingestion_report['details'].append(file_result)
-                        continue
-                    
-                    # Detect source type
-                    source_type = self.detect_source_type(file_name)
-                    if not source_type:
-                        file_result['status'] = 'skipped'
-                        file_result['message'] = 'Could not detect source type from filename'
-                        ingestion_report['skipped'] += 1
-                        ingestion_report['details'].append(file_result)
-                        continue
-                    
-                    # Normalize data
-                    df, duplicates_removed = self.normalize_dataframe(df, file_name)
-                    
-                    # Validate required columns
-                    is_valid, missing_cols = self.validate_required_columns(df, source_type)
-                    if not is_valid:
-                        file_result['status'] = 'failed'
-                        file_result['message'] = f'Missing required columns: {", ".join(missing_cols)}'
-                        ingestion_report['failed'] += 1
-                        ingestion_report['details'].append(file_result)
-                        continue
-                    
-                    # Calculate quality score
-                    quality_metrics = self.calculate_data_quality_score(df)
-                    ingestion_report['quality_scores'][file_name] = quality_metrics
-                    
-                    # Get target table
-                    table_name = self.get_table_name(source_type)
-                    
-                    # Convert to records
-                    data = df.to_dict(orient='records')
-                    
-                    # Upsert to Supabase
-                    # Note: Requires unique constraint on customer_id + date or similar
-                    response = self.supabase.table(table_name).upsert(
-                        data,
-                        on_conflict='id' if 'id' in df.columns else None
-                    ).execute()
-                    
-                    file_result['status'] = 'success'
-                    file_result['message'] = f'Upserted {len(data)} rows to {table_name}'
-                    file_result['rows_processed'] = len(data)
-                    file_result['duplicates_removed'] = duplicates_removed
-                    file_result['quality_score'] = quality_metrics['final_quality_score']
-                    ingestion_report['successful'] += 1
-                    
-                except Exception as e:
-                    file_result['status'] = 'failed'
-                    file_result['message'] = f'Error: {str(e)}'
-                    ingestion_report['failed'] += 1
-                
-                ingestion_report['details'].append(file_result)
-            
-            # Refresh ML features if any data was ingested
-            if ingestion_report['successful'] > 0:
-                try:
-                    self.supabase.rpc('refresh_ml_features').execute()
-                    ingestion_report['ml_features_refreshed'] = True
-                except Exception as e:
-                    ingestion_report['ml_features_refreshed'] = False
-                    ingestion_report['ml_refresh_error'] = str(e)
+            pending, resumed = self.begin_run(folder, files, resume)
+            try:
+                if concurrent:
+                    file_results = self._ingest_files_concurrently(pending)
+                else:
+                    file_results = [self._ingest_file(file_info) for file_info in pending]
+            finally:
+                # Drain queued upserts so every file result is final
+                self.writer.close()
+            file_results = self.merge_resumed(files, resumed, file_results)
+            self.complete_report(ingestion_report, files, file_results)
             
         except Exception as e:
             ingestion_report['error'] = str(e)
         
         return ingestion_report
+    
+    # Report keys with their own ingestion_logs column; everything else goes to run_stats
+    LOG_COLUMNS = ('total_files', 'successful', 'failed', 'skipped', 'details', 'quality_scores')
+    
+    def write_ingestion_log(self, ingestion_report: Dict) -> None:
+        """
+        Insert an ingestion report into the ingestion_logs table
+        touched_customers is logged as a count per table, never the ids
+        """
+        report = json.loads(json.dumps(ingestion_report, default=str))
+        row = {column: report.get(column) for column in self.LOG_COLUMNS}
+        row['error_message'] = report.get('error')
+        row['run_stats'] = {
+            key: value for key, value in report.items() if key not in self.LOG_COLUMNS and key != 'error'
+        }
+        if isinstance(row['run_stats'].get('touched_customers'), dict):
+            row['run_stats']['touched_customers'] = {
+                table: len(ids) if isinstance(ids, list) else ids
+                for table, ids in row['run_stats']['touched_customers'].items()
+            }
+        self.sink.insert('ingestion_logs', row)
+
+
+# Per-process normalizer so detected date formats are reused across files
+_worker_normalizer: Optional[FastNormalizer] = None
+
+
+def _transform_in_worker(content: bytes, file_name: str, mime_type: str, options: Dict) -> Dict:
+    """
+    Process-pool entry point - the transform stage needs no clients
+    options come from FileTransform.options
+    """
+    global _worker_normalizer
+    if options['fast_normalize'] and _worker_normalizer is None:
+        _worker_normalizer = FastNormalizer()
+    transform = FileTransform.from_options(options, _worker_normalizer)
+    return transform.transform_file(io.BytesIO(content), file_name, mime_type)
@@ -0,0 +1,133 @@
+"""
+Ingestion Checkpoint - resumable Drive ingestion
+Records, while a run is in progress, which files finished loading and how many
+rows of each upsert job were committed, so an interrupted run can resume from
+the last committed batch instead of starting the folder again
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+class IngestionCheckpoint:
+    """
+    JSON checkpoint of the current (or last interrupted) run of one folder
+
+    files: Drive id -> modifiedTime, final file result and quality entries of
+    every file that loaded successfully. jobs: upsert job key ('<file id>' or
+    '<file id>#<sheet or chunk>') -> modifiedTime and rows committed. Entries are
+    only reused for the same modifiedTime; offsets are valid because a file
+    version always normalizes to the same rows in the same order (row deltas
+    are diffed against the snapshot of the last *completed* load).
+
+    Writer threads report progress concurrently, so every update takes the
+    lock and the file is rewritten atomically after each committed batch.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._versions: Dict[str, Optional[str]] = {}
+        self.state: Dict = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+
+    # ------------------------------------------------------------------ runs
+
+    def can_resume(self, folder_id: str) -> bool:
+        return self.state.get('folder_id') == folder_id and not self.state.get('completed', True)
+
+    def start(self, folder_id: str, resume: bool = False) -> bool:
+        """Begin a run; True when it continues an interrupted run of folder_id"""
+        with self._lock:
+            resumed = resume and self.can_resume(folder_id)
+            if not resumed:
+                self.state = {
+                    'folder_id': folder_id,
+                    'started_at': datetime.now().isoformat(),
+                    'completed': False,
+                    'ml_refresh_pending': False,
+                    'files': {},
+                    'jobs': {}
+                }
+            self.state['resumed_at'] = datetime.now().isoformat() if resumed else None
+            self._save()
+        return resumed
+
+    def finish(self, ml_refreshed: bool, failed: int) -> None:
+        """
+        Close the run. It stays resumable while files failed or the ML refresh
+        is still owed, so a resume retries exactly that work
+        """
+        with self._lock:
+            self.state['ml_refresh_pending'] = not ml_refreshed and self.state.get('ml_refresh_pending', False)
+            self.state['completed'] = not self.state['ml_refresh_pending'] and not failed
+            self._save()
+
+    @property
+    def ml_refresh_pending(self) -> bool:
+        return bool(self.state.get('ml_refresh_pending'))
+
+    # ------------------------------------------------------------------ files
+
+    def plan(self, files: List[Dict]) -> Tuple[List[Dict], Dict[str, Tuple[Dict, Optional[Dict]]]]:
+        """
+        (files still to ingest, file id -> (file result, quality) of files already loaded)
+        Entries and job offsets of files whose modifiedTime changed are dropped
+        """
+        with self._lock:
+            self._versions = versions = {file_info['id']: file_info.get('modifiedTime') for file_info in files}
+            self.state['files'] = {
+                file_id: entry for file_id, entry in self.state.get('files', {}).items()
+                if versions.get(file_id) == entry['modifiedTime']
+            }
+            self.state['jobs'] = {
+                key: job for key, job in self.state.get('jobs', {}).items()
+                if versions.get(job['file_id']) == job['modifiedTime']
+            }
+            done = {
+                file_id: ({**entry['result'], 'resumed': True}, entry['quality'])
+                for file_id, entry in self.state['files'].items()
+            }
+        return [file_info for file_info in files if file_info['id'] not in done], done
+
+    def complete(self, file_info: Dict, file_result: Dict, quality: Optional[Dict]) -> None:
+        """Remember a successfully loaded file"""
+        with self._lock:
+            self.state['files'][file_info['id']] = {
+                'modifiedTime': file_info.get('modifiedTime'),
+                'result': dict(file_result),
+                'quality': quality
+            }
+            self.state['ml_refresh_pending'] = True
+            self._save()
+
+    # ------------------------------------------------------------------ jobs
+
+    def offset(self, job_key: str) -> int:
+        with self._lock:
+            return self.state['jobs'].get(job_key, {}).get('rows', 0)
+
+    def committed(self, job_key: str, rows: int) -> None:
+        """Record the rows of an upsert job committed so far"""
+        file_id = job_key.partition('#')[0]
+        with self._lock:
+            self.state['jobs'][job_key] = {
+                'file_id': file_id,
+                'modifiedTime': self._versions.get(file_id),
+                'rows': rows
+            }
+            self._save()
+
+    def _save(self) -> None:
+        """Write atomically so an interrupted run never leaves a truncated checkpoint"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, default=str)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,66 @@
+"""
+Ingestion Manifest - incremental Drive ingestion
+Remembers what was last loaded for each Drive file so unchanged files are
+skipped before they are downloaded
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class IngestionManifest:
+    """
+    JSON manifest keyed by Drive file id
+
+    Each entry keeps the modifiedTime, md5Checksum and size reported by the
+    Drive listing plus the row count of the last successful load.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries: Dict[str, Dict] = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('files', {})
+
+    def get(self, file_id: str) -> Optional[Dict]:
+        return self.entries.get(file_id)
+
+    def is_unchanged(self, file_info: Dict) -> bool:
+        """
+        True when the listing matches the last successful load
+        md5Checksum is compared when Drive provides one (binary uploads);
+        Google-native files without a checksum fall back to modifiedTime
+        """
+        entry = self.entries.get(file_info['id'])
+        if not entry:
+            return False
+
+        checksum = file_info.get('md5Checksum')
+        if checksum and entry.get('md5Checksum'):
+            return checksum == entry['md5Checksum']
+
+        modified = file_info.get('modifiedTime')
+        return bool(modified) and modified == entry.get('modifiedTime')
+
+    def record(self, file_info: Dict, rows_processed: int) -> None:
+        """Remember a successful load"""
+        self.entries[file_info['id']] = {
+            'name': file_info.get('name'),
+            'modifiedTime': file_info.get('modifiedTime'),
+            'md5Checksum': file_info.get('md5Checksum'),
+            'size': file_info.get('size'),
+            'rows_processed': rows_processed,
+            'ingested_at': datetime.now().isoformat()
+        }
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a truncated manifest"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'files': self.entries}, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,184 @@
+"""
+Approval Policy Sweep
+Approval rate, expected loss and collateral shortfall of one portfolio under
+a grid of MYPE approval policy variants: every combination of max_pod,
+min_collateral_ratio and collection_rate_threshold values. Each parameter
+drives one independent decline rule of evaluate_facility_approval (POD,
+collateral, high-risk), so per-application pass masks are computed once per
+parameter value and the grid's sums come out of one broadcast matrix
+product instead of one evaluation per variant. Large grids can be sharded
+over a process pool
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .business_rules import ApprovalCode, MYPEBusinessRules
+
+PARAMETERS = ('max_pod', 'min_collateral_ratio', 'collection_rate_threshold')
+METRICS = ('applications', 'approved', 'approval_rate', 'approved_amount', 'expected_loss', 'collateral_shortfall')
+
+
+class ApprovalPolicySweep:
+    """
+    One portfolio decided under a grid of policy variants
+
+    A parameter value of NaN (or a parameter left out) keeps the current
+    policy: the tier's FACILITY_THRESHOLDS value or HIGH_RISK_CRITERIA.
+    max_pod and min_collateral_ratio replace the thresholds of the swept
+    tiers (default: every tier). The current-policy variant approves exactly
+    what evaluate_facility_approval_batch approves.
+
+    Per variant, over the applications it approves:
+    - approved_amount: sum of facility amounts
+    - expected_loss: sum of POD x uncovered exposure (amount above collateral)
+    - collateral_shortfall: sum of required collateral not posted (micro
+      facilities approved under a personal guarantee)
+    """
+
+    # Cells of the (max_pod x min_collateral_ratio) x applications block per step
+    BLOCK_CELLS = 4_000_000
+
+    def __init__(self, applications: pd.DataFrame, tiers: Optional[Iterable[str]] = None):
+        if 'facility_amount' not in applications.columns:
+            raise ValueError("applications need a facility_amount column")
+        rules = MYPEBusinessRules
+        column = rules._metric_column
+        thresholds = rules.FACILITY_THRESHOLDS
+        self.tier_names = list(thresholds)
+        tiers = list(tiers) if tiers is not None else self.tier_names
+        unknown = set(tiers) - set(self.tier_names)
+        if unknown:
+            raise ValueError(f"unknown facility tiers: {sorted(unknown)}")
+        self.swept_tiers = np.isin(self.tier_names, tiers)
+
+        self.amount = column(applications, 'facility_amount', np.nan)
+        self.collateral = column(applications, 'collateral_value', 0.0)
+        pod_column = 'pod' if 'pod' in applications.columns else 'default_risk_score'
+        self.pod = column(applications, pod_column, 0.5)
+
+        # Same tiering as evaluate_facility_approval_batch
+        max_amounts = np.array([thresholds[tier]['max_amount'] for tier in self.tier_names[:-1]], dtype=float)
+        self.tier = np.minimum(np.searchsorted(max_amounts, self.amount, side='left'), len(self.tier_names) - 1)
+        self.micro = self.tier == self.tier_names.index('micro')
+        self.tier_max_pod = np.array([thresholds[tier]['max_pod'] for tier in self.tier_names])
+        self.tier_collateral_ratio = np.array([thresholds[tier]['min_collateral_ratio'] for tier in self.tier_names])
+
+        # Only the collection-rate criterion moves with a variant; the other four are fixed
+        checks = rules._high_risk_checks(applications)
+        collection_check = rules.HIGH_RISK_CODES.index(ApprovalCode.HIGH_RISK_COLLECTION_RATE)
+        self.fixed_high_risk = np.zeros(len(applications), dtype=bool)
+        for position, (mask, _, _) in enumerate(checks):
+            if position != collection_check:
+                self.fixed_high_risk |= mask
+        self.collection_rate = checks[collection_check][1]
+
+        # Variant-independent per-application terms (NaN contributes nothing)
+        self.exposure = np.nan_to_num(self.amount)
+        self.loss = np.nan_to_num(self.pod * np.maximum(self.amount - np.nan_to_num(self.collateral), 0.0))
+
+    def __len__(self) -> int:
+        return len(self.amount)
+
+    def _tier_values(self, values: np.ndarray, defaults: np.ndarray) -> np.ndarray:
+        """(values x tiers) thresholds: the value on swept tiers unless NaN, else the tier default"""
+        override = self.swept_tiers[None, :] & ~np.isnan(values)[:, None]
+        return np.where(override, values[:, None], defaults[None, :])
+
+    def _sums(self, max_pod: np.ndarray, ratio: np.ndarray, threshold: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Grid sums shaped (max_pod, ratio, threshold)
+        An application is approved when it passes all three rules, so a sum
+        over approved applications is sum_n pod_ok[p,n] * collateral_ok[r,n]
+        * risk_ok[k,n] * weight[n]: a (p*r, n) @ (n, k) product per row block
+        """
+        criteria = MYPEBusinessRules.HIGH_RISK_CRITERIA
+        threshold = np.where(np.isnan(threshold), criteria['collection_rate_threshold'], threshold)
+        max_pod_by_tier = self._tier_values(max_pod, self.tier_max_pod)
+        ratio_by_tier = self._tier_values(ratio, self.tier_collateral_ratio)
+        pairs, variants = len(max_pod) * len(ratio), len(threshold)
+
+        totals = np.zeros((pairs, 3 * variants))
+        shortfall_totals = np.zeros((pairs, variants))
+        rows = max(1, self.BLOCK_CELLS // pairs)
+        for start in range(0, len(self), rows):
+            block = slice(start, start + rows)
+            tier, micro, collateral = self.tier[block], self.micro[block], self.collateral[block]
+
+            # Declines: POD above the tier maximum, or (above micro) a collateral shortfall or a high-risk flag
+            pod_ok = ~(self.pod[block] > max_pod_by_tier[:, tier])
+            required = self.amount[block] * ratio_by_tier[:, tier]
+            short = collateral < required
+            collateral_ok = ~(short & ~micro)
+            uncovered = np.where(short & micro, required - collateral, 0.0)
+            high_risk = self.fixed_high_risk[block] | (self.collection_rate[block] < threshold[:, None])
+            risk_ok = (~(high_risk & ~micro)).T.astype(float)
+
+            passed = (pod_ok[:, None, :] & collateral_ok[None, :, :]).reshape(pairs, -1).astype(float)
+            weights = np.concatenate([
+                risk_ok, risk_ok * self.exposure[block, None], risk_ok * self.loss[block, None]
+            ], axis=1)
+            totals += passed @ weights
+            shortfall_totals += (pod_ok[:, None, :] * uncovered[None, :, :]).reshape(pairs, -1) @ risk_ok
+
+        shape = (len(max_pod), len(ratio), variants)
+        approved, approved_amount, expected_loss = (
+            totals[:, part * variants:(part + 1) * variants].reshape(shape) for part in range(3)
+        )
+        return {
+            'approved': approved.round().astype(np.int64),
+            'approved_amount': approved_amount,
+            'expected_loss': expected_loss,
+            'collateral_shortfall': shortfall_totals.reshape(shape)
+        }
+
+    def run(self, max_pod: Optional[Sequence[float]] = None,
+            min_collateral_ratio: Optional[Sequence[float]] = None,
+            collection_rate_threshold: Optional[Sequence[float]] = None,
+            workers: int = 1) -> pd.DataFrame:
+        """
+        Tidy results: one row per combination of the given values with its
+        PARAMETERS and METRICS, in max_pod, min_collateral_ratio,
+        collection_rate_threshold order. workers > 1 shards the longest
+        parameter's values over a process pool; each worker receives the
+        portfolio once
+        """
+        axes: List[np.ndarray] = [
+            np.asarray(list(values), dtype=float) if values is not None else np.array([np.nan])
+            for values in (max_pod, min_collateral_ratio, collection_rate_threshold)
+        ]
+        split = int(np.argmax([len(values) for values in axes]))
+        if workers > 1 and len(axes[split]) > 1:
+            shards = []
+            for values in np.array_split(axes[split], min(workers, len(axes[split]))):
+                shard = list(axes)
+                shard[split] = values
+                shards.append(shard)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self,)) as pool:
+                partials = list(pool.map(_sums_in_worker, shards))
+            sums = {name: np.concatenate([partial[name] for partial in partials], axis=split) for name in partials[0]}
+        else:
+            sums = self._sums(*axes)
+
+        results = pd.MultiIndex.from_product(axes, names=PARAMETERS).to_frame(index=False)
+        results['applications'] = len(self)
+        for name, values in sums.items():
+            results[name] = values.ravel()
+        results['approval_rate'] = results['approved'] / len(self) if len(self) else np.nan
+        return results[list(PARAMETERS) + list(METRICS)]
+
+
+_worker_sweep: Optional[ApprovalPolicySweep] = None
+
+
+def _init_worker(sweep: ApprovalPolicySweep) -> None:
+    """Process-pool initializer: keep the portfolio for every shard this worker runs"""
+    global _worker_sweep
+    _worker_sweep = sweep
+
+
+def _sums_in_worker(axes: List[np.ndarray]) -> Dict[str, np.ndarray]:
+    return _worker_sweep._sums(*axes)
@@ -0,0 +1,179 @@
+"""
+Columnar Data Quality Profiler
+One fused pass per column collects nulls, zeros, distinct values and min/max.
+Profiles of chunks merge into the profile of the whole file, so streamed and
+in-memory ingestion report the same quality numbers. Distinct counts come from
+a fixed-size KMV sketch: exact up to DISTINCT_SKETCH_SIZE values, an estimate
+within a few percent above it
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Columns whose nulls are penalized in the quality score
+CRITICAL_COLUMNS = ['customer_id', 'balance', 'amount', 'date']
+
+# Stamped by normalization rather than read from the source - left out of column summaries
+METADATA_COLUMNS = ('workbook_name', 'refresh_date')
+
+# Smallest value hashes kept per column (k of the KMV distinct-count sketch)
+DISTINCT_SKETCH_SIZE = 4096
+
+
+def _combine(left, right, pick):
+    if left is None:
+        return right
+    if right is None:
+        return left
+    try:
+        return pick(left, right)
+    except TypeError:
+        return None  # chunks inferred incomparable types (e.g. number vs timestamp)
+
+
+def _scalar(value):
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _jsonable(value):
+    return value.isoformat() if isinstance(value, pd.Timestamp) else value
+
+
+def _smallest_hashes(hashes: np.ndarray) -> np.ndarray:
+    """Sorted distinct hashes, cut to the DISTINCT_SKETCH_SIZE smallest"""
+    return np.unique(hashes)[:DISTINCT_SKETCH_SIZE]
+
+
+def _is_numeric(series: pd.Series) -> bool:
+    """Same columns as select_dtypes(include=[np.number]) - bools excluded"""
+    return pd.api.types.is_numeric_dtype(series.dtype) and not pd.api.types.is_bool_dtype(series.dtype)
+
+
+@dataclass
+class ColumnProfile:
+    """Mergeable statistics for one column"""
+    dtype: str
+    count: int = 0
+    nulls: int = 0
+    zeros: int = 0
+    minimum: Any = None
+    maximum: Any = None
+    # KMV sketch: the smallest hashes of the distinct non-null values, sorted
+    value_hashes: np.ndarray = field(default_factory=lambda: np.array([], dtype=np.uint64), repr=False)
+
+    @property
+    def distinct(self) -> int:
+        """Exact while the sketch is not full; else (k - 1) over the k-th smallest hash as a fraction of the hash range"""
+        if len(self.value_hashes) < DISTINCT_SKETCH_SIZE:
+            return len(self.value_hashes)
+        kth = float(self.value_hashes[DISTINCT_SKETCH_SIZE - 1]) / 2.0 ** 64
+        return int(round((DISTINCT_SKETCH_SIZE - 1) / kth))
+
+    @classmethod
+    def from_series(cls, series: pd.Series) -> 'ColumnProfile':
+        profile = cls(dtype=str(series.dtype), count=len(series))
+        null_mask = series.isna().to_numpy()
+        profile.nulls = int(null_mask.sum())
+
+        values = series[~null_mask] if profile.nulls else series
+        if len(values) == 0:
+            return profile
+
+        if _is_numeric(series):
+            profile.zeros = int((values == 0).sum())
+            profile.minimum, profile.maximum = _scalar(values.min()), _scalar(values.max())
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            profile.minimum, profile.maximum = values.min(), values.max()
+
+        # Hash-table unique first, so only the distinct values get hashed
+        uniques = pd.Series(pd.unique(values), dtype=series.dtype)
+        profile.value_hashes = _smallest_hashes(pd.util.hash_pandas_object(uniques, index=False).to_numpy(dtype=np.uint64))
+        return profile
+
+    def merge(self, other: 'ColumnProfile') -> 'ColumnProfile':
+        return ColumnProfile(
+            dtype=self.dtype if self.dtype == other.dtype else 'object',
+            count=self.count + other.count,
+            nulls=self.nulls + other.nulls,
+            zeros=self.zeros + other.zeros,
+            minimum=_combine(self.minimum, other.minimum, min),
+            maximum=_combine(self.maximum, other.maximum, max),
+            # Both sketches hold at most k hashes, so a merge costs O(k) however many chunks came before
+            value_hashes=_smallest_hashes(np.concatenate([self.value_hashes, other.value_hashes]))
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            'dtype': self.dtype,
+            'nulls': self.nulls,
+            'zeros': self.zeros,
+            'distinct': self.distinct,
+            'min': _jsonable(self.minimum),
+            'max': _jsonable(self.maximum)
+        }
+
+
+@dataclass
+class QualityProfile:
+    """
+    Mergeable quality profile of a frame (or of every chunk seen so far)
+
+    zero_rows counts rows where every numeric column is 0, matching the
+    original (df[numeric_cols] == 0).all(axis=1) check; it is accumulated per
+    chunk with a running row mask instead of a full boolean frame.
+    """
+    total_rows: int = 0
+    total_columns: int = 0
+    zero_rows: int = 0
+    columns: Dict[str, ColumnProfile] = field(default_factory=dict)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'QualityProfile':
+        profile = cls(total_rows=len(df), total_columns=len(df.columns))
+        all_zero: Optional[np.ndarray] = None
+
+        for col in df.columns:
+            series = df[col]
+            profile.columns[col] = ColumnProfile.from_series(series)
+            if _is_numeric(series):
+                # pd.NA (nullable dtypes) is skipped by .all(), so it counts as zero; NaN does not
+                is_zero = (series == 0).to_numpy(dtype=bool, na_value=True)
+                all_zero = is_zero if all_zero is None else (all_zero & is_zero)
+
+        profile.zero_rows = int(all_zero.sum()) if all_zero is not None else 0
+        return profile
+
+    def merge(self, other: 'QualityProfile') -> 'QualityProfile':
+        columns = dict(self.columns)
+        for col, column_profile in other.columns.items():
+            columns[col] = columns[col].merge(column_profile) if col in columns else column_profile
+        return QualityProfile(
+            total_rows=self.total_rows + other.total_rows,
+            total_columns=max(self.total_columns, other.total_columns),
+            zero_rows=self.zero_rows + other.zero_rows,
+            columns=columns
+        )
+
+    @property
+    def null_cells(self) -> int:
+        return sum(column.nulls for column in self.columns.values())
+
+    def critical_nulls(self, critical_columns: List[str] = CRITICAL_COLUMNS) -> int:
+        return sum(self.columns[col].nulls for col in critical_columns if col in self.columns)
+
+    def counts(self) -> Dict:
+        """Counts in the shape DataIngestionEngine.score_quality_counts expects"""
+        return {
+            'total_rows': self.total_rows,
+            'total_columns': self.total_columns,
+            'null_cells': self.null_cells,
+            'zero_rows': self.zero_rows,
+            'critical_nulls': self.critical_nulls()
+        }
+
+    def column_summary(self) -> Dict[str, Dict]:
+        """JSON-friendly per-column stats for the source columns"""
+        return {col: column.to_dict() for col, column in self.columns.items() if col not in METADATA_COLUMNS}
@@ -0,0 +1,133 @@
+"""
+Schema Registry - schema-drift detection
+Remembers the column kinds seen for each source type and compares every
+incoming frame's dtype fingerprint against them before normalization, so a
+drifting file is stopped before it costs CPU, network or a corrupted upsert
+"""
+
+import copy
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .fast_normalize import FastNormalizer
+
+# Kinds normalization can reconcile, by column role. Identifier columns must
+# keep their exact kind: customer_id turning into float (blank rows in an
+# integer column) breaks keys, deltas and upsert conflicts.
+COMPATIBLE_KINDS = {
+    'date': {'datetime', 'text'},              # text dates are parsed; numbers would be Excel serials
+    'value': {'integer', 'float', 'text'},     # currency text is converted to numbers
+    'identifier': set()
+}
+
+
+def column_kind(series: pd.Series) -> str:
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype):
+        return 'bool'
+    if pd.api.types.is_integer_dtype(dtype):
+        return 'integer'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'float'
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return 'datetime'
+    return 'text'
+
+
+def column_role(column: str) -> str:
+    """Same column rules normalize_dataframe applies"""
+    if 'date' in column or 'fecha' in column:
+        return 'date'
+    if 'id' in column or 'name' in column:
+        return 'identifier'
+    return 'value'
+
+
+def fingerprint(df: pd.DataFrame) -> Dict[str, str]:
+    """Normalized column name -> kind, from dtypes only (O(columns))"""
+    return {
+        FastNormalizer.normalize_column_name(col): column_kind(df[col])
+        for col in df.columns
+    }
+
+
+class SchemaRegistry:
+    """
+    JSON registry of expected column kinds per source type
+
+    The first file of a source type sets its baseline; later files can add
+    columns but never change a known column's kind. After an intentional
+    schema change, accept() replaces the baseline. Ingestion threads learn
+    while the run pickles snapshot() for worker processes, so every change
+    and copy of the entries holds the registry's lock.
+    """
+
+    def __init__(self, path=None, entries: Optional[Dict] = None):
+        self._lock = threading.RLock()
+        self.path = Path(path) if path else None
+        self.entries: Dict[str, Dict] = entries if entries is not None else {}
+        if entries is None and self.path is not None and self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f).get('source_types', {})
+
+    def expected(self, source_type: str) -> Dict[str, str]:
+        return self.entries.get(source_type, {}).get('columns', {})
+
+    def check(self, source_type: str, df: pd.DataFrame) -> Tuple[Dict[str, str], List[str]]:
+        """
+        (fingerprint, drift issues) for a raw frame of source_type
+        Only columns whose dtype differs from the baseline are looked at further:
+        a column with no values carries no type information and never counts as drift
+        """
+        current = fingerprint(df)
+        expected = self.expected(source_type)
+        issues = []
+        if not expected:
+            return current, issues
+
+        normalized = dict(zip(current, df.columns))
+        for column, kind in current.items():
+            baseline = expected.get(column)
+            if baseline is None or baseline == kind:
+                continue
+            if {baseline, kind} <= COMPATIBLE_KINDS[column_role(column)]:
+                continue
+            if df[normalized[column]].isna().all():
+                continue
+            issues.append(f'{column}: {baseline} -> {kind}')
+        return current, issues
+
+    def learn(self, source_type: str, columns: Dict[str, str], source_name: str) -> None:
+        """Record a baseline, or add columns not seen before for this source type"""
+        with self._lock:
+            entry = self.entries.setdefault(source_type, {'columns': {}, 'first_seen': source_name})
+            for column, kind in columns.items():
+                entry['columns'].setdefault(column, kind)
+            entry['updated_at'] = datetime.now().isoformat()
+
+    def accept(self, source_type: str, columns: Dict[str, str], source_name: str) -> None:
+        """Replace the baseline after an intentional schema change"""
+        with self._lock:
+            self.entries.pop(source_type, None)
+            self.learn(source_type, columns, source_name)
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Deep copy of the entries, consistent even while other threads learn"""
+        with self._lock:
+            return copy.deepcopy(self.entries)
+
+    def save(self) -> None:
+        """Write atomically so an interrupted run never leaves a truncated registry"""
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'source_types': self.snapshot()}, f, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,286 @@
+"""
+Ingestion Sinks
+Where BatchUpsertWriter sends normalized rows: Supabase (PostgREST), a local
+Postgres, Parquet files or SQLite. Each sink turns one batch into one upsert, so
+batching, retries, streaming and checkpoints behave the same on every target
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from supabase import create_client
+    SUPABASE_AVAILABLE = True
+except ImportError:  # pragma: no cover - only SupabaseSink.connect needs the client
+    SUPABASE_AVAILABLE = False
+
+try:
+    import psycopg2
+    from psycopg2 import sql
+    from psycopg2.extras import execute_values
+    PSYCOPG2_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PSYCOPG2_AVAILABLE = False
+
+
+class IngestionSink:
+    """
+    Interface: upsert(table, rows, on_conflict), insert(table, row), call(function)
+    upsert() is called from every writer thread at once; on_conflict is a
+    comma-separated column list, or None for a plain insert.
+    """
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None, **options) -> None:
+        raise NotImplementedError
+
+    def insert(self, table: str, row: Dict) -> None:
+        self.upsert(table, [row])
+
+    def call(self, function: str) -> None:
+        """Run a post-load procedure such as refresh_ml_features (no-op where there is none)"""
+
+
+class SupabaseSink(IngestionSink):
+    """PostgREST upserts through a supabase-py client"""
+
+    def __init__(self, client):
+        self.client = client
+
+    @classmethod
+    def connect(cls, url: str, key: str) -> 'SupabaseSink':
+        if not SUPABASE_AVAILABLE:
+            raise ImportError("supabase is required for SupabaseSink (pip install supabase)")
+        return cls(create_client(url, key))
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None, **options) -> None:
+        # Ingestion never reads the written rows back, so skip echoing them
+        options.setdefault('returning', 'minimal')
+        self.client.table(table).upsert(rows, on_conflict=on_conflict, **options).execute()
+
+    def insert(self, table: str, row: Dict) -> None:
+        self.client.table(table).insert(row).execute()
+
+    def call(self, function: str) -> None:
+        self.client.rpc(function).execute()
+
+
+class PostgresSink(IngestionSink):
+    """
+    Local Postgres with the supabase/migrations schema applied
+    INSERT ... ON CONFLICT (on_conflict) DO UPDATE through execute_values,
+    one connection per writer thread, committed per batch.
+    """
+
+    def __init__(self, dsn: str):
+        if not PSYCOPG2_AVAILABLE:
+            raise ImportError("psycopg2 is required for PostgresSink (pip install psycopg2-binary)")
+        self.dsn = dsn
+        self._thread_local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._thread_local, 'connection', None)
+        if connection is None or connection.closed:
+            connection = psycopg2.connect(self.dsn)
+            self._thread_local.connection = connection
+        return connection
+
+    @staticmethod
+    def _value(value):
+        # NaN/NaT from pandas records are SQL NULLs
+        return None if value is not None and not isinstance(value, (list, dict)) and pd.isna(value) else value
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None, **options) -> None:
+        if not rows:
+            return
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        statement = sql.SQL('INSERT INTO {} ({}) VALUES %s').format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns))
+        )
+        if on_conflict:
+            keys = [key.strip() for key in on_conflict.split(',')]
+            updates = [column for column in columns if column not in keys]
+            action = sql.SQL('DO UPDATE SET {}').format(sql.SQL(', ').join(
+                sql.SQL('{0} = EXCLUDED.{0}').format(sql.Identifier(column)) for column in updates
+            )) if updates else sql.SQL('DO NOTHING')
+            statement = sql.SQL('{} ON CONFLICT ({}) {}').format(
+                statement, sql.SQL(', ').join(map(sql.Identifier, keys)), action
+            )
+        values = [tuple(self._value(row.get(column)) for column in columns) for row in rows]
+
+        connection = self._connection()
+        try:
+            with connection.cursor() as cursor:
+                execute_values(cursor, statement.as_string(connection), values)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+
+    def call(self, function: str) -> None:
+        connection = self._connection()
+        with connection.cursor() as cursor:
+            cursor.execute(sql.SQL('SELECT {}()').format(sql.Identifier(function)))
+        connection.commit()
+
+
+class ParquetSink(IngestionSink):
+    """
+    Append-only Parquet parts, <root>/<table>/part-<n>.parquet per batch
+    Conflict keys are not enforced on write; read_table() applies them (last
+    write wins), so re-sent rows resolve like an upsert.
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._conflict_keys: Dict[str, List[str]] = {}
+        # Continue numbering after the parts of earlier runs
+        self._parts = max((int(path.stem[5:]) for path in self.root.glob('*/part-*.parquet')), default=0)
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None, **options) -> None:
+        if not rows:
+            return
+        with self._lock:
+            self._parts += 1
+            part = self._parts
+            if on_conflict:
+                self._conflict_keys[table] = [key.strip() for key in on_conflict.split(',')]
+        directory = self.root / table
+        directory.mkdir(parents=True, exist_ok=True)
+        pd.DataFrame(rows).to_parquet(directory / f'part-{part:06d}.parquet', index=False)
+
+    def insert(self, table: str, row: Dict) -> None:
+        """Single nested records (ingestion logs) are appended as JSON lines"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.root / f'{table}.jsonl', 'a', encoding='utf-8') as f:
+            f.write(json.dumps(row, default=str) + '\n')
+
+    def read_table(self, table: str, keys: Optional[List[str]] = None) -> pd.DataFrame:
+        """Every part of a table, deduplicated on keys (default: the conflict keys seen on write)"""
+        parts = sorted((self.root / table).glob('part-*.parquet'))
+        if not parts:
+            return pd.DataFrame()
+        df = pd.concat([pd.read_parquet(part) for part in parts], ignore_index=True)
+        keys = keys or self._conflict_keys.get(table)
+        if keys and all(key in df.columns for key in keys):
+            df = df.drop_duplicates(subset=keys, keep='last').reset_index(drop=True)
+        return df
+
+
+class SQLiteSink(IngestionSink):
+    """
+    SQLite database, in memory by default, for offline runs, tests and benchmarks
+    Tables and columns are created from the rows as they arrive, and conflict
+    keys become unique indexes, so upserts resolve like on Postgres. SQLite
+    has one writer at a time: writer threads share one connection under a lock.
+    """
+
+    def __init__(self, path=':memory:'):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._columns: Dict[str, List[str]] = {}
+        self._indexes = set()
+
+    @staticmethod
+    def _quote(name: str) -> str:
+        return '"' + name.replace('"', '""') + '"'
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, (list, dict)):
+            return json.dumps(value, default=str)
+        if value is None or pd.isna(value):
+            return None
+        if isinstance(value, (datetime, date)):
+            return value.isoformat()
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def _ensure_columns(self, table: str, columns: List[str]) -> None:
+        """Create the table or add the columns it does not have yet (untyped, SQLite-style)"""
+        known = self._columns.get(table)
+        if known is None:
+            rows = self._connection.execute(f'PRAGMA table_info({self._quote(table)})').fetchall()
+            known = self._columns[table] = [row[1] for row in rows]
+        if not known:
+            self._connection.execute(
+                f'CREATE TABLE {self._quote(table)} ({", ".join(map(self._quote, columns))})'
+            )
+            known.extend(columns)
+            return
+        for column in columns:
+            if column not in known:
+                self._connection.execute(
+                    f'ALTER TABLE {self._quote(table)} ADD COLUMN {self._quote(column)}'
+                )
+                known.append(column)
+
+    def _ensure_index(self, table: str, keys: List[str]) -> None:
+        if (table, tuple(keys)) in self._indexes:
+            return
+        name = self._quote('__'.join([table, *keys, 'key']))
+        self._connection.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {self._quote(table)} ({", ".join(map(self._quote, keys))})'
+        )
+        self._indexes.add((table, tuple(keys)))
+
+    def upsert(self, table: str, rows: List[Dict], on_conflict: Optional[str] = None, **options) -> None:
+        if not rows:
+            return
+        columns = list(dict.fromkeys(column for row in rows for column in row))
+        statement = (
+            f'INSERT INTO {self._quote(table)} ({", ".join(map(self._quote, columns))}) '
+            f'VALUES ({", ".join("?" for _ in columns)})'
+        )
+        keys = [key.strip() for key in on_conflict.split(',')] if on_conflict else []
+        if keys:
+            updates = [column for column in columns if column not in keys]
+            action = 'DO UPDATE SET ' + ', '.join(
+                f'{self._quote(column)} = excluded.{self._quote(column)}' for column in updates
+            ) if updates else 'DO NOTHING'
+            statement += f' ON CONFLICT ({", ".join(map(self._quote, keys))}) {action}'
+        values = [tuple(self._value(row.get(column)) for column in columns) for row in rows]
+
+        with self._lock:
+            try:
+                self._ensure_columns(table, columns)
+                if keys:
+                    self._ensure_index(table, keys)
+                self._connection.executemany(statement, values)
+                self._connection.commit()
+            except Exception:
+                self._connection.rollback()
+                raise
+
+    def read_table(self, table: str) -> pd.DataFrame:
+        with self._lock:
+            if not self._connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone():
+                return pd.DataFrame()
+            return pd.read_sql_query(f'SELECT * FROM {self._quote(table)}', self._connection)
+
+    def row_count(self, table: str) -> int:
+        with self._lock:
+            try:
+                return self._connection.execute(f'SELECT COUNT(*) FROM {self._quote(table)}').fetchone()[0]
+            except sqlite3.OperationalError:
+                return 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+
+
+def as_sink(target) -> IngestionSink:
+    """An IngestionSink as-is; anything else is taken to be a supabase-py client"""
+    return target if isinstance(target, IngestionSink) else SupabaseSink(target)
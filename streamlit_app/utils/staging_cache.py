@@ -0,0 +1,119 @@
+"""
+Parquet Staging Cache
+Normalized Drive files are written once as Parquet, keyed by file id and
+modifiedTime, so re-runs and notebooks load memory-mapped Arrow data instead
+of re-parsing the raw workbooks
+"""
+
+import json
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    PYARROW_AVAILABLE = False
+
+# Schema metadata key holding the ingestion metadata of a staged file
+METADATA_KEY = b'abaco'
+
+
+def _safe(value: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]', '_', value)
+
+
+class ParquetStagingCache:
+    """
+    Layout: <root>/<file_id>/<modifiedTime>.parquet, or one
+    <modifiedTime>__<sheet>.parquet part per sheet of a multi-sheet workbook
+
+    Only the latest version of each file is kept. Each Parquet file carries the
+    Drive name, source type, duplicates removed and quality metrics in its schema
+    metadata so a cache hit can replace the whole download/parse/normalize stage.
+    """
+
+    def __init__(self, root):
+        if not PYARROW_AVAILABLE:
+            raise ImportError("pyarrow is required for the Parquet staging cache (pip install pyarrow)")
+        self.root = Path(root)
+
+    def path_for(self, file_id: str, modified_time: str, part: Optional[str] = None) -> Path:
+        name = _safe(modified_time) + (f'__{_safe(part)}' if part else '')
+        return self.root / _safe(file_id) / f'{name}.parquet'
+
+    def _is_version(self, path: Path, modified_time: str) -> bool:
+        version = _safe(modified_time)
+        return path.stem == version or path.stem.startswith(f'{version}__')
+
+    def part_paths(self, file_id: str, modified_time: Optional[str]) -> List[Path]:
+        """Staged parts of this exact file version ([] on a miss)"""
+        if not modified_time:
+            return []
+        directory = self.root / _safe(file_id)
+        return sorted(path for path in directory.glob('*.parquet') if self._is_version(path, modified_time))
+
+    def has(self, file_id: str, modified_time: Optional[str]) -> bool:
+        return bool(self.part_paths(file_id, modified_time))
+
+    def get_table(self, file_id: str, modified_time: Optional[str], part: Optional[str] = None) -> Optional['pa.Table']:
+        """Memory-mapped Arrow table for this exact file version, or None"""
+        if not modified_time:
+            return None
+        path = self.path_for(file_id, modified_time, part)
+        return pq.read_table(path, memory_map=True) if path.exists() else None
+
+    def get(self, file_id: str, modified_time: Optional[str], part: Optional[str] = None) -> Optional[Tuple[pd.DataFrame, Dict]]:
+        """(DataFrame, metadata) for this exact file version, or None"""
+        table = self.get_table(file_id, modified_time, part)
+        if table is None:
+            return None
+        return table.to_pandas(split_blocks=True), self.read_metadata(table.schema)
+
+    def get_parts(self, file_id: str, modified_time: Optional[str]) -> List[Tuple[pd.DataFrame, Dict]]:
+        """(DataFrame, metadata) for every staged part of this file version"""
+        parts = []
+        for path in self.part_paths(file_id, modified_time):
+            table = pq.read_table(path, memory_map=True)
+            parts.append((table.to_pandas(split_blocks=True), self.read_metadata(table.schema)))
+        return parts
+
+    @staticmethod
+    def read_metadata(schema: 'pa.Schema') -> Dict:
+        raw = (schema.metadata or {}).get(METADATA_KEY)
+        return json.loads(raw) if raw else {}
+
+    def put(self, file_id: str, modified_time: Optional[str], df: pd.DataFrame, metadata: Dict,
+            part: Optional[str] = None) -> Optional[Path]:
+        """Stage a normalized frame (or one sheet of it), replacing older versions of the same file"""
+        if not modified_time:
+            return None
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        schema_metadata = dict(table.schema.metadata or {})
+        schema_metadata[METADATA_KEY] = json.dumps({**metadata, 'modifiedTime': modified_time}, default=str).encode()
+        table = table.replace_schema_metadata(schema_metadata)
+
+        path = self.path_for(file_id, modified_time, part)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix('.tmp')
+        pq.write_table(table, tmp_path)
+        tmp_path.replace(path)
+
+        for stale in path.parent.glob('*.parquet'):
+            if not self._is_version(stale, modified_time):
+                stale.unlink()
+        return path
+
+    def entries(self) -> Iterator[Tuple[Path, Dict]]:
+        """(path, metadata) for every staged file - reads schemas only"""
+        for path in sorted(self.root.glob('*/*.parquet')):
+            yield path, self.read_metadata(pq.read_schema(path))
+
+    def evict(self, file_id: str) -> None:
+        shutil.rmtree(self.root / _safe(file_id), ignore_errors=True)
@@ -0,0 +1,244 @@
+"""
+Streaming Statistics
+Mergeable partial states for count/mean/variance/min/max (Welford, merged
+chunk by chunk with Chan's parallel formula) and quantiles (a merging
+t-digest). Chunks of a file, partitions of a dataset or results of worker
+processes each summarize their own values; merging the partials gives the
+statistics of the whole without holding every value at once
+
+Accuracy of merged results:
+- count, min, max: exact
+- mean, variance/std: exact up to float64 rounding, independent of how the
+  values were split
+- quantiles (median): exact while a digest holds at most exact_limit values;
+  beyond that the rank error is within pi / (2 * compression) of the count
+  (under 0.8% at the default compression of 200) per merge level
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+
+def _finite(values) -> np.ndarray:
+    """float64 values without NaN (pandas' skipna semantics)"""
+    if isinstance(values, (pd.Series, pd.Index)):
+        values = pd.to_numeric(values, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    values = np.asarray(values, dtype=float).ravel()
+    return values[~np.isnan(values)]
+
+
+@dataclass
+class RunningMoments:
+    """Count, mean, sum of squared deviations (m2), min and max of the values seen"""
+    count: int = 0
+    mean: float = 0.0
+    m2: float = 0.0
+    minimum: float = np.nan
+    maximum: float = np.nan
+
+    @classmethod
+    def from_values(cls, values) -> 'RunningMoments':
+        values = _finite(values)
+        if len(values) == 0:
+            return cls()
+        mean = float(values.mean())
+        return cls(
+            count=len(values),
+            mean=mean,
+            m2=float(np.square(values - mean).sum()),
+            minimum=float(values.min()),
+            maximum=float(values.max())
+        )
+
+    def update(self, values) -> 'RunningMoments':
+        return self.merge(RunningMoments.from_values(values))
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            return other
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        return RunningMoments(
+            count=count,
+            mean=self.mean + delta * other.count / count,
+            m2=self.m2 + other.m2 + delta * delta * self.count * other.count / count,
+            minimum=min(self.minimum, other.minimum),
+            maximum=max(self.maximum, other.maximum)
+        )
+
+    def subtract(self, other: 'RunningMoments') -> 'RunningMoments':
+        """
+        Retract values merged in earlier (inverse of merge)
+        min/max cannot be retracted and stay as bounds of what was ever seen
+        """
+        count = self.count - other.count
+        if count < 0:
+            raise ValueError("cannot retract more values than were merged")
+        if count == 0:
+            return RunningMoments()
+        if other.count == 0:
+            return self
+        mean = (self.count * self.mean - other.count * other.mean) / count
+        delta = other.mean - mean
+        m2 = self.m2 - other.m2 - delta * delta * count * other.count / self.count
+        return RunningMoments(count=count, mean=mean, m2=max(m2, 0.0),
+                              minimum=self.minimum, maximum=self.maximum)
+
+    def variance(self, ddof: int = 1) -> float:
+        return self.m2 / (self.count - ddof) if self.count > ddof else np.nan
+
+    def std(self, ddof: int = 1) -> float:
+        return float(np.sqrt(self.variance(ddof)))
+
+    def mean_or_nan(self) -> float:
+        return self.mean if self.count else np.nan
+
+    def to_dict(self) -> Dict:
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2,
+                'min': None if np.isnan(self.minimum) else self.minimum,
+                'max': None if np.isnan(self.maximum) else self.maximum}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'RunningMoments':
+        return cls(
+            count=int(state['count']), mean=float(state['mean']), m2=float(state['m2']),
+            minimum=np.nan if state.get('min') is None else float(state['min']),
+            maximum=np.nan if state.get('max') is None else float(state['max'])
+        )
+
+
+@dataclass
+class TDigest:
+    """
+    Merging t-digest: sorted centroids (mean, weight) under the k1 scale
+    function, small at the tails and at most 1 unit of k wide elsewhere
+
+    Until more than exact_limit values have been merged every value is kept
+    as its own centroid, so quantiles match numpy/pandas exactly.
+    """
+    compression: float = 200.0
+    exact_limit: int = 2000
+    means: np.ndarray = field(default_factory=lambda: np.array([], dtype=float), repr=False)
+    weights: np.ndarray = field(default_factory=lambda: np.array([], dtype=float), repr=False)
+    minimum: float = np.nan
+    maximum: float = np.nan
+
+    @property
+    def count(self) -> int:
+        return int(round(self.weights.sum()))
+
+    @property
+    def exact(self) -> bool:
+        return bool(np.all(self.weights == 1))
+
+    @classmethod
+    def from_values(cls, values, compression: float = 200.0, exact_limit: int = 2000) -> 'TDigest':
+        values = np.sort(_finite(values))
+        digest = cls(compression, exact_limit, values, np.ones(len(values)))
+        if len(values):
+            digest.minimum, digest.maximum = float(values[0]), float(values[-1])
+        return digest if len(values) <= exact_limit else digest._compressed()
+
+    def update(self, values) -> 'TDigest':
+        return self.merge(TDigest.from_values(values, self.compression, self.exact_limit))
+
+    def merge(self, other: 'TDigest') -> 'TDigest':
+        if len(other.weights) == 0:
+            return self
+        if len(self.weights) == 0:
+            return other
+        means = np.concatenate([self.means, other.means])
+        weights = np.concatenate([self.weights, other.weights])
+        order = np.argsort(means, kind='stable')
+        digest = TDigest(self.compression, self.exact_limit, means[order], weights[order],
+                         min(self.minimum, other.minimum), max(self.maximum, other.maximum))
+        if digest.exact and len(means) <= self.exact_limit:
+            return digest
+        return digest._compressed()
+
+    def _compressed(self) -> 'TDigest':
+        """Merge neighbouring centroids that fall in the same unit of k1(q)"""
+        total = self.weights.sum()
+        cumulative = np.cumsum(self.weights)
+        q = (cumulative - self.weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)
+        _, bins = np.unique(np.floor(k), return_inverse=True)
+        weights = np.bincount(bins, weights=self.weights)
+        means = np.bincount(bins, weights=self.weights * self.means) / weights
+        return TDigest(self.compression, self.exact_limit, means, weights, self.minimum, self.maximum)
+
+    def quantile(self, q: float) -> float:
+        if len(self.weights) == 0:
+            return np.nan
+        if self.exact:
+            return float(np.quantile(self.means, q))
+        # Centroid centres at their cumulative mid-weight, pinned to min/max at the ends
+        total = self.weights.sum()
+        centres = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0.0], centres, [total]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return float(np.interp(q * total, positions, values))
+
+    def median(self) -> float:
+        return self.quantile(0.5)
+
+    def to_dict(self) -> Dict:
+        return {'compression': self.compression, 'exact_limit': self.exact_limit,
+                'means': self.means.tolist(), 'weights': self.weights.tolist(),
+                'min': None if np.isnan(self.minimum) else self.minimum,
+                'max': None if np.isnan(self.maximum) else self.maximum}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> 'TDigest':
+        return cls(
+            state['compression'], state['exact_limit'],
+            np.asarray(state['means'], dtype=float), np.asarray(state['weights'], dtype=float),
+            np.nan if state.get('min') is None else float(state['min']),
+            np.nan if state.get('max') is None else float(state['max'])
+        )
+
+
+@dataclass
+class StreamingStats:
+    """Moments and a digest of the same values: max, mean, median, std in one pass"""
+    moments: RunningMoments = field(default_factory=RunningMoments)
+    digest: TDigest = field(default_factory=TDigest)
+
+    @classmethod
+    def from_values(cls, values, compression: float = 200.0) -> 'StreamingStats':
+        values = _finite(values)
+        return cls(RunningMoments.from_values(values), TDigest.from_values(values, compression))
+
+    def update(self, values) -> 'StreamingStats':
+        return self.merge(StreamingStats.from_values(values, self.digest.compression))
+
+    def merge(self, other: 'StreamingStats') -> 'StreamingStats':
+        return StreamingStats(self.moments.merge(other.moments), self.digest.merge(other.digest))
+
+    @classmethod
+    def merge_all(cls, partials: Iterable['StreamingStats']) -> 'StreamingStats':
+        merged: Optional[StreamingStats] = None
+        for partial in partials:
+            merged = partial if merged is None else merged.merge(partial)
+        return merged if merged is not None else cls()
+
+    @property
+    def count(self) -> int:
+        return self.moments.count
+
+    def summary(self) -> Dict[str, float]:
+        """NaN for statistics the values do not define (e.g. std of one value)"""
+        moments = self.moments
+        return {
+            'count': moments.count,
+            'min': moments.minimum,
+            'max': moments.maximum,
+            'mean': moments.mean_or_nan(),
+            'median': self.digest.median(),
+            'std': moments.std()
+        }
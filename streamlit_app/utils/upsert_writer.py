@@ -0,0 +1,188 @@
+"""
+Batched Upsert Writer
+Splits large upserts into PostgREST-sized batches, overlaps them with parsing
+through a small bounded queue and retries failed batches with jittered backoff.
+Batches go to an IngestionSink (Supabase by default, see sinks.py)
+"""
+
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional
+
+from .sinks import as_sink
+
+
+class BatchUpsertWriter:
+    """
+    Background upsert writer with backpressure
+
+    submit() enqueues one job (a table plus its rows) and returns a Future that
+    resolves to the number of rows written. Worker threads drain the queue in
+    batches of batch_size rows. When max_pending jobs are already queued,
+    submit() blocks, so producers can run at most one step ahead of the uploads.
+
+    A job can start at offset (rows committed by an interrupted run) and report
+    progress through on_batch(committed_rows) after every batch that lands.
+    """
+
+    def __init__(
+        self,
+        sink,
+        batch_size: int = 500,
+        max_pending: int = 2,
+        workers: int = 1,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0
+    ):
+        # A supabase-py client is wrapped in a SupabaseSink
+        self.sink = as_sink(sink)
+        self.batch_size = max(1, int(batch_size))
+        self.max_pending = max(1, int(max_pending))
+        self.workers = max(1, int(workers))
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._queue: Optional[queue.Queue] = None
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # ------------------------------------------------------------------ lifecycle
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._threads:
+                return
+            self._queue = queue.Queue(maxsize=self.max_pending)
+            self._threads = [
+                threading.Thread(target=self._run, name=f'upsert-writer-{i}', daemon=True)
+                for i in range(self.workers)
+            ]
+            for thread in self._threads:
+                thread.start()
+
+    def close(self) -> None:
+        """Wait for queued jobs to finish and stop the worker threads"""
+        with self._lock:
+            threads, work_queue = self._threads, self._queue
+            self._threads, self._queue = [], None
+        if not threads:
+            return
+        for _ in threads:
+            work_queue.put(None)
+        for thread in threads:
+            thread.join()
+
+    # ------------------------------------------------------------------ producers
+
+    def submit(
+        self,
+        table: str,
+        rows: List[Dict],
+        on_conflict: Optional[str] = None,
+        offset: int = 0,
+        on_batch: Optional[Callable[[int], None]] = None,
+        **upsert_options
+    ) -> Future:
+        """Queue rows for upsert; blocks while max_pending jobs are waiting"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((future, table, rows, on_conflict, offset, on_batch, upsert_options))
+        return future
+
+    def write(
+        self,
+        table: str,
+        rows: List[Dict],
+        on_conflict: Optional[str] = None,
+        offset: int = 0,
+        on_batch: Optional[Callable[[int], None]] = None,
+        **upsert_options
+    ) -> int:
+        """
+        Upsert rows[offset:] in batches on the calling thread
+        Returns the rows committed for the job, offset included
+        """
+        committed = min(max(0, int(offset)), len(rows))
+        for start in range(committed, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            self._upsert_batch(table, batch, on_conflict, upsert_options)
+            committed += len(batch)
+            if on_batch is not None:
+                on_batch(committed)
+        return committed
+
+    # ------------------------------------------------------------------ workers
+
+    def _run(self) -> None:
+        work_queue = self._queue
+        while True:
+            job = work_queue.get()
+            if job is None:
+                return
+            future, table, rows, on_conflict, offset, on_batch, upsert_options = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.write(table, rows, on_conflict, offset, on_batch, **upsert_options))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _upsert_batch(self, table: str, batch: List[Dict], on_conflict: Optional[str], upsert_options: Dict) -> None:
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                self.sink.upsert(table, batch, on_conflict, **upsert_options)
+            except Exception:
+                self._record(table, 0, time.perf_counter() - started, retried=True)
+                if attempt >= self.max_retries:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            self._record(table, len(batch), time.perf_counter() - started)
+            return
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    # ------------------------------------------------------------------ metrics
+
+    def _record(self, table: str, rows: int, seconds: float, retried: bool = False) -> None:
+        with self._lock:
+            entry = self._stats.setdefault(table, {'rows': 0, 'batches': 0, 'retries': 0, 'seconds': 0.0})
+            entry['seconds'] += seconds
+            if retried:
+                entry['retries'] += 1
+            else:
+                entry['rows'] += rows
+                entry['batches'] += 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-table rows, batches, retries and rows/second of upsert time"""
+        with self._lock:
+            return {
+                table: {
+                    **entry,
+                    'seconds': round(entry['seconds'], 3),
+                    'rows_per_second': round(entry['rows'] / entry['seconds'], 1) if entry['seconds'] > 0 else 0.0
+                }
+                for table, entry in self._stats.items()
+            }
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {}
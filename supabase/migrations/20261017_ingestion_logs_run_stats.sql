@@ -0,0 +1,4 @@
+-- Full ingestion reports from the headless runner (streamlit_app/run_ingestion.py):
+-- counters and stats without a column of their own (unchanged, quarantined,
+-- row delta, parse timing, staging hits, upsert throughput, ML refresh)
+ALTER TABLE ingestion_logs ADD COLUMN IF NOT EXISTS run_stats JSONB;
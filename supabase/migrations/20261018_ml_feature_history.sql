@@ -0,0 +1,134 @@
+-- ================================================================
+-- ML FEATURE HISTORY (append-only, partitioned by snapshot month)
+-- ================================================================
+-- ml_feature_snapshots keeps one row per customer and is overwritten by every
+-- refresh. streamlit_app/run_ingestion.py --build-features --history-table also
+-- inserts each recomputed row here under the run's snapshot_date, so training
+-- and drift checks can read features as of any past date.
+
+CREATE TABLE IF NOT EXISTS ml_feature_history (
+    customer_id TEXT NOT NULL,
+    snapshot_date DATE NOT NULL,
+    name TEXT,
+
+    -- Customer classification
+    customer_type TEXT,
+    is_b2g INTEGER,
+    segment TEXT,
+
+    -- Balance metrics
+    total_balance NUMERIC(15,2),
+    avg_balance NUMERIC(15,2),
+    max_balance NUMERIC(15,2),
+
+    -- Facility metrics
+    total_limit NUMERIC(15,2),
+    num_facilities INTEGER,
+    utilization NUMERIC(5,4),
+
+    -- Payment metrics
+    total_payments NUMERIC(15,2),
+    avg_payment NUMERIC(15,2),
+    num_payments INTEGER,
+    payment_ratio NUMERIC(5,4),
+
+    -- DPD statistics
+    dpd_max INTEGER,
+    dpd_mean NUMERIC(10,2),
+    dpd_median NUMERIC(10,2),
+    dpd_std NUMERIC(10,2),
+    dpd_bucket TEXT,
+    is_delinquent INTEGER,
+
+    -- Revenue metrics
+    total_revenue NUMERIC(15,2),
+    avg_revenue NUMERIC(15,2),
+
+    -- Collection metrics
+    total_collected NUMERIC(15,2),
+    collection_rate NUMERIC(5,4),
+
+    -- Marketing metrics
+    channel TEXT,
+    acquisition_date TIMESTAMP,
+    customer_age_months NUMERIC(10,2),
+
+    -- Industry
+    industry_code TEXT,
+
+    -- Z-scores
+    total_balance_zscore NUMERIC(10,4),
+    utilization_zscore NUMERIC(10,4),
+    dpd_mean_zscore NUMERIC(10,4),
+    payment_ratio_zscore NUMERIC(10,4),
+    total_revenue_zscore NUMERIC(10,4),
+
+    -- Derived metrics
+    ltv NUMERIC(15,2),
+    churn_risk_score NUMERIC(5,4),
+    default_risk_score NUMERIC(5,4),
+    activity_score NUMERIC(5,4),
+    profitability_score NUMERIC(10,4),
+
+    -- Metadata
+    feature_snapshot_date TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+
+    PRIMARY KEY (customer_id, snapshot_date)
+) PARTITION BY RANGE (snapshot_date);
+
+-- Rows outside every monthly partition land here instead of failing the insert
+CREATE TABLE IF NOT EXISTS ml_feature_history_default PARTITION OF ml_feature_history DEFAULT;
+
+-- Monthly partitions from the current month through months_ahead months ahead
+CREATE OR REPLACE FUNCTION create_ml_feature_history_partitions(months_ahead INTEGER DEFAULT 3)
+RETURNS void
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    month_start DATE;
+BEGIN
+    FOR offset_months IN 0..months_ahead LOOP
+        month_start := (date_trunc('month', NOW()) + make_interval(months => offset_months))::DATE;
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS %I PARTITION OF ml_feature_history FOR VALUES FROM (%L) TO (%L)',
+            'ml_feature_history_' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            (month_start + INTERVAL '1 month')::DATE
+        );
+    END LOOP;
+END;
+$$;
+
+SELECT create_ml_feature_history_partitions();
+
+SELECT cron.schedule(
+  'monthly-ml-feature-history-partitions',
+  '0 0 1 * *',
+  $$
+    SELECT create_ml_feature_history_partitions();
+  $$
+);
+
+-- Point-in-time lookup: for each (customer_id, as_of) pair, the customer's
+-- latest snapshot on or before as_of (no row when there is none yet)
+CREATE OR REPLACE FUNCTION ml_features_as_of(customer_ids TEXT[], as_of_dates DATE[])
+RETURNS TABLE (customer_id TEXT, as_of DATE, features JSONB)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT requested.customer_id, requested.as_of, to_jsonb(snapshot)
+    FROM unnest(customer_ids, as_of_dates) AS requested(customer_id, as_of)
+    CROSS JOIN LATERAL (
+        SELECT history.*
+        FROM ml_feature_history history
+        WHERE history.customer_id = requested.customer_id
+          AND history.snapshot_date <= requested.as_of
+        ORDER BY history.snapshot_date DESC
+        LIMIT 1
+    ) snapshot;
+$$;
+
+ALTER TABLE ml_feature_history ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Service role full access" ON ml_feature_history FOR ALL USING (auth.role() = 'service_role');
@@ -0,0 +1,39 @@
+-- ================================================================
+-- RAW TABLE BUSINESS KEYS (upsert conflict targets)
+-- ================================================================
+-- streamlit_app.py upserts with on_conflict set to
+-- DataIngestionEngine.SUPABASE_CONFLICT_KEYS. PostgREST rejects a conflict
+-- target without a matching unique index (42P10), so each of those tables
+-- gets one here. Rows loaded before this migration may repeat a key; the
+-- most recently refreshed copy is kept, as the upsert would have done.
+-- raw_risk_events, raw_revenue and raw_collections keep inserting on id:
+-- their date column is event_date/revenue_date/collection_date, not the
+-- normalized 'date' their business key uses.
+
+-- raw_customers.customer_id is already UNIQUE (20241110_abaco_schema.sql)
+
+DELETE FROM raw_portfolios a USING raw_portfolios b
+WHERE a.customer_id = b.customer_id AND a.date = b.date
+  AND (COALESCE(a.refresh_date, '-infinity'), a.ctid) < (COALESCE(b.refresh_date, '-infinity'), b.ctid);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_raw_portfolios_customer_date ON raw_portfolios(customer_id, date);
+
+DELETE FROM raw_facilities a USING raw_facilities b
+WHERE a.facility_id = b.facility_id
+  AND (COALESCE(a.refresh_date, '-infinity'), a.ctid) < (COALESCE(b.refresh_date, '-infinity'), b.ctid);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_raw_facilities_facility ON raw_facilities(facility_id);
+
+DELETE FROM raw_payments a USING raw_payments b
+WHERE a.payment_id = b.payment_id
+  AND (COALESCE(a.refresh_date, '-infinity'), a.ctid) < (COALESCE(b.refresh_date, '-infinity'), b.ctid);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_raw_payments_payment ON raw_payments(payment_id);
+
+DELETE FROM raw_marketing a USING raw_marketing b
+WHERE a.customer_id = b.customer_id AND a.channel = b.channel AND a.acquisition_date = b.acquisition_date
+  AND (COALESCE(a.refresh_date, '-infinity'), a.ctid) < (COALESCE(b.refresh_date, '-infinity'), b.ctid);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_raw_marketing_customer_channel_date
+    ON raw_marketing(customer_id, channel, acquisition_date);
+
+DELETE FROM raw_industry a USING raw_industry b
+WHERE a.customer_id = b.customer_id AND a.industry_code = b.industry_code
+  AND (COALESCE(a.refresh_date, '-infinity'), a.ctid) < (COALESCE(b.refresh_date, '-infinity'), b.ctid);
+CREATE UNIQUE INDEX IF NOT EXISTS uq_raw_industry_customer_industry ON raw_industry(customer_id, industry_code);